@@ -0,0 +1,528 @@
+#!/usr/bin/env python
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from tegra import get_format_info
+
+# ASTC blocks are 128 bits, whatever their footprint. Only the 2D LDR
+# profile is decoded: HDR endpoints and HDR void extent blocks come out in
+# the error color, like reserved or invalid blocks
+
+# Texels decoded per NumPy batch, which bounds the size of its arrays
+BATCH_TEXELS = 1 << 18
+# Inputs of fewer blocks are decoded in this process, larger ones (big
+# textures, whole mip chains) are split into batches over a process pool
+PARALLEL_BLOCKS = 65536
+
+ERROR_COLOR = (255, 0, 255, 255)
+
+SRGB = 0x06
+
+# Integer sequence encoding of a range of levels: values are made of plain
+# bits, optionally topped by a trit or a quint
+BITS, TRITS, QUINTS = 0, 1, 2
+encodings = {
+    2: (BITS, 1), 3: (TRITS, 0), 4: (BITS, 2), 5: (QUINTS, 0), 6: (TRITS, 1),
+    8: (BITS, 3), 10: (QUINTS, 1), 12: (TRITS, 2), 16: (BITS, 4), 20: (QUINTS, 2),
+    24: (TRITS, 3), 32: (BITS, 5), 40: (QUINTS, 3), 48: (TRITS, 4), 64: (BITS, 6),
+    80: (QUINTS, 4), 96: (TRITS, 5), 128: (BITS, 7), 160: (QUINTS, 5), 192: (TRITS, 6),
+    256: (BITS, 8),
+}
+
+# Weight ranges, by the precision bit of the block mode, and endpoint value
+# ranges, of which the largest one fitting in the block is used
+weight_ranges = ((2, 3, 4, 5, 6, 8), (10, 12, 16, 20, 24, 32))
+color_ranges = (6, 8, 10, 12, 16, 20, 24, 32, 40, 48, 64, 80, 96, 128, 160, 192, 256)
+
+# Unquantization of trit and quint ranges: (bits pattern of B, C), letters
+# being the bits of the value below the trit or quint, "a" the lowest
+weight_patterns = {
+    6: ("0000000", 50), 10: ("0000000", 28), 12: ("b000b0b", 23),
+    20: ("b0000b0", 13), 24: ("cb000cb", 11),
+}
+color_patterns = {
+    6: ("000000000", 204), 10: ("000000000", 113), 12: ("b000b0bb0", 93),
+    20: ("b0000bb00", 54), 24: ("cb000cbcb", 44), 40: ("cb0000cbc", 26),
+    48: ("dcb000dcb", 22), 80: ("dcb0000dc", 13), 96: ("edcb000ed", 11),
+    160: ("edcb0000e", 6), 192: ("fedcb000f", 5),
+}
+
+# Color endpoint modes with HDR endpoints
+HDR_MODES = {2, 3, 7, 11, 14, 15}
+
+def get_ise_length(count: int, levels: int):
+    # Bits taken by a sequence of count values
+    kind, bits = encodings[levels]
+    if kind == TRITS:
+        return count * bits + (8 * count + 4) // 5
+    if kind == QUINTS:
+        return count * bits + (7 * count + 2) // 3
+    return count * bits
+
+def decode_trits(t: int):
+    # The 5 trits packed into 8 bits
+    if t >> 2 & 7 == 7:
+        c = (t >> 5 & 7) << 2 | t & 3
+        t4 = t3 = 2
+    else:
+        c = t & 0x1F
+        if t >> 5 & 3 == 3:
+            t4, t3 = 2, t >> 7 & 1
+        else:
+            t4, t3 = t >> 7 & 1, t >> 5 & 3
+    if c & 3 == 3:
+        t2, t1 = 2, c >> 4 & 1
+        t0 = (c >> 3 & 1) << 1 | (c >> 2 & 1) & ~(c >> 3) & 1
+    elif c >> 2 & 3 == 3:
+        t2 = t1 = 2
+        t0 = c & 3
+    else:
+        t2, t1 = c >> 4 & 1, c >> 2 & 3
+        t0 = (c >> 1 & 1) << 1 | c & 1 & ~(c >> 1) & 1
+    return t0, t1, t2, t3, t4
+
+def decode_quints(q: int):
+    # The 3 quints packed into 7 bits
+    if q >> 1 & 3 == 3 and q >> 5 & 3 == 0:
+        return 4, 4, (q & 1) << 2 | (q >> 4 & ~q & 1) << 1 | (q >> 3 & ~q & 1)
+    if q >> 1 & 3 == 3:
+        q2 = 4
+        c = (q >> 3 & 3) << 3 | (~q >> 5 & 3) << 1 | q & 1
+    else:
+        q2 = q >> 5 & 3
+        c = q & 0x1F
+    if c & 7 == 5:
+        return c >> 3 & 3, 4, q2
+    return c & 7, c >> 3 & 3, q2
+
+trit_table = np.array([decode_trits(t) for t in range(256)], np.int32)
+quint_table = np.array([decode_quints(q) for q in range(128)], np.int32)
+
+def replicate(value: int, bits: int, size: int):
+    # Repeat the bits of value until size bits are filled
+    if not bits:
+        return 0
+    result = 0
+    filled = 0
+    while filled < size:
+        result = result << bits | value
+        filled += bits
+    return result >> (filled - size)
+
+def unquantize(value: int, levels: int, patterns, size: int):
+    # A value of an integer sequence to a size bits value
+    kind, bits = encodings[levels]
+    if kind == BITS:
+        return replicate(value, bits, size)
+    pattern, c = patterns[levels]
+    digit = value >> bits
+    b = 0
+    for i, char in enumerate(pattern):
+        if char != "0":
+            b |= (value >> (ord(char) - ord("a")) & 1) << (len(pattern) - 1 - i)
+    a = (1 << len(pattern)) - 1 if value & 1 else 0
+    t = (digit * c + b) ^ a
+    return a & (1 << (size - 1)) | t >> 2
+
+def get_weight_table(levels: int):
+    # Weight values of a range, in 0-64
+    if levels == 3:
+        weights = [0, 32, 63]
+    elif levels == 5:
+        weights = [0, 16, 32, 47, 63]
+    else:
+        weights = [unquantize(value, levels, weight_patterns, 6) for value in range(levels)]
+    return np.array([weight + (weight > 32) for weight in weights], np.int32)
+
+weight_tables = {levels: get_weight_table(levels) for ranges in weight_ranges for levels in ranges}
+color_tables = {levels: np.array([unquantize(value, levels, color_patterns, 8) for value in range(levels)], np.int32) for levels in color_ranges}
+
+def decode_block_mode(mode: int):
+    # (grid width, grid height, dual plane, weight levels) of an 11 bits
+    # block mode, None if it is reserved
+    if mode & 3:
+        r = mode >> 4 & 1 | (mode & 3) << 1
+        a, b = mode >> 5 & 3, mode >> 7 & 3
+        kind = mode >> 2 & 3
+        if kind == 0:
+            width, height = b + 4, a + 2
+        elif kind == 1:
+            width, height = b + 8, a + 2
+        elif kind == 2:
+            width, height = a + 2, b + 8
+        elif mode & 0x100:
+            width, height = (b & 1) + 2, a + 2
+        else:
+            width, height = a + 2, (b & 1) + 6
+        dual, high = mode >> 10 & 1, mode >> 9 & 1
+    else:
+        r = mode >> 4 & 1 | (mode >> 2 & 3) << 1
+        if r < 2:
+            return None
+        a, b = mode >> 5 & 3, mode >> 9 & 3
+        kind = mode >> 7 & 3
+        dual, high = mode >> 10 & 1, mode >> 9 & 1
+        if kind == 0:
+            width, height = 12, a + 2
+        elif kind == 1:
+            width, height = a + 2, 12
+        elif kind == 2:
+            width, height = a + 6, b + 6
+            dual = high = 0
+        elif a == 0:
+            width, height = 6, 10
+        elif a == 1:
+            width, height = 10, 6
+        else:
+            return None
+    return width, height, dual, weight_ranges[high][r - 2]
+
+block_modes = [decode_block_mode(mode) for mode in range(2048)]
+
+@lru_cache(maxsize=None)
+def get_ise_layout(count: int, levels: int):
+    # Positions of the bits of every value (count, bits) and of every packed
+    # trits or quints block (blocks, 8 or 7), from the start of the sequence.
+    # Positions past its end are -1, those bits read as 0
+    kind, bits = encodings[levels]
+    length = get_ise_length(count, levels)
+    if kind == BITS:
+        return np.arange(count * bits).reshape(count, bits), None
+    group, packed_bits = ((5, (2, 2, 1, 2, 1)) if kind == TRITS else (3, (3, 2, 2)))
+    values = []
+    packed = []
+    pos = 0
+    for _ in range(-(-count // group)):
+        block = []
+        for i in range(group):
+            values.append(list(range(pos, pos + bits)))
+            pos += bits
+            block.extend(range(pos, pos + packed_bits[i]))
+            pos += packed_bits[i]
+        packed.append(block)
+    values = np.array(values[:count], np.intp).reshape(count, bits)
+    packed = np.array(packed, np.intp)
+    packed[packed >= length] = -1
+    return values, packed
+
+def get_values(bits, positions):
+    # Little endian values from (N, bit count) bits at each row of positions
+    return bits[:, positions] @ (1 << np.arange(positions.shape[-1]))
+
+def decode_ise(bits, start: int, count: int, levels: int):
+    # (N, count) values of a sequence starting at bit start. bits are padded
+    # with zeros past 128, where the positions past the end point
+    kind, value_bits = encodings[levels]
+    values, packed = get_ise_layout(count, levels)
+    result = get_values(bits, values + start) if value_bits else np.zeros((len(bits), count), np.int64)
+    if kind == BITS:
+        return result
+    packed = np.where(packed < 0, 128, packed + start)
+    table = trit_table if kind == TRITS else quint_table
+    digits = table[get_values(bits, packed)].reshape(len(bits), -1)[:, :count]
+    return digits << value_bits | result
+
+def hash52(p):
+    # Integer hash of the partition seeds, on uint32 arrays
+    p ^= p >> 15
+    p -= p << 17
+    p += p << 7
+    p += p << 4
+    p ^= p >> 5
+    p += p << 16
+    p ^= p >> 7
+    p ^= p >> 3
+    p ^= p << 6
+    p ^= p >> 17
+    return p
+
+@lru_cache(maxsize=64)
+def get_partition_table(partitions: int, block_width: int, block_height: int):
+    # Partition of every texel of a block, for each of the 1024 partition
+    # seeds. Tables are cached, blocks only look their seed up
+    seed = np.arange(1024, dtype=np.uint32)[:, None] + np.uint32((partitions - 1) * 1024)
+    y, x = np.divmod(np.arange(block_width * block_height, dtype=np.uint32), np.uint32(block_width))
+    if block_width * block_height < 31:
+        x, y = x << 1, y << 1
+    rnum = hash52(seed.copy())
+    seeds = [rnum >> shift & 0xF for shift in (0, 4, 8, 12, 16, 20, 24, 28, 18, 22, 26)]
+    seeds.append((rnum >> 30 | rnum << 2) & 0xF)
+    seeds = [value * value for value in seeds]
+
+    other = 6 if partitions == 3 else 5
+    odd = (seed & 1).astype(bool)
+    small = np.where(seed & 2, 4, 5).astype(np.uint32)
+    sh1 = np.where(odd, small, other).astype(np.uint32)
+    sh2 = np.where(odd, other, small).astype(np.uint32)
+    sh3 = np.where(seed & 0x10, sh1, sh2)
+    seeds = [value >> shift for value, shift in zip(seeds, (sh1, sh2) * 4 + (sh3,) * 4)]
+
+    a = (seeds[0] * x + seeds[1] * y + (rnum >> 14)) & 0x3F
+    b = (seeds[2] * x + seeds[3] * y + (rnum >> 10)) & 0x3F
+    c = (seeds[4] * x + seeds[5] * y + (rnum >> 6)) & 0x3F if partitions > 2 else np.zeros_like(a)
+    d = (seeds[6] * x + seeds[7] * y + (rnum >> 2)) & 0x3F if partitions > 3 else np.zeros_like(a)
+    table = np.where((a >= b) & (a >= c) & (a >= d), 0, np.where((b >= c) & (b >= d), 1, np.where(c >= d, 2, 3)))
+    return table.astype(np.uint8)
+
+@lru_cache(maxsize=256)
+def get_infill_table(block_width: int, block_height: int, grid_width: int, grid_height: int):
+    # The 4 grid points each texel is interpolated from and their factors,
+    # out of 16, as (texels, 4) arrays
+    ds = (1024 + block_width // 2) // (block_width - 1)
+    dt = (1024 + block_height // 2) // (block_height - 1)
+    t, s = np.divmod(np.arange(block_width * block_height), block_width)
+    gs = (ds * s * (grid_width - 1) + 32) >> 6
+    gt = (dt * t * (grid_height - 1) + 32) >> 6
+    fs, ft = gs & 0xF, gt & 0xF
+    v0 = (gs >> 4) + (gt >> 4) * grid_width
+    w11 = (fs * ft + 8) >> 4
+    indices = np.stack((v0, v0 + 1, v0 + grid_width, v0 + grid_width + 1), 1)
+    factors = np.stack((16 - fs - ft + w11, fs - w11, ft - w11, w11), 1)
+    # Points past the grid always have a factor of 0
+    return np.minimum(indices, grid_width * grid_height - 1), factors
+
+def bit_transfer_signed(a, b):
+    b = b >> 1 | a & 0x80
+    a = a >> 1 & 0x3F
+    return np.where(a & 0x20, a - 0x40, a), b
+
+def blue_contract(r, g, b, a):
+    return (r + b) >> 1, (g + b) >> 1, b, a
+
+def decode_endpoints(mode: int, v):
+    # The two (N, 4) RGBA endpoints of an LDR color endpoint mode, from its
+    # (N, count) unquantized values
+    v = [v[:, i] for i in range(v.shape[1])]
+    opaque = np.full(len(v[0]), 255)
+    if mode == 0:
+        e0 = (v[0],) * 3 + (opaque,)
+        e1 = (v[1],) * 3 + (opaque,)
+    elif mode == 1:
+        l0 = v[0] >> 2 | v[1] & 0xC0
+        l1 = np.minimum(l0 + (v[1] & 0x3F), 255)
+        e0 = (l0,) * 3 + (opaque,)
+        e1 = (l1,) * 3 + (opaque,)
+    elif mode == 4:
+        e0 = (v[0],) * 3 + (v[2],)
+        e1 = (v[1],) * 3 + (v[3],)
+    elif mode == 5:
+        v[1], v[0] = bit_transfer_signed(v[1], v[0])
+        v[3], v[2] = bit_transfer_signed(v[3], v[2])
+        e0 = (v[0],) * 3 + (v[2],)
+        e1 = (v[0] + v[1],) * 3 + (v[2] + v[3],)
+    elif mode in (6, 10):
+        alpha0, alpha1 = (v[4], v[5]) if mode == 10 else (opaque, opaque)
+        e0 = (v[0] * v[3] >> 8, v[1] * v[3] >> 8, v[2] * v[3] >> 8, alpha0)
+        e1 = (v[0], v[1], v[2], alpha1)
+    elif mode in (8, 12):
+        alpha0, alpha1 = (v[6], v[7]) if mode == 12 else (opaque, opaque)
+        swap = v[1] + v[3] + v[5] < v[0] + v[2] + v[4]
+        e0 = np.where(swap, blue_contract(v[1], v[3], v[5], alpha1), (v[0], v[2], v[4], alpha0))
+        e1 = np.where(swap, blue_contract(v[0], v[2], v[4], alpha0), (v[1], v[3], v[5], alpha1))
+    elif mode in (9, 13):
+        for i in range(0, 8 if mode == 13 else 6, 2):
+            v[i + 1], v[i] = bit_transfer_signed(v[i + 1], v[i])
+        alpha0, alpha1 = (v[6], v[6] + v[7]) if mode == 13 else (opaque, opaque)
+        swap = v[1] + v[3] + v[5] < 0
+        base = (v[0], v[2], v[4], alpha0)
+        offset = (v[0] + v[1], v[2] + v[3], v[4] + v[5], alpha1)
+        e0 = np.where(swap, blue_contract(*offset), base)
+        e1 = np.where(swap, blue_contract(*base), offset)
+    else:
+        raise NotImplementedError(f"HDR color endpoint mode {mode}")
+    return np.clip(np.stack(e0, 1), 0, 255), np.clip(np.stack(e1, 1), 0, 255)
+
+def group_by(keys):
+    # (key, indices) of every distinct key, or row of keys
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(unique)))[:-1]
+    return zip(unique.tolist(), np.split(np.argsort(inverse, kind="stable"), bounds))
+
+def decode_weights(bits, mode: int, partitions: int, block_width: int, block_height: int):
+    # Weights of blocks sharing their block mode and partition count, as (N,
+    # 2, texels) planes, with the channel using the second plane (-1 when
+    # there is one plane). Also returns where the endpoints of each block are,
+    # as (N, 6) rows: color endpoint mode of each partition (-1 past the
+    # partition count), start bit and bits available. None if the mode is invalid
+    config = block_modes[mode]
+    if config is None:
+        return None
+    grid_width, grid_height, dual, weight_levels = config
+    weight_count = grid_width * grid_height * (dual + 1)
+    weight_bits = get_ise_length(weight_count, weight_levels)
+    if grid_width > block_width or grid_height > block_height or weight_count > 64 or not 24 <= weight_bits <= 96 or dual and partitions == 4:
+        return None
+
+    # Weights are stored backwards from the end of the block
+    count = len(bits)
+    reverse = np.zeros_like(bits)
+    reverse[:, :128] = bits[:, 127::-1]
+    grid = weight_tables[weight_levels][decode_ise(reverse, 0, weight_count, weight_levels)]
+    indices, factors = get_infill_table(block_width, block_height, grid_width, grid_height)
+    weights = np.zeros((count, 2, block_width * block_height), np.int32)
+    for plane in range(dual + 1):
+        weights[:, plane] = ((grid[:, plane::dual + 1][:, indices] * factors).sum(-1) + 8) >> 4
+
+    colors = np.full((count, 6), -1, np.int64)
+    if partitions == 1:
+        colors[:, 0] = get_values(bits, np.arange(13, 17))
+        colors[:, 4] = 17
+        extra_bits = 0
+    else:
+        # Either one mode for every partition, or a base class and a class
+        # offset and mode per partition, spilling below the weights
+        selector = get_values(bits, np.arange(23, 25))
+        data = get_values(bits, np.arange(25, 29))
+        extra_start = 128 - weight_bits - (3 * partitions - 4)
+        data = np.where(selector != 0, data | get_values(bits, np.arange(extra_start, 128 - weight_bits)) << 4, data)
+        part = np.arange(partitions)
+        classes = selector[:, None] - 1 + (data[:, None] >> part & 1)
+        modes = data[:, None] >> (partitions + 2 * part) & 3
+        colors[:, :partitions] = np.where(selector[:, None] != 0, classes << 2 | modes, data[:, None])
+        colors[:, 4] = 29
+        extra_bits = np.where(selector != 0, 3 * partitions - 4, 0)
+    colors[:, 5] = 128 - weight_bits - extra_bits - 2 * dual - colors[:, 4]
+
+    channels = np.full(count, -1)
+    if dual:
+        # Just below the weights and the extra endpoint mode bits
+        ccs_start = 128 - weight_bits - extra_bits - 2 + np.zeros(count, np.intp)
+        rows = np.arange(count)
+        channels = bits[rows, ccs_start] | bits[rows, ccs_start + 1] << 1
+    return weights, channels, colors
+
+def decode_colors(bits, cems, start: int, available: int):
+    # (N, partitions, 2, 4) endpoints of blocks sharing their color endpoint
+    # modes and the bits holding them. None if those are invalid
+    if HDR_MODES.intersection(cems):
+        return None
+    color_count = sum(2 * ((cem >> 2) + 1) for cem in cems)
+    fitting = [levels for levels in color_ranges if get_ise_length(color_count, levels) <= available]
+    if color_count > 18 or not fitting:
+        return None
+    values = color_tables[fitting[-1]][decode_ise(bits, start, color_count, fitting[-1])]
+
+    endpoints = np.empty((len(bits), len(cems), 2, 4), np.int32)
+    start = 0
+    for partition, cem in enumerate(cems):
+        size = 2 * ((cem >> 2) + 1)
+        endpoints[:, partition, 0], endpoints[:, partition, 1] = decode_endpoints(cem, values[:, start:start + size])
+        start += size
+    return endpoints
+
+def decode_blocks(blocks, format_: int):
+    # Decode (N, 16) blocks at once to (N, block height, block width, 4) RGBA
+    # pixels. Weights are decoded per group of blocks sharing their block
+    # mode, endpoints per group sharing their endpoint modes, and every block
+    # is then interpolated at once
+    block_width, block_height = get_format_info(format_)[1:]
+    texels = block_width * block_height
+    srgb = format_ & 0xFF == SRGB
+    blocks = np.ascontiguousarray(blocks, np.uint8).reshape(-1, 16)
+    count = len(blocks)
+    pixels = np.empty((count, texels, 4), np.uint8)
+    pixels[:] = ERROR_COLOR
+
+    # Bits of each block, least significant first, followed by 128 zeros
+    bits = np.zeros((count, 256), np.uint8)
+    bits[:, :128] = np.unpackbits(blocks, axis=1, bitorder="little")
+    mode = blocks[:, 0].astype(np.int32) | (blocks[:, 1].astype(np.int32) & 7) << 8
+    partitions = (blocks[:, 1].astype(np.int32) >> 3 & 3) + 1
+
+    # Void extent blocks are a single color, stored as 16 bits channels
+    void = mode & 0x1FF == 0x1FC
+    ldr = void & (blocks[:, 1] & 2 == 0)
+    pixels[ldr] = (blocks[ldr, 8:16].copy().view("<u2") >> 8).astype(np.uint8)[:, None]
+
+    weights = np.zeros((count, 2, texels), np.int32)
+    channels = np.full(count, -1)
+    colors = np.full((count, 6), -1, np.int64)
+    others = np.flatnonzero(~void)
+    for key, index in group_by(mode[others] | (partitions[others] - 1) << 11):
+        index = others[index]
+        decoded = decode_weights(bits[index], key & 0x7FF, (key >> 11) + 1, block_width, block_height)
+        if decoded is not None:
+            weights[index], channels[index], colors[index] = decoded
+
+    endpoints = np.zeros((count, 4, 2, 4), np.int32)
+    valid = np.zeros(count, bool)
+    others = np.flatnonzero(colors[:, 0] >= 0)
+    for key, index in group_by(colors[others]):
+        index = others[index]
+        cems = [cem for cem in key[:4] if cem >= 0]
+        decoded = decode_colors(bits[index], cems, key[4], key[5])
+        if decoded is not None:
+            endpoints[index, :len(cems)] = decoded
+            valid[index] = True
+
+    index = np.flatnonzero(valid)
+    seeds = get_values(bits[index], np.arange(13, 23))
+    texel_partitions = np.zeros((len(index), texels), np.intp)
+    for partition_count in (2, 3, 4):
+        selected = partitions[index] == partition_count
+        if selected.any():
+            texel_partitions[selected] = get_partition_table(partition_count, block_width, block_height)[seeds[selected]]
+    texel_endpoints = endpoints[index[:, None], texel_partitions]
+    e0, e1 = texel_endpoints[..., 0, :], texel_endpoints[..., 1, :]
+    planes = weights[index]
+    texel_weights = np.where(np.arange(4) == channels[index, None, None], planes[:, 1, :, None], planes[:, 0, :, None])
+
+    # Interpolation is done on 16 bits values
+    if srgb:
+        c0, c1 = e0 << 8 | 0x80, e1 << 8 | 0x80
+    else:
+        c0, c1 = e0 * 257, e1 * 257
+    pixels[index] = (c0 * (64 - texel_weights) + c1 * texel_weights + 32) >> 6 >> 8
+    return pixels.reshape(-1, block_height, block_width, 4)
+
+# Process pools by worker count, started on first use and kept for the
+# following decodes, since starting one costs more than a texture takes
+executors = {}
+
+def get_executor(workers: int):
+    executor = executors.get(workers)
+    if executor is None:
+        executor = executors[workers] = ProcessPoolExecutor(workers)
+    return executor
+
+def decode_batches(batches, format_: int, workers: int = None, executor=None):
+    # Decode lists of blocks, over a process pool when they are large enough:
+    # executor when given, otherwise the shared pool of workers processes
+    if sum(len(batch) for batch in batches) < PARALLEL_BLOCKS:
+        return [decode_blocks(batch, format_) for batch in batches]
+    if executor is None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            return [decode_blocks(batch, format_) for batch in batches]
+        executor = get_executor(workers)
+    return list(executor.map(decode_blocks, batches, [format_] * len(batches)))
+
+def decode_images(images, format_: int, sizes=None, workers: int = None, executor=None):
+    # Decode several deswizzled (blocks height, blocks width, 16) images of
+    # the same format (a mip chain, array slices) as one run of blocks, split
+    # into batches of whole block rows. Returns one (height, width, 4) RGBA
+    # array per image, cropped to sizes ((width, height) per image) when given
+    block_width, block_height = get_format_info(format_)[1:]
+    blocks = np.concatenate([image.reshape(-1, 16) for image in images])
+    row = max(1, images[0].shape[1])
+    batch_size = max(row, BATCH_TEXELS // (block_width * block_height) // row * row)
+    batches = [blocks[start:start + batch_size] for start in range(0, len(blocks), batch_size)]
+    pixels = np.concatenate(decode_batches(batches, format_, workers, executor)) if batches else np.empty((0, block_height, block_width, 4), np.uint8)
+
+    results = []
+    start = 0
+    for i, image in enumerate(images):
+        height, width = image.shape[:2]
+        rgba = pixels[start:start + height * width].reshape(height, width, block_height, block_width, 4)
+        rgba = rgba.transpose(0, 2, 1, 3, 4).reshape(height * block_height, width * block_width, 4)
+        if sizes:
+            rgba = rgba[:sizes[i][1], :sizes[i][0]]
+        results.append(rgba)
+        start += height * width
+    return results
@@ -0,0 +1,489 @@
+#!/usr/bin/env python
+
+import argparse
+import random
+import struct
+import time
+import tracemalloc
+
+from bntx import BNTX
+from classes import FRES
+from formats import *
+from patricia import build_tree
+from relocation import Pointers
+from tegra import get_element_size, get_format_info, get_levels, get_mip_block_height, is_astc, swizzle
+
+# Synthetic BFRES files
+# ---------------------
+
+class Writer():
+    # Builds a file out of structs_fmts records. Pointers are absolute on
+    # Switch, so only the fields pointing to strings have to wait for the
+    # string pool. Every pointer field written is listed in the relocation
+    # table, null or not, as on real files
+    def __init__(self):
+        self.data = bytearray()
+        self.strings = []
+        self.pointers = []
+        self.positions = {}
+        # Vertex and index data, written to the buffer section at the end
+        self.gpu = bytearray()
+
+    def align(self, alignment: int):
+        self.data += bytes(-len(self.data) % alignment)
+
+    def write(self, data: bytes, alignment: int = 8):
+        self.align(alignment)
+        pos = len(self.data)
+        self.data += data
+        return pos
+
+    def write_gpu(self, data: bytes, alignment: int = 8):
+        # Offset of data in the buffer section
+        self.gpu += bytes(-len(self.gpu) % alignment)
+        pos = len(self.gpu)
+        self.gpu += data
+        return pos
+
+    def buffer_section(self):
+        # The buffer info, then the section itself, page aligned
+        pos = self.reserve("BufferInfo")
+        self.write(bytes(16))
+        data = self.write(bytes(self.gpu), 0x1000)
+        self.record("BufferInfo", pos, size=len(self.gpu), data_offset=data)
+        return pos
+
+    def reserve(self, name: str, count: int = 1):
+        return self.write(bytes(layouts[name].size * count))
+
+    def string(self, pos: int, string: str):
+        # Point the 8 bytes field at pos to string once the pool is written
+        self.strings.append((pos, string))
+        self.pointers.append(pos)
+
+    def record(self, name: str, pos: int = None, **fields):
+        # Fields are given by name, strings for the pointers to names
+        layout = layouts[name]
+        if pos is None:
+            pos = self.reserve(name)
+
+        values = []
+        for field, kind, index, count, offset, swap in layout.fields:
+            value = fields.get(field, 0)
+            if kind == FIELD_POINTER:
+                if isinstance(value, str):
+                    self.string(pos + offset, value)
+                    value = 0
+                else:
+                    self.pointers.append(pos + offset)
+            elif swap:
+                value = int.from_bytes(value.to_bytes(swap, "big"), "little")
+            items = list(value) if isinstance(value, (list, tuple)) else [value]
+            values += items + [0] * (count - len(items))
+        layout.struct.pack_into(self.data, pos, *values)
+        return pos
+
+    def pointer_array(self, targets):
+        pos = self.write(struct.pack(f"<{len(targets)}Q", *targets))
+        self.pointers += [pos + i * 8 for i in range(len(targets))]
+        return pos
+
+    def string_array(self, strings):
+        # An array of pointers to names
+        pos = self.write(bytes(len(strings) * 8))
+        for i, string in enumerate(strings):
+            self.string(pos + i * 8, string)
+        return pos
+
+    def index_group(self, names):
+        nodes = build_tree([name.encode() for name in names])
+        pos = self.write(struct.pack("<4s i", b"_DIC", len(names)))
+        self.data += struct.pack("<i 2H Q", -1, nodes[0][1], nodes[0][2], 0)
+        for name, (search_value, left_index, right_index) in zip(names, nodes[1:]):
+            self.string(len(self.data) + 8, name)
+            self.data += struct.pack("<i 2H Q", search_value, left_index, right_index, 0)
+        return pos
+
+    def finish(self, names=()):
+        # Write the string pool, each string with its 2 bytes length, and
+        # point every string field to it. names are added to the pool for
+        # fields other than pointers, found in self.positions afterwards
+        start = self.write(b"_STR" + bytes(12))
+        self.positions = {}
+        for string in sorted(set(string for _, string in self.strings) | set(names)):
+            encoded = string.encode()
+            self.positions[string] = self.write(struct.pack("<H", len(encoded)) + encoded + b"\x00", 2)
+        self.align(8)
+        for pos, string in self.strings:
+            struct.pack_into("<Q", self.data, pos, self.positions[string])
+        return start, len(self.data) - start
+
+    def relocation_table(self):
+        # One section over the whole file, with an entry per run of
+        # consecutive pointers
+        runs = []
+        for pos in sorted(set(self.pointers)):
+            if runs and runs[-1][0] + runs[-1][1] * 8 == pos and runs[-1][1] < 0xFF:
+                runs[-1][1] += 1
+            else:
+                runs.append([pos, 1])
+        self.align(8)
+        pos = self.write(struct.pack("<4s 2I 4x", b"_RLT", len(self.data), 1))
+        self.data += struct.pack("<Q 4I", 0, 0, pos, 0, len(runs))
+        for start, count in runs:
+            self.data += struct.pack("<I H 2B", start, 1, count, 0)
+        return pos
+
+def write_model(writer: Writer, pos: int, name: str, bones: int, vertices: int, rng: random.Random):
+    # Skeleton, a chain of bones
+    bones_offset = writer.reserve("Bone", bones)
+    for i in range(bones):
+        writer.record(
+            "Bone", bones_offset + i * layouts["Bone"].size,
+            name_offset=f"bone{i}", bone_index=i, parent_index=i - 1, smooth_matrix_index=i,
+            rigid_matrix_index=-1, billboard_index=-1, flags=0x1000000,
+            scale=(1.0, 1.0, 1.0), rotation=(0.0, 0.0, 0.0, 1.0), translation=(0.0, 1.0 if i else 0.0, 0.0)
+            )
+    bone_dict = writer.index_group([f"bone{i}" for i in range(bones)])
+    matrix_to_bone = writer.write(struct.pack(f"<{bones}H", *range(bones)))
+    inverse_matrices = writer.write(b"".join(struct.pack("<12f", 1, 0, 0, 0, 0, 1, 0, -i, 0, 0, 1, 0) for i in range(bones)))
+    skeleton = writer.record(
+        "FSKLHeader",
+        magic=b"FSKL", bone_dict_offset=bone_dict, bones_offset=bones_offset, matrix_to_bone_offset=matrix_to_bone,
+        inverse_matrices_offset=inverse_matrices, flags=0x1100, bone_count=bones, smooth_matrix_count=bones
+        )
+
+    # Vertices, a float position and unorm texture coordinates in separate buffers
+    attributes = writer.record("VertexAttribute", name_offset="_p0", format=0x00000805, buffer_index=0)
+    writer.record("VertexAttribute", name_offset="_u0", format=0x00000201, buffer_index=1)
+    attribute_dict = writer.index_group(["_p0", "_u0"])
+    positions = writer.write_gpu(struct.pack(f"<{vertices * 3}f", *(rng.uniform(-100, 100) for _ in range(vertices * 3))))
+    writer.write_gpu(rng.randbytes(vertices * 4))
+    buffer_sizes = writer.record("BufferSize", size=vertices * 12)
+    writer.record("BufferSize", size=vertices * 4)
+    buffer_strides = writer.record("BufferStride", stride=12)
+    writer.record("BufferStride", stride=4)
+    fvtx = writer.record(
+        "FVTXHeader",
+        magic=b"FVTX", buffer_offset=positions, attributes_offset=attributes, attribute_dict_offset=attribute_dict,
+        buffer_sizes_offset=buffer_sizes, buffer_strides_offset=buffer_strides,
+        attribute_count=2, buffer_count=2, vertex_count=vertices, vertex_skin_count=1
+        )
+
+    # Shape, a triangle list drawn in one sub mesh
+    count = vertices // 3 * 3
+    sub_mesh = writer.record("SubMesh", offset=0, count=count)
+    indices = writer.write_gpu(struct.pack(f"<{count}H", *(rng.randrange(vertices) for _ in range(count))))
+    index_size = writer.record("BufferSize", size=count * 2)
+    mesh = writer.record(
+        "Mesh",
+        sub_meshes_offset=sub_mesh, buffer_size_offset=index_size, buffer_offset=indices,
+        primitive_type=3, index_format=1, index_count=count, sub_mesh_count=1
+        )
+    skin_indices = writer.write(struct.pack("<H", 0))
+    bounding_boxes = writer.record("Bounding", center=(0.0, 0.0, 0.0), extent=(100.0, 100.0, 100.0))
+    writer.record("Bounding", center=(0.0, 0.0, 0.0), extent=(100.0, 100.0, 100.0))
+    shape = writer.record(
+        "FSHPHeader",
+        magic=b"FSHP", name_offset="shape0", vertex_buffer_offset=fvtx, meshes_offset=mesh,
+        skin_bone_indices_offset=skin_indices, bounding_boxes_offset=bounding_boxes,
+        skin_bone_index_count=1, vertex_skin_count=1, mesh_count=1
+        )
+    shape_dict = writer.index_group(["shape0"])
+
+    # Material, with a render info of each type, a texture and a parameter
+    render_infos = writer.reserve("RenderInfo", 3)
+    for i, (info_name, type_, data) in enumerate((
+            ("gsys_priority", 0, writer.write(struct.pack("<i", 0))),
+            ("gsys_alpha_test_value", 1, writer.write(struct.pack("<f", 0.5))),
+            ("gsys_render_state_mode", 2, writer.string_array(["opaque"])))):
+        writer.record("RenderInfo", render_infos + i * layouts["RenderInfo"].size, name_offset=info_name, data_offset=data, count=1, type_=type_)
+    render_info_dict = writer.index_group(["gsys_priority", "gsys_alpha_test_value", "gsys_render_state_mode"])
+    shader_assign = writer.record(
+        "ShaderAssign",
+        shader_archive_name_offset="shader", shading_model_name_offset="model",
+        attrib_assigns_offset=writer.string_array(["_p0"]), attrib_assign_dict_offset=writer.index_group(["_p0"]),
+        sampler_assigns_offset=writer.string_array(["_a0"]), sampler_assign_dict_offset=writer.index_group(["_a0"]),
+        shader_options_offset=writer.string_array(["1"]), shader_option_dict_offset=writer.index_group(["enable_fog"]),
+        attrib_assign_count=1, sampler_assign_count=1, shader_option_count=1
+        )
+    sampler = writer.record("Sampler", max_anisotropy=1, max_lod=13.0)
+    parameter = writer.record("ShaderParam", name_offset="albedo_color", type_=15, length=16)
+    param_data = writer.write(struct.pack("<4f", 1, 1, 1, 1))
+    material = writer.record(
+        "FMATHeader",
+        magic=b"FMAT", name_offset="material0", render_infos_offset=render_infos, render_info_dict_offset=render_info_dict,
+        shader_assign_offset=shader_assign, texture_names_offset=writer.string_array([f"{name}_alb"]),
+        samplers_offset=sampler, sampler_dict_offset=writer.index_group(["_a0"]),
+        shader_params_offset=parameter, shader_param_dict_offset=writer.index_group(["albedo_color"]),
+        shader_param_data_offset=param_data, render_info_count=3, sampler_count=1, texture_count=1,
+        shader_param_count=1, param_data_length=16, raw_param_data_length=16
+        )
+    material_dict = writer.index_group(["material0"])
+
+    return writer.record(
+        "FMDLHeader", pos,
+        magic=b"FMDL", name_offset=name, skeleton_offset=skeleton, vertices_offset=fvtx,
+        shapes_offset=shape, shape_dict_offset=shape_dict, materials_offset=material, material_dict_offset=material_dict,
+        vertex_count=1, shape_count=1, material_count=1, total_vertex_count=vertices
+        )
+
+# Curves each bone animation can have, as (flag bit, offset of the animated
+# value), scale first
+curve_targets = ((6, 0x04), (7, 0x08), (8, 0x0C), (13, 0x10), (14, 0x14), (15, 0x18), (9, 0x20), (10, 0x24), (11, 0x28))
+
+def write_animation(writer: Writer, pos: int, name: str, bones: int, curves: int, frame_count: int, rng: random.Random):
+    # A skeletal animation with one bone animation per bone, each one made of
+    # cubic float curves keyed every few frames
+    curves = min(curves, len(curve_targets))
+    key_count = max(2, frame_count // 4)
+    bone_animations = writer.reserve("BoneAnimation", bones)
+    for i in range(bones):
+        curves_offset = writer.reserve("CurveHeader", curves) if curves else 0
+        for j, (bit, target) in enumerate(curve_targets[:curves]):
+            frames = writer.write(struct.pack(f"<{key_count}f", *(k * frame_count / (key_count - 1) for k in range(key_count))))
+            keys = writer.write(struct.pack(f"<{key_count * 4}f", *(rng.uniform(-1, 1) for _ in range(key_count * 4))))
+            writer.record(
+                "CurveHeader", curves_offset + j * layouts["CurveHeader"].size,
+                frames_offset=frames, keys_offset=keys, key_count=key_count, anim_data_offset=target,
+                end_frame=float(frame_count), scale=1.0, delta=1.0
+                )
+        base_data = writer.write(struct.pack("<10f", 1, 1, 1, 0, 0, 0, 0, 0, 0, 1))
+        flags = 0b111 << 3
+        for bit, target in curve_targets[:curves]:
+            flags |= 1 << bit
+        writer.record(
+            "BoneAnimation", bone_animations + i * layouts["BoneAnimation"].size,
+            name_offset=f"bone{i}", curves_offset=curves_offset, base_data_offset=base_data,
+            flags=flags, curve_count=curves, begin_curve=i * curves
+            )
+    bind_indices = writer.write(struct.pack(f"<{bones}H", *range(bones)))
+    return writer.record(
+        "FSKAHeader", pos,
+        magic=b"FSKA", name_offset=name, bind_indices_offset=bind_indices, bone_animations_offset=bone_animations,
+        flags=0b100, frame_count=frame_count, curve_count=bones * curves, bone_animation_count=bones
+        )
+
+def astc_blocks(count: int, format_: int, rng: random.Random):
+    # Random ASTC blocks, whose configuration bits are replaced by valid LDR
+    # ones: RGB or RGBA direct endpoints, on one partition or two
+    from astc import block_modes, color_ranges, get_ise_length
+
+    block_width, block_height = get_format_info(format_)[1:]
+    configs = []
+    for mode, config in enumerate(block_modes):
+        if config is None:
+            continue
+        grid_width, grid_height, dual, levels = config
+        weight_count = grid_width * grid_height * (dual + 1)
+        weight_bits = get_ise_length(weight_count, levels)
+        if grid_width > block_width or grid_height > block_height or weight_count > 64 or not 24 <= weight_bits <= 96:
+            continue
+        for partitions, cem in ((1, 8), (1, 12), (2, 8)):
+            start = 17 if partitions == 1 else 29
+            if get_ise_length(partitions * 2 * ((cem >> 2) + 1), color_ranges[0]) <= 128 - weight_bits - 2 * dual - start:
+                configs.append((mode | (partitions - 1) << 11 | cem << (13 if partitions == 1 else 25), 0x1FFFF if partitions == 1 else 0x1F801FFF))
+
+    data = bytearray(rng.randbytes(16 * count))
+    for i in range(count):
+        value, mask = rng.choice(configs)
+        struct.pack_into("<I", data, 16 * i, struct.unpack_from("<I", data, 16 * i)[0] & ~mask | value)
+    return bytes(data)
+
+def write_bntx(name: str, textures: int, size: int, mipmap_count: int, layers: int, rng: random.Random, format_: int = 0x1A01):
+    # A BNTX file of block compressed textures (BC1 by default) filled with
+    # random blocks, each one with layers array layers
+    bpp = get_format_info(format_)[0]
+    block_height = get_mip_block_height(get_element_size(size, size, format_)[1], 16)
+    levels, layer_size = get_levels(size, size, format_, block_height.bit_length() - 1, mipmap_count)
+
+    writer = Writer()
+    writer.write(bytes(layouts["BNTXHeader"].size))
+    nx = writer.reserve("NXHeader")
+    data_block = writer.write(b"BRTD" + bytes(12))
+    surfaces = []
+    for i in range(textures):
+        surface = bytearray(layer_size * layers)
+        for layer in range(layers):
+            for width, height, level_block_height, offset, level_size in levels:
+                start = layer * layer_size + offset
+                blocks = astc_blocks(width * height, format_, rng) if is_astc(format_) else rng.randbytes(width * height * bpp)
+                surface[start:start + level_size] = swizzle(blocks, width, height, bpp, level_block_height).tobytes()
+        surfaces.append(writer.write(bytes(surface), 0x200))
+    struct.pack_into("<Q", writer.data, data_block + 8, len(writer.data) - data_block)
+
+    infos = []
+    for i, surface in enumerate(surfaces):
+        mip_offsets = writer.pointer_array([surface + level[3] for level in levels])
+        infos.append(writer.record(
+            "TextureInfo",
+            magic=b"BRTI", flags=1, dimension=2, mip_count=mipmap_count, sample_count=1, format=format_,
+            access_flags=0x20, width=size, height=size, depth=1, array_length=layers,
+            texture_layout=block_height.bit_length() - 1, image_size=layer_size * layers, image_alignment=0x200,
+            channel_types=0x05040302, texture_dimension=1 if layers == 1 else 5,
+            name_offset=f"texture{i}", parent_offset=nx, mip_offsets_offset=mip_offsets
+            ))
+    textures_offset = writer.pointer_array(infos)
+    texture_dict = writer.index_group([f"texture{i}" for i in range(textures)])
+    writer.record(
+        "NXHeader", nx,
+        magic=b"NX  ", texture_count=textures, textures_offset=textures_offset,
+        data_block_offset=data_block, texture_dict_offset=texture_dict
+        )
+    writer.finish([name])
+    reloc_table_offset = writer.relocation_table()
+    writer.record(
+        "BNTXHeader", 0,
+        magic=b"BNTX", version=0x00040000, bom=0xFEFF, alignment=0x0C, target_addr_size=0x40,
+        file_name_offset=writer.positions[name] + 2, reloc_table_offset=reloc_table_offset, file_size=len(writer.data)
+        )
+    return bytes(writer.data)
+
+def generate(models: int = 1, animations: int = 1, textures: int = 1, bones: int = 4, curves: int = 3,
+             vertices: int = 1024, texture_size: int = 256, mipmap_count: int = 4, layers: int = 1,
+             texture_format: int = 0x1A01, frame_count: int = 60, seed: int = 0):
+    # A Switch BFRES file with the given amount of models and skeletal
+    # animations, and its textures in an embedded BNTX file
+    rng = random.Random(seed)
+    writer = Writer()
+    writer.write(bytes(0xD0))
+
+    model_offset = model_dict_offset = animation_offset = animation_dict_offset = 0
+    if models:
+        model_offset = writer.reserve("FMDLHeader", models)
+        for i in range(models):
+            write_model(writer, model_offset + i * layouts["FMDLHeader"].size, f"model{i}", bones, vertices, rng)
+        model_dict_offset = writer.index_group([f"model{i}" for i in range(models)])
+    if animations:
+        animation_offset = writer.reserve("FSKAHeader", animations)
+        for i in range(animations):
+            write_animation(writer, animation_offset + i * layouts["FSKAHeader"].size, f"animation{i}", bones, curves, frame_count, rng)
+        animation_dict_offset = writer.index_group([f"animation{i}" for i in range(animations)])
+    embedded_count = embedded_offset = embedded_dict_offset = 0
+    if textures:
+        bntx = write_bntx("textures", textures, texture_size, mipmap_count, layers, rng, texture_format)
+        embedded_count = 1
+        embedded_offset = writer.record("EmbeddedFile", data_offset=writer.write(bntx, 0x1000), length=len(bntx))
+        embedded_dict_offset = writer.index_group(["textures.bntx"])
+    writer.string(0x20, "synthetic")
+    # The other pointers of the header, used or not
+    writer.pointers += [0x28 + i * 8 for i in range(16)] + [0xB0]
+    string_table_offset, string_table_size = writer.finish()
+    buffer_section = writer.buffer_section()
+    reloc_table_offset = writer.relocation_table()
+
+    name_offset = struct.unpack_from("<Q", writer.data, 0x20)[0]
+    struct.pack_into(
+        "<4s 2I H 2B I 2H 2I 17Q 8x Q I 7H 6x", writer.data, 0,
+        b"FRES", 0x20202020, 0x00050003, 0xFEFF, 0x0C, 0, name_offset + 2, 0, 0xD0, reloc_table_offset, len(writer.data),
+        name_offset, model_offset, model_dict_offset, animation_offset, animation_dict_offset, *([0] * 9), buffer_section,
+        embedded_offset, embedded_dict_offset, string_table_offset, string_table_size, models, animations, 0, 0, 0, 0, embedded_count
+        )
+    return bytes(writer.data)
+
+# Benchmark
+# ---------
+
+def measure(function, repeat: int):
+    # Best time out of repeat runs, then the peak memory of one more traced run
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def get_stages(buffer):
+    # (name, function, bytes processed, objects processed) of every stage
+    fres = FRES(buffer, 0, lazy=True)
+    subfiles = [value for key, value in vars(fres).items() if key.endswith("_files")]
+
+    def names():
+        for key, files in vars(FRES(buffer, 0, lazy=True)).items():
+            if key.endswith("_files"):
+                files.names()
+
+    names_ = [(group, name) for group in fres.index_groups.values() for name in group.names()]
+    parsed = FRES(buffer, 0)
+    section = parsed.buffer_section
+    section_length = len(section) if section is not None else 0
+    section_rows = len(section.table) if section is not None else 0
+    bntx_files = [file for file in getattr(parsed, "embedded_files_files", []) if file.is_bntx()]
+    textures = list(parsed.get_textures().values())
+    texture_bytes = sum(texture.image_size for texture in textures)
+    images = sum(max(1, texture.mip_count) * texture.layer_count for texture in textures)
+    return [
+        ("header", lambda: FRES.Header(buffer, 0), 0xD0, 1),
+        ("relocation", lambda: Pointers(buffer, fres.relocation_table).resolve(), fres.relocation_table.get_length(), len(fres.pointers)),
+        ("index groups", lambda: FRES(buffer, 0, lazy=True), len(buffer), sum(group.count for group in fres.index_groups.values())),
+        ("names", names, len(buffer), sum(len(files) for files in subfiles)),
+        ("eager parse", lambda: FRES(buffer, 0), len(buffer), sum(len(files) for files in subfiles)),
+        ("buffer table", lambda: section.build_table(getattr(parsed, "model_files", [])), section_length, section_rows),
+        ("buffer views", lambda: section.get_views(), section_length, section_rows),
+        ("bntx", lambda: [BNTX(file.buffer, file.data_offset, file.length) for file in bntx_files], sum(file.length for file in bntx_files), len(textures)),
+        ("deswizzle", lambda: [texture.deswizzle() for texture in textures], texture_bytes, images),
+        ("decode", lambda: [texture.decode() for texture in textures], texture_bytes, images),
+        ("serialize", lambda: fres.serialize(), len(buffer), sum(group.count for group in fres.index_groups.values())),
+        ("name lookup", lambda: [group[name] for group, name in names_], len(names_) * 16, len(names_)),
+        ("tree search", lambda: [group.search(name) for group, name in names_], len(names_) * 16, len(names_)),
+        ]
+
+def run(buffer, repeat: int = 5):
+    # Stages the parser can't handle yet are reported with their error
+    results = []
+    for name, function, length, objects in get_stages(buffer):
+        try:
+            seconds, peak = measure(function, repeat)
+        except Exception as error:
+            results.append((name, f"{type(error).__name__}: {error}"))
+            continue
+        results.append((name, seconds, length / seconds / 1e6, objects / seconds, peak))
+    return results
+
+def print_results(title: str, results):
+    print(title)
+    print(f"  {'stage':<16}{'time (ms)':>12}{'MB/s':>12}{'objects/s':>14}{'peak (KB)':>12}")
+    for result in results:
+        if len(result) == 2:
+            print(f"  {result[0]:<16}  failed, {result[1]}")
+            continue
+        name, seconds, throughput, objects, peak = result
+        print(f"  {name:<16}{seconds * 1000:>12.3f}{throughput:>12.1f}{objects:>14.0f}{peak / 1024:>12.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the Switch parser on synthetic BFRES files and on real ones")
+    parser.add_argument("files", nargs="*", help="real .bfres files to time as well")
+    parser.add_argument("--models", type=int, default=64)
+    parser.add_argument("--bones", type=int, default=4, help="bones per model, and bone animations per animation")
+    parser.add_argument("--animations", type=int, default=64)
+    parser.add_argument("--curves", type=int, default=3, help="curves per bone animation")
+    parser.add_argument("--vertices", type=int, default=1024, help="vertices per model")
+    parser.add_argument("--textures", type=int, default=16)
+    parser.add_argument("--texture-size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=1)
+    parser.add_argument("--texture-format", type=lambda value: int(value, 0), default=0x1A01, help="BNTX format of the textures, 0x2D01 for ASTC 4x4")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", default=None, help="write the synthetic file there")
+    args = parser.parse_args()
+
+    data = generate(
+        args.models, args.animations, args.textures, args.bones, args.curves, args.vertices,
+        texture_size=args.texture_size, layers=args.layers, texture_format=args.texture_format
+        )
+    if args.save:
+        with open(args.save, "wb") as file:
+            file.write(data)
+    print_results(f"synthetic ({len(data) / 1e6:.2f} MB)", run(memoryview(data), args.repeat))
+
+    for path in args.files:
+        with open(path, "rb") as file:
+            data = file.read()
+        print_results(f"{path} ({len(data) / 1e6:.2f} MB)", run(memoryview(data), args.repeat))
+
+if __name__ == "__main__":
+    main()
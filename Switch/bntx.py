@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+import mmap
+from typing import List
+
+from classes import StringTable, get_index_group, get_pointer_array
+from formats import *
+from yaz0 import decompress, is_compressed
+
+class BNTX():
+    # Binary NX TeXture container, where the textures of a Switch BFRES are
+    # stored, as one of its embedded files. Its pointers are relative to its
+    # own start, so it is parsed from a view starting there, which copies
+    # nothing
+    def __init__(self, buffer, pos=0, length=0):
+        self.header = self.Header(buffer, pos)
+        self.buffer = memoryview(buffer)[pos:pos + (length or self.header.file_size)]
+        # The NX block follows the header
+        self.nx = self.NX(self.buffer, layouts["BNTXHeader"].size)
+        self.strings = StringTable(self.buffer)
+
+        self.relocation_table = None
+        self.pointers = None
+        if self.header.reloc_table_offset:
+            from relocation import Pointers, RelocationTable
+            self.relocation_table = RelocationTable(self.buffer, self.header.reloc_table_offset)
+            self.pointers = Pointers(self.buffer, self.relocation_table)
+
+        self.textures_dict = get_index_group(self.buffer, self.nx.texture_dict_offset, self.strings)
+        self.textures: List[Texture] = []
+        for pos in get_pointer_array(self.buffer, self.nx.textures_offset, self.nx.texture_count, self.pointers):
+            self.textures.append(Texture(self.buffer, pos, self.strings, self.pointers))
+
+    def __len__(self):
+        return len(self.textures)
+
+    def __iter__(self):
+        return iter(self.textures)
+
+    def __getitem__(self, key):
+        # A texture by index or by name
+        if isinstance(key, str):
+            key = self.textures_dict.index(key)
+        return self.textures[key]
+
+    def get_name(self):
+        # file_name_offset points past the length, like on FRES
+        return self.strings[self.header.file_name_offset - 2]
+
+    def get_texture_names(self):
+        return [texture.get_name() for texture in self.textures]
+
+    @classmethod
+    def open(cls, path):
+        # Map the file instead of reading it, texture data is then read from
+        # the mapping. Yaz0 compressed files are decompressed first
+        with open(path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if is_compressed(mapping):
+            data = decompress(mapping)
+            mapping.close()
+            return cls(memoryview(data))
+        return cls(memoryview(mapping))
+
+    class Header(Record, layout="BNTXHeader"):
+        ...
+
+    class NX(Record, layout="NXHeader"):
+        ...
+
+class Texture(Record, layout="TextureInfo"):
+    # BRTI: a texture, made of array_length layers, each one holding every
+    # mip level. Levels are stored block linear, one after the other, from
+    # the offsets of the first layer
+    __slots__ = ("buffer", "strings", "mip_offsets")
+
+    def __init__(self, buffer, pos, strings=None, pointers=None):
+        super().__init__(buffer, pos, pointers)
+        self.buffer = buffer
+        self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+        self.mip_offsets: List[int] = get_pointer_array(buffer, self.mip_offsets_offset, self.mip_count, pointers)
+
+    def get_name(self):
+        return self.strings[self.name_offset]
+
+    @property
+    def block_height_log2(self):
+        return self.texture_layout & 7
+
+    @property
+    def layer_count(self):
+        return max(1, self.array_length)
+
+    def get_layer_size(self):
+        return self.image_size // self.layer_count
+
+    def get_data(self):
+        # Every level of every layer, as a view into the file
+        start = self.mip_offsets[0]
+        return self.buffer[start:start + self.image_size]
+
+    def get_levels(self):
+        # (width, height, block height, offset) in elements of every mip
+        # level, offsets being relative to the start of a layer
+        from tegra import get_levels
+
+        levels = get_levels(self.width, self.height, self.format, self.block_height_log2, self.mip_count, self.tile_mode)[0]
+        start = self.mip_offsets[0]
+        return [(width, height, block_height, offset - start) for (width, height, block_height, _, _), offset in zip(levels, self.mip_offsets)]
+
+    def deswizzle(self, levels=None, layers=None):
+        # Linear (height, width, bytes per element) arrays, in blocks for
+        # block compressed formats, indexed by [level][layer]. Every level of
+        # every layer is gathered at once
+        from tegra import deswizzle_surface, get_format_info
+
+        if levels is None:
+            levels = range(max(1, self.mip_count))
+        if layers is None:
+            layers = range(self.layer_count)
+        surface = self.get_levels()
+        return deswizzle_surface(self.get_data(), [surface[level] for level in levels], list(layers), self.get_layer_size(), get_format_info(self.format)[0])
+
+    def decode(self, levels=None, layers=None, workers=None, executor=None):
+        # RGBA (height, width, 4) arrays of a block compressed texture,
+        # indexed by [level][layer]. Every level and layer is decoded in a
+        # single batch, ASTC ones over workers processes when large enough, or
+        # over executor when given
+        from tegra import get_bcn_format, is_astc
+
+        if levels is None:
+            levels = range(max(1, self.mip_count))
+        if layers is None:
+            layers = range(self.layer_count)
+        images = [image for level in self.deswizzle(levels, layers) for image in level]
+        sizes = [(max(1, self.width >> level), max(1, self.height >> level)) for level in levels for _ in layers]
+        if is_astc(self.format):
+            from astc import decode_images
+            decoded = decode_images(images, self.format, sizes, workers, executor)
+        else:
+            from bcn import decode_images
+            decoded = decode_images(images, *get_bcn_format(self.format), sizes)
+        return [decoded[i:i + len(layers)] for i in range(0, len(decoded), len(layers))]
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from formats import Record
+
+# One row per GPU buffer of the file: where it is in the buffer section, its
+# size and stride, and the model, vertex buffer or shape, and slot it belongs to
+buffer_dtype = np.dtype([
+    ("offset", "<u4"),
+    ("size", "<u4"),
+    ("stride", "<u2"),
+    ("kind", "u1"),
+    ("model", "<u2"),
+    ("owner", "<u2"),
+    ("slot", "<u2"),
+])
+
+VERTEX_BUFFER = 0
+INDEX_BUFFER = 1
+
+# Mesh index_format to the type of its indices
+index_types = {0: "<u1", 1: "<u2", 2: "<u4"}
+
+class BufferSection(Record, layout="BufferInfo"):
+    # The vertex and index buffers of every model, stored together after the
+    # string pool. The section is one memoryview over the file, and each
+    # buffer a slice of it, so reading them copies nothing. Vertex buffers
+    # and meshes only store their offset in the section
+    __slots__ = ("data", "table")
+
+    def __init__(self, buffer, pos, pointers=None):
+        super().__init__(buffer, pos, pointers)
+        self.data = memoryview(buffer)[self.data_offset:self.data_offset + self.size]
+        self.table = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def load(self):
+        # Read the whole section at once, the buffers of a mapped file are
+        # then views into memory instead of pages read one by one
+        self.data = memoryview(bytes(self.data))
+        return self.data
+
+    def build_table(self, models):
+        # Offset, size and stride of every buffer of the models, computed
+        # once for the whole file
+        rows = []
+        for model_index, model in enumerate(models):
+            for owner, fvtx in enumerate(model.vertices):
+                for slot, (offset, size, stride) in enumerate(zip(fvtx.buffer_offsets, fvtx.buffer_sizes, fvtx.buffer_strides)):
+                    rows.append((offset, size.size, stride.stride, VERTEX_BUFFER, model_index, owner, slot))
+            for owner, shape in enumerate(model.shapes):
+                for slot, mesh in enumerate(shape.meshes):
+                    stride = np.dtype(index_types[mesh.index_format]).itemsize
+                    rows.append((mesh.buffer_offset, mesh.index_count * stride, stride, INDEX_BUFFER, model_index, owner, slot))
+        self.table = np.array(rows, buffer_dtype)
+        return self.table
+
+    def get(self, offset: int, size: int):
+        return self.data[offset:offset + size]
+
+    def get_views(self, table=None):
+        # A memoryview of every row of the table, in order
+        table = self.table if table is None else table
+        return [self.data[offset:offset + size] for offset, size in zip(table["offset"].tolist(), table["size"].tolist())]
+
+    def get_vertex_buffers(self, fvtx):
+        return [self.get(offset, size.size) for offset, size in zip(fvtx.buffer_offsets, fvtx.buffer_sizes)]
+
+    def get_vertices(self, fvtx, index: int):
+        # (vertex count, stride) bytes of a vertex buffer, one row per vertex
+        stride = fvtx.buffer_strides[index].stride
+        return np.frombuffer(self.data, np.uint8, fvtx.header.vertex_count * stride, fvtx.buffer_offsets[index]).reshape(-1, stride)
+
+    def get_indices(self, mesh):
+        # Indices of a mesh, as an array over the section
+        return np.frombuffer(self.data, index_types[mesh.index_format], mesh.index_count, mesh.buffer_offset)
@@ -1,69 +1,287 @@
 #!/usr/bin/env python
 
 from formats import *
-from typing import List, Tuple
+import mmap
+import os
+import struct
+import sys
+# Modules shared by the Wii U and Switch scripts live in common/
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+from patricia import get_bit
+from yaz0 import decompress, is_compressed
+from typing import Dict, List, Tuple
 from struct import Struct
 
-class IndexGroup():
-    def __init__(self, buffer, pos):
-        self.entries = []
-        get_unpacked_data(self, "IndexGroup", buffer, pos)
-
+class StringTable():
+    # Names of a file by absolute offset. Each one is only decoded the first
+    # time it's asked for, then interned, so every record referencing a name
+    # gets the same str object
+    def __init__(self, buffer, pos=0, length=0):
+        self.buffer = buffer
+        self.pos = pos
+        self.length = length
+        self.strings: Dict[int, str] = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, pos):
+        return pos in self.strings
+
+    def __getitem__(self, pos):
+        string = self.strings.get(pos)
+        if string is None:
+            string = self.strings[pos] = sys.intern(get_string(self.buffer, pos))
+        return string
+
+class IndexGroup(Struct):
+    # A dict of named entries, stored as a patricia tree. Names can be looked
+    # up by walking the tree, or through a hash index built on first use
+    def __init__(self, buffer, pos, strings=None):
+        super().__init__("<4s i")
+        self.buffer = buffer
+        self.pos = pos
+        self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+        self.magic, self.count = self.unpack_from(buffer, pos)
+        self.indices: Dict[str, int] = None
+
+        # The first entry is the root of the tree, only used to search it
+        self.root: self.IndexEntry = self.IndexEntry(buffer, pos + 8)
+        self.entries: List[self.IndexEntry] = []
         for i in range(self.count):
-            # Add an entry to the "entries" list
-            self.entry = self.IndexEntry(buffer, (pos + 24) + (16 * i))
-            self.entries.append(self.entry)
-
-    class IndexEntry():
+            self.entries.append(self.IndexEntry(buffer, (pos + 24) + (16 * i)))
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, name):
+        return name in self.names()
+
+    def __getitem__(self, key):
+        # An entry by index or by name
+        if isinstance(key, str):
+            key = self.index(key)
+        return self.entries[key]
+
+    def names(self):
+        # Every name to its entry index, only read from the string table once
+        if self.indices is None:
+            self.indices = {self.strings[entry.name_offset]: i for i, entry in enumerate(self.entries)}
+        return self.indices
+
+    def index(self, name: str):
+        return self.names()[name]
+
+    def search(self, name: str):
+        # Index of the entry named name, found by walking the tree, which
+        # only reads the name of the entry it ends up at
+        key = name.encode()
+        parent, child = self.root, self.root.left_index
+        while child and self.entries[child - 1].search_value > parent.search_value:
+            parent = self.entries[child - 1]
+            child = parent.right_index if get_bit(key, parent.search_value) else parent.left_index
+        if not child or self.strings[self.entries[child - 1].name_offset] != name:
+            raise KeyError(name)
+        return child - 1
+
+    class IndexEntry(Struct):
         def __init__(self, buffer, pos):
-            get_unpacked_data(self, "IndexEntry", buffer, pos)
+            super().__init__("<i 2H Q")
+            (
+             self.search_value,
+             self.left_index,
+             self.right_index,
+             self.name_offset
+            ) = self.unpack_from(buffer, pos)
+
+class Subfiles():
+    # Subfiles stored in one array, each one parsed the first time it is
+    # accessed (by index or by name) and cached afterwards
+    def __init__(self, cls, buffer, pos, count, length, index_group=None, strings=None, pointers=None):
+        self.cls = cls
+        self.buffer = buffer
+        self.index_group = index_group
+        self.strings = strings
+        self.pointers = pointers
+        self.offsets: List[int] = [pos + i * length for i in range(count)]
+        self.files: List = [None] * count
+
+    def __len__(self):
+        return len(self.files)
+
+    def __iter__(self):
+        for i in range(len(self.files)):
+            yield self[i]
+
+    def __contains__(self, name):
+        return name in self.names()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self.index(key)
+        elif isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self.files)))]
+
+        file = self.files[key]
+        if file is None:
+            file = self.files[key] = self.cls(self.buffer, self.offsets[key], self.strings, self.pointers)
+        return file
+
+    def names(self):
+        return self.index_group.names() if self.index_group else {}
+
+    def index(self, name: str):
+        return self.names()[name]
 
 class FRES():
     # caFe RESource
-    def __init__(self, buffer, pos):
+    def __init__(self, buffer, pos, lazy=False):
+        self.buffer = buffer
+        self.pos = pos
         self.header = self.Header(buffer, pos)
+        # Shared by every dict, so each name is decoded once per file
+        self.strings = StringTable(buffer, self.header.string_table_offset, self.header.string_table_size)
+        # Every pointer of the file, resolved at once from the relocation
+        # table the first time a subfile reads one
+        self.relocation_table = self.get_relocation_table()
+        self.pointers = None
+        if self.relocation_table is not None:
+            from relocation import Pointers
+            self.pointers = Pointers(buffer, self.relocation_table, pos)
+        # Vertex and index data of every model, as one view over the file.
+        # Its pointer is read as is, like the header's, so that lazy files
+        # don't resolve the relocation table for it
+        self.buffer_section = None
+        if self.header.buffer_section:
+            from buffers import BufferSection
+            self.buffer_section = BufferSection(buffer, self.header.buffer_section)
 
         self.subfile_offsets = {
                                 "Model":                self.header.model_offset,
                                 "Skeletal_Animation":   self.header.skeletal_anim_offset,
-                                "Material_Animation":   self.header.material_anim_offset, 
-                                "Bone_Visual_Animation":self.header.bone_vis_anim_offset, 
+                                "Material_Animation":   self.header.material_anim_offset,
+                                "Bone_Visual_Animation":self.header.bone_vis_anim_offset,
                                 "Shape_Animation":      self.header.shape_anim_offset,
-                                "Scene_Animation":      self.header.scene_anim_offset, 
+                                "Scene_Animation":      self.header.scene_anim_offset,
                                 "Embedded_Files":       self.header.ext_files_offset
                                 }
-            
+
         self.subfile_counts = {
                                 "Model":                self.header.model_count,
                                 "Skeletal_Animation":   self.header.skeletal_anim_count,
-                                "Material_Animation":   self.header.material_anim_count, 
-                                "Bone_Visual_Animation":self.header.bone_vis_anim_count, 
+                                "Material_Animation":   self.header.material_anim_count,
+                                "Bone_Visual_Animation":self.header.bone_vis_anim_count,
                                 "Shape_Animation":      self.header.shape_anim_count,
-                                "Scene_Animation":      self.header.scene_anim_count, 
+                                "Scene_Animation":      self.header.scene_anim_count,
                                 "Embedded_Files":       self.header.embedded_file_count
                                 }
 
+        # Subfiles of a kind are stored in one array
         self.subfile_header_length = {
-                                        "Model":                0x78,
-                                        "Skeletal_Animation":   0x60,
-                                        "Material_Animation":   0x78, 
-                                        "Bone_Visual_Animation":self.bone_vis_anim_count, 
-                                        "Shape_Animation":      self.shape_anim_count,
-                                        "Scene_Animation":      self.scene_anim_count, 
-                                        "Embedded_Files":       0x10
+                                        "Model":                layouts["FMDLHeader"].size,
+                                        "Skeletal_Animation":   layouts["FSKAHeader"].size,
+                                        "Material_Animation":   layouts["FMAAHeader"].size,
+                                        "Bone_Visual_Animation":layouts["FVISHeader"].size,
+                                        "Shape_Animation":      layouts["FSHAHeader"].size,
+                                        "Scene_Animation":      layouts["FSCNHeader"].size,
+                                        "Embedded_Files":       layouts["EmbeddedFile"].size
                                         }
-        
-        # Store whichever file is available
+
+        self.subfile_dict_offsets = {
+                                "Model":                self.header.model_dict_offset,
+                                "Skeletal_Animation":   self.header.skeletal_anim_dict_offset,
+                                "Material_Animation":   self.header.material_anim_dict_offset,
+                                "Bone_Visual_Animation":self.header.bone_vis_anim_dict_offset,
+                                "Shape_Animation":      self.header.shape_anim_dict_offset,
+                                "Scene_Animation":      self.header.scene_anim_dict_offset,
+                                "Embedded_Files":       self.header.ext_files_dict_offset
+                                }
+
+        self.index_groups = {}
         for key, value in self.subfile_offsets.items():
-            if value not in [0, -1]:
-                for i in range(self.subfile_counts[key]):
-                    exec("self.{}_files = []".format(key.lower()))
-                    exec("self.{}_files.append(self.{}(buffer, {}))".format(
-                            key.lower(), 
-                            key.strip("_"), 
-                            value + i * self.subfile_header_length[key]
+            if value not in [0, -1] and self.subfile_dict_offsets[key]:
+                self.index_groups[key] = IndexGroup(buffer, self.subfile_dict_offsets[key], self.strings)
+
+        # In lazy mode, only the dicts are read and subfiles are parsed once they're accessed
+        if lazy:
+            for key, value in self.subfile_offsets.items():
+                if value not in [0, -1]:
+                    setattr(self, "{}_files".format(key.lower()), Subfiles(
+                            getattr(self, key.replace("_", "")),
+                            buffer,
+                            value,
+                            self.subfile_counts[key],
+                            self.subfile_header_length[key],
+                            self.index_groups.get(key),
+                            self.strings,
+                            self.pointers
                             )
                         )
+            return
+
+        # Store whichever file is available
+        for key, value in self.subfile_offsets.items():
+            if value not in [0, -1]:
+                cls = getattr(self, key.replace("_", ""))
+                length = self.subfile_header_length[key]
+                setattr(self, "{}_files".format(key.lower()), [
+                    cls(buffer, value + i * length, self.strings, self.pointers) for i in range(self.subfile_counts[key])
+                    ])
+
+        if self.buffer_section is not None:
+            self.get_buffer_table()
+
+    def get_name(self):
+        # file_name_offset points past the length, unlike every other name
+        return self.strings[self.header.file_name_length_offset]
+
+    def get_relocation_table(self):
+        if not self.header.reloc_table_offset:
+            return None
+        from relocation import RelocationTable
+        return RelocationTable(self.buffer, self.header.reloc_table_offset)
+
+    def get_buffer_table(self):
+        # Where every vertex and index buffer is in the buffer section, built
+        # when the file is loaded, or on first use for lazy files, which then
+        # parses every model
+        if self.buffer_section.table is None:
+            self.buffer_section.build_table(getattr(self, "model_files", []))
+        return self.buffer_section.table
+
+    def get_textures(self):
+        # Every texture of the BNTX files embedded in the file, by name
+        textures = {}
+        for file in getattr(self, "embedded_files_files", []):
+            if file.is_bntx():
+                for texture in file.get_bntx():
+                    textures[texture.get_name()] = texture
+        return textures
+
+    def serialize(self, renames: Dict[str, str] = None):
+        # The file with every change made to the records of its loaded
+        # subfiles, and every name found in renames replaced, as a new bytearray
+        from writer import Serializer
+        return Serializer(self, renames).write()
+
+    @classmethod
+    def open(cls, path, lazy=False, cache=None):
+        # Map the file instead of reading it, every buffer slice taken while
+        # parsing (texture, vertex and index data) is then a view into the
+        # mapping. Yaz0 compressed files (.sbfres) are decompressed first, or
+        # with a cache (a cache.DecompressionCache) mapped from their
+        # decompressed snapshot
+        with open(path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if is_compressed(mapping):
+            # Yaz0 files are decompressed at once into a buffer of the final size
+            data = decompress(mapping) if cache is None else cache.decompress(mapping)
+            mapping.close()
+            return cls(memoryview(data), 0, lazy)
+        return cls(memoryview(mapping), 0, lazy)
 
     class Header(Struct):
         def __init__(self, buffer, pos):
@@ -73,22 +291,22 @@ class FRES():
 
             self.data = self.unpack_from(buffer, pos)
             (
-             self.magic, 
+             self.magic,
              self.signature,
-             self.version, 
+             self.version,
              self.bom,
-             self.alignment, 
+             self.alignment,
              self.target_addr_size,
-             self.file_name_offset, 
+             self.file_name_offset,
              self.flags,
-             self.block_offset, 
+             self.block_offset,
              self.reloc_table_offset,
-             self.file_size, 
+             self.file_size,
              self.file_name_length_offset,
              self.model_offset,
              self.model_dict_offset,
              self.skeletal_anim_offset,
-             self.skeletal_anim_dict_offset, 
+             self.skeletal_anim_dict_offset,
              self.material_anim_offset,
              self.material_anim_dict_offset,
              self.bone_vis_anim_offset,
@@ -98,10 +316,10 @@ class FRES():
              self.scene_anim_offset,
              self.scene_anim_dict_offset,
              self.memory_pool,
-             self.buffer_section, 
+             self.buffer_section,
              self.ext_files_offset,
              self.ext_files_dict_offset,
-             self.string_table_offset, 
+             self.string_table_offset,
              self.string_table_size,
              self.model_count,
              self.skeletal_anim_count,
@@ -111,591 +329,434 @@ class FRES():
              self.scene_anim_count,
              self.embedded_file_count
             ) = self.data
-            
+
     class Model(): #0
         # FMDL: caFe MoDeL
-        def __init__(self, buffer, pos):
-            self.header = self.Header(buffer, pos)
-            self.skeleton = self.FSKL(buffer, self.header.skeleton_offset)
+        def __init__(self, buffer, pos, strings=None, pointers=None):
+            self.buffer = buffer
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header = self.Header(buffer, pos, pointers)
+            self.skeleton = self.FSKL(buffer, self.header.skeleton_offset, self.strings, pointers)
 
             self.vertices = []
             for i in range(self.header.vertex_count):
-                self.vertices.append(self.FVTX(buffer, self.header.vertices_offset + i * 0x60))
-
-            self.materials = []
-            for i in range(self.header.material_count):
-                self.materials.append(self.FMAT(buffer, self.header.materials_offset + i * 0xB8))
+                self.vertices.append(self.FVTX(buffer, self.header.vertices_offset + i * layouts["FVTXHeader"].size, self.strings, pointers))
 
+            self.shapes_dict = get_index_group(buffer, self.header.shape_dict_offset, self.strings)
             self.shapes = []
             for i in range(self.header.shape_count):
-                self.shapes.append(self.FSHP(buffer, self.header.shape_offset + i * 0x60))
-            self.shape = self.FSHP(buffer, self.header.shape_offset)
-            self.material = self.FMAT(buffer, self.header.material_offset)
+                self.shapes.append(self.FSHP(buffer, self.header.shapes_offset + i * layouts["FSHPHeader"].size, self.strings, pointers))
 
-            self.vertices = []
-            self.shapes_dict = IndexGroup(buffer, self.header.fshp_dict_offset)
-            self.shapes = []
-            self.materials_dict = IndexGroup(buffer, self.header.fmat_dict_offset)
+            self.materials_dict = get_index_group(buffer, self.header.material_dict_offset, self.strings)
             self.materials = []
-            for i in range(self.header.fvtx_count):
-                self.vertices.append(self.FVTX(buffer, self.header.fvtx_offset + i * 0x20))
-            for j in self.shapes_dict.entries:
-                self.shapes.append(self.FSHP(buffer, j.data_offset))
-            for k in self.materials_dict.entries:
-                self.shapes.append(self.FMAT(buffer, k.data_offset))
-
-        # Separate each section of the FMDL file into classes, allowing for easier association 
-        class Header(Struct):
-            def __init__(self, buffer, pos):
-                super().__init__("<4s I 10Q 16x 4H I 4x")
-                
-                self.data: Tuple = self.unpack_from(buffer, pos)
-
-                (
-                 self.magic,
-                 self.flags,
-                 self.model_name_offset,
-                 self.path_name_offset,
-                 self.skeleton_offset,
-                 self.vertices_offset,
-                 self.shape_offset,
-                 self.shape_dict_offset,
-                 self.material_offset,
-                 self.material_dict_offset,
-                 self.user_data_offset,
-                 self.vertex_count,
-                 self.shape_count,
-                 self.material_count,
-                 self.user_data_count,
-                 self.total_vertex_count
-                ) = self.data
-
-    #     class FVTX():
-    #         # caFe VerTeX
-    #         def __init__(self, buffer, pos):
-    #             self.header = self.Header(buffer, pos)
-    #             self.attributes = []
-    #             self.buffers = []
-    #             for i in range(self.header.attrib_count):
-    #                 self.attributes.append(self.Attribute(buffer, self.header.attribs_offset + i + 0xC))
-    #             for i in range(self.header.buffer_count):
-    #                 self.buffers.append(self.Buffer(buffer, self.header.buffers_offset + i * 0x18))
-                
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FVTXHeader", buffer, pos)
-
-    #         class Attribute():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FVTXAttribute", buffer, pos)
-
-    #         class Buffer():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FVTXBuffer", buffer, pos)
-
-    #     class FSKL():
-    #         # caFe SKeLeton
-    #         def __init__(self, buffer, pos):
-    #             self.header: self.Header = self.Header(buffer, pos)
-    #             self.bones: List[self.Bone] = []
-
-    #             for i in range(self.header.bone_count):
-    #                 self.bones.append(self.Bone(buffer, self.header.bones_offset + i * 0x40))
-
-    #             self.smooth_matrices = self.SmoothMatrix(self.header.smooth_index_count, buffer, self.header.smooth_matrix_offset)
-
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FSKLHeader", buffer, pos)
-
-    #         class Bone():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "Bone", buffer, pos)
-
-    #         class SmoothMatrix(struct.Struct):
-    #             def __init__(self, count, buffer, pos):
-    #                 super().__init__(f">{count}H")
-
-    #                 self.values = self.unpack_from(buffer, pos)
-
-    #         class RigidMatrix(struct.Struct):
-    #             def __init__(self, count, buffer, pos):
-    #                 super().__init__(f">{count}H")
-
-    #                 self.values = self.unpack_from(buffer, pos)
-
-    #     class FSHP():
-    #         # caFe SHaPe
-    #         def __init__(self, buffer, pos):
-    #             self.header = self.Header(buffer, pos)
-    #             self.lod_mdls = []
-    #             for i in range(self.header.lod_mdl_count):
-    #                 self.lod_mdls.append(self.LoDModel(buffer, self.header.lod_mdls_offset + i * 0x1C))
-    #             # TODO: FSKLIndexArray, Visibility Group, IndexBuffer
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FSHPHeader", buffer, pos)
-
-    #         class LoDModel():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "LoDModel", buffer, pos)
-
-    #         class FSKLIndexArray():
-    #             def __init__(self, count, data, pos):
-    #                 super().__init__(f">{count}H")
-
-    #                 self.values = self.unpack_from(data, pos)
-
-    #         class VisibilityGroup():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "VisibilityGroup", buffer, pos)
-
-    #         class IndexBuffer():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FVTXBuffer", buffer, pos)
-
-    #     class FMAT():
-    #         # caFe MATerial
-    #         def __init__(self, buffer, pos):
-    #             self.header = self.Header(buffer, pos)
-    #             self.tex_samplers = []
-    #             self.material_parameters = []
-    #             self.render_info_params = []
-    #             self.render_info_dict = IndexGroup(buffer, self.header.render_info_dict_offset)
-    #             self.render_state = self.RenderState(buffer, self.header.render_state_offset)
-    #             self.shader_assign = self.ShaderAssign(buffer, self.header.shdr_assign_offset)
-
-    #             for i in range(self.header.tex_sampler_count):
-    #                 self.tex_samplers.append(self.TextureSampler(buffer, self.header.tex_samplers_offset + i * 0x18))
-
-    #             for j in range(self.header.mat_param_count):
-    #                 self.material_parameters.append(self.MaterialParameter(buffer, self.header.mat_params_offset + i * 0x14))
-
-    #             for entry in self.render_info_dict.entries:
-    #                 self.render_info_params.append(self.RenderInfo(buffer, entry.data_offset))
-
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FMATHeader", buffer, pos)
-
-    #         class RenderInfo():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "RenderInfo", buffer, pos)
-
-    #                 self.array_data_class = self.ArrayData(self.element_type, buffer, pos + 8)
-    #                 self.array_data = self.array_data_class.data # 0x08 - uInt[2]/float[2]/uInt
-
-    #             class ArrayData(struct.Struct):
-    #                 def __init__(self, type_, buffer, pos):
-    #                     if type_ == 0:
-    #                         super().__init__(">2I")
-    #                         self.data = self.unpack_from(buffer, pos)
-    #                     elif type_ == 1:
-    #                         super().__init__(">2f")
-    #                         self.data = self.unpack_from(buffer, pos)
-    #                     else:
-    #                         super().__init__(">I")
-    #                         self.data = self.unpack_from(buffer, pos)[0]
-
-    #         class TextureSampler():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "TextureSampler", buffer, pos)
-
-    #         class MaterialParameter():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "MaterialParameter", buffer, pos)
-
-    #         class RenderState():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "RenderState", buffer, pos)
-
-    #         class ShaderAssign():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "ShaderAssign", buffer, pos)
-
-    # class FTEX(): #1
-    #     # caFe TEXture
-    #     def __init__(self, buffer, pos):
-    #         self.header = self.Header(buffer, pos)
-    #         self.data = buffer[self.header.data_offset:self.header.data_offset + self.header.data_length]
-    #         self.mipmaps = []
-    #         for i in self.header.mipmaps_offsets:
-    #             self.mipmaps.append(buffer[i:i + self.header.mipmaps_data_length])
-
-    #     class Header():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "FTEXHeader", buffer, pos)
-    #             for i in range(len(self.mipmaps_offsets)):
-    #                 self.mipmaps_offsets[i] += self.mipmap_data_offset
-
-    # class SkeletalAnimation(): #2
-    #     # caFe SKeletal Animation
-    #     def __init__(self, buffer, pos):
-    #         self.header: self.Header = self.Header(buffer, pos)
-    #         self.bone_animations: List[BoneAnimation] = []
-    #         self.skeleton_offset: int = self.header.skeleton_offset
-    #         self.bind_index: self.BindIndex = self.BindIndex(buffer, self.header.bone_animation_count, self.header.bind_index_array)
-    #         self.bind_index_data: bytearray = self.bind_index.data
-
-    #         for i in range(self.header.bone_animation_count):
-    #             self.bone_animations.append(self.BoneAnimation(buffer, self.header.bone_animation_offset + i * 0x18))
-
-    #         # Perform bitwise operations on the flags to determine the Skeleton properties
-    #         self.baked_curves = bool(self.header.flags & 0b1)
-    #         self.is_looping = bool(self.header.flags & 0b100)
-    #         self.scale_type = (self.header.flags & 0b1100000000) >> 8
-    #         self.rotation_module = bool(self.header.flags & 0b1000000000000)
-
-    #     class Header():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "FSKAHeader", buffer, pos)
-        
-    #     class BindIndex(struct.Struct):
-    #         def __init__(self, buffer, count, pos):
-    #             super().__init__(f">{count}H")
-    #             self.data = self.unpack_from(buffer, pos)
-        
-    #     class BoneAnimation():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "BoneAnimation", buffer, pos)
-    #             self.curves = []
-    #             # xxxxSSSS Sxxxxxxx CCCCCCCC CCBBBxxx
-    #             self.which_data: int = (self.flags >> 3) & 0b111
-    #             self.available_curves: int = (self.flags >> 6) & 0b1111111111
-    #             self.bone_transform_effect: int = (self.flags >> 23) & 0b111111
-
-    #             self.data: self.BoneAnimationData = self.BoneAnimationData(buffer, self.which_data, self.base_data_offset)
-                
-    #             for i in range(self.curve_count):
-    #                 # TODO: Actually append the curves to the BoneAnimation
-    #                 self.curves.append(self.Curve(buffer, self.curve_array_offset + i * 0x24))
-    #         class BoneAnimationData():
-    #             def __init__(self, buffer, which_data, pos):
-    #                 self.scaling: Tuple[float, float, float] = struct.unpack_from(">3f", buffer, pos) if which_data & 0b001 else (None)
-    #                 self.rotation: Tuple[float, float, float, float] = struct.unpack_from(">4f", buffer, pos + 12 if self.scaling else pos) if which_data & 0b010 else (None)
-    #                 self.translation: Tuple[float, float, float] = struct.unpack_from(">3f", buffer, pos + 24 if self.scaling and self.rotation else pos) if which_data & 0b100 else (None)
-
-    #         class Curve():
-    #             def __init__(self, buffer, pos):
-    #                 self.header = self.Header(buffer, pos)
-
-    #             class Header():
-    #                 def __init__(self, buffer, pos):
-    #                     get_unpacked_data(self, "CurveHeader", buffer, pos)
-    #                     # xxxxxxxx xCCCKKFF
-    #                     self.frame_data_flag: int = self.flags & 0b11
-    #                     self.key_data_flag: int = (self.flags >> 2) & 0b11
-    #                     self.curve_data_flag: int = (self.flags >> 4) & 0b111
-
-    #             class Frames():
-    #                 def __init__(self, buffer, data_flag, count, pos):
-    #                     if data_flag == 0b00:
-    #                         self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                     elif data_flag == 0b01:
-    #                         self.data: float = float(buffer[pos:pos + 2]) / (1 << 5)
-    #                     else:
-    #                         self.data: int = struct.unpack_from(fmt=f">{count}B", buffer=buffer, offset=pos)
-
-    #             class Keys():
-    #                 def __init__(self, buffer, data_flag, count, pos):
-    #                     if data_flag == 0b00:
-    #                         self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                     elif data_flag == 0b01:
-    #                         self.data: int = struct.unpack_from(fmt=f'>{count}h', buffer=buffer, offset=pos)
-    #                     else:
-    #                         self.data: int = struct.unpack_from(fmt=f'>{count}b', buffer=buffer, offset=pos)
-
-    #             class StepCurves():
-    #                 # TODO
-    #                 ...
-
-    #             class LinearCurves():
-    #                 # TODO
-    #                 ...
-
-    # class FSHU(): #3
-    #     # caFe SHader parameter animation Uber
-    #     def __init__(self, buffer, pos):
-    #         self.header = self.Header(buffer, pos)
-
-    #     class Header():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "FSHUHeader", buffer, pos)
-
-    #     class MaterialAnimation():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "MaterialAnimation", buffer, pos)
-
-    #     class ParameterAnimationInfo():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "ParameterAnimationInfo", buffer, pos)
-        
-    #     class AnimationConstant():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "AnimationConstant", buffer, pos)
-
-    #     class Curve():
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "CurveHeader", buffer, pos)
-    #                 # xxxxxxxx xCCCKKFF
-    #                 self.frame_data_flag: int = self.flags & 0b11
-    #                 self.key_data_flag: int = (self.flags >> 2) & 0b11
-    #                 self.curve_data_flag: int = (self.flags >> 4) & 0b111
-
-    #         class Frames():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: float = float(buffer[pos:pos + 2]) / (1 << 5)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f">{count}B", buffer=buffer, offset=pos)
-
-    #         class Keys():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}h', buffer=buffer, offset=pos)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}b', buffer=buffer, offset=pos)
-
-    #         class StepCurves():
-    #             # TODO
-    #             ...
-
-    #         class LinearCurves():
-    #             # TODO
-    #             ...
-
-    # class ColorAnim(FSHU): # 4
-    #     ...
-
-    # class TextureSRTAnim(FSHU): # 5
-    #     ...
-
-    # class FTXP(): # 6
-    #     # caFe TeXture Pattern animation
-    #     def __init__(self, buffer, pos):
-    #         self.header = self.Header(buffer, pos)
-
-    #     class Header():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "FTXPHeader", buffer, pos)
-
-    #     class MaterialPatternAnimation():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "MaterialPatternAnimation", buffer, pos)
-
-    #     class PatternAnimationInfo():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "PatternAnimationInfo", buffer, pos)
-
-    #     class Curve():
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "CurveHeader", buffer, pos)
-    #                 # xxxxxxxx xCCCKKFF
-    #                 self.frame_data_flag: int = self.flags & 0b11
-    #                 self.key_data_flag: int = (self.flags >> 2) & 0b11
-    #                 self.curve_data_flag: int = (self.flags >> 4) & 0b111
-
-    #         class Frames():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: float = float(buffer[pos:pos + 2]) / (1 << 5)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f">{count}B", buffer=buffer, offset=pos)
-
-    #         class Keys():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}h', buffer=buffer, offset=pos)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}b', buffer=buffer, offset=pos)
-
-    #         class StepCurves():
-    #             # TODO
-    #             ...
-
-    #         class LinearCurves():
-    #             # TODO
-    #             ...
-
-    # class FVIS(): # 7
-    #     # caFe VISibility animation
-    #     def __init__(self, buffer, pos):
-    #         self.header = Header(buffer, pos)
-
-    #     class Header():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "FVISHeader", buffer, pos)
-
-    #     class Curve():
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "CurveHeader", buffer, pos)
-    #                 # xxxxxxxx xCCCKKFF
-    #                 self.frame_data_flag: int = self.flags & 0b11
-    #                 self.key_data_flag: int = (self.flags >> 2) & 0b11
-    #                 self.curve_data_flag: int = (self.flags >> 4) & 0b111
-
-    #         class Frames():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: float = float(buffer[pos:pos + 2]) / (1 << 5)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f">{count}B", buffer=buffer, offset=pos)
-
-    #         class Keys():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}h', buffer=buffer, offset=pos)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}b', buffer=buffer, offset=pos)
-
-    #         class StepCurves():
-    #             # TODO
-    #             ...
-
-    #         class LinearCurves():
-    #             # TODO
-    #             ...
-
-    # class MaterialVisAnim(FVIS): # 8
-    #     ...
-
-    # class FSHA(): # 9
-    #     # caFe SHape Animation
-    #     def __init__(self, buffer, pos):
-    #         self.header = Header(buffer, pos)
-
-    #     class Header():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "FSHAHeader", buffer, pos)
-    #     class VertexShapeAnimation():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "VertexShapeAnimation", buffer, pos)
-
-    #         class ShapeAnimationKey():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "ShapeAnimationKey", buffer, pos)
-                    
-    #     class Curve():
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "CurveHeader", buffer, pos)
-    #                 # xxxxxxxx xCCCKKFF
-    #                 self.frame_data_flag: int = self.flags & 0b11
-    #                 self.key_data_flag: int = (self.flags >> 2) & 0b11
-    #                 self.curve_data_flag: int = (self.flags >> 4) & 0b111
-
-    #         class Frames():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: float = float(buffer[pos:pos + 2]) / (1 << 5)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f">{count}B", buffer=buffer, offset=pos)
-
-    #         class Keys():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}h', buffer=buffer, offset=pos)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}b', buffer=buffer, offset=pos)
-
-    #         class StepCurves():
-    #             # TODO
-    #             ...
-
-    #         class LinearCurves():
-    #             # TODO
-    #             ...
-
-    # class FSCN(): # 10
-    #     # caFe SCeNe animation
-    #     def __init__(self, buffer, pos):
-    #         self.header = Header(buffer, pos)
-
-    #     class Header():
-    #         def __init__(self, buffer, pos):
-    #             get_unpacked_data(self, "FSCNHeader", buffer, pos)
-
-    #     class FCAM():
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FCAMHeader", buffer, pos)
-
-    #         class Data():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "CameraAnimationData", buffer, pos)
-
-    #     class FLIT():
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FLITHeader", buffer, pos)
-
-    #         class Data():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "LightAnimationData", buffer, pos)    
-                    
-    #     class FFOG():
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FFOGHeader", buffer, pos)
-
-    #         class Data():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "FogAnimationData", buffer, pos)
-
-    #     class Curve():
-    #         class Header():
-    #             def __init__(self, buffer, pos):
-    #                 get_unpacked_data(self, "CurveHeader", buffer, pos)
-    #                 # xxxxxxxx xCCCKKFF
-    #                 self.frame_data_flag: int = self.flags & 0b11
-    #                 self.key_data_flag: int = (self.flags >> 2) & 0b11
-    #                 self.curve_data_flag: int = (self.flags >> 4) & 0b111
-
-    #         class Frames():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: float = float(buffer[pos:pos + 2]) / (1 << 5)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f">{count}B", buffer=buffer, offset=pos)
-
-    #         class Keys():
-    #             def __init__(self, buffer, data_flag, count, pos):
-    #                 if data_flag == 0b00:
-    #                     self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-    #                 elif data_flag == 0b01:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}h', buffer=buffer, offset=pos)
-    #                 else:
-    #                     self.data: int = struct.unpack_from(fmt=f'>{count}b', buffer=buffer, offset=pos)
-
-    #         class StepCurves():
-    #             # TODO
-    #             ...
-
-    #         class LinearCurves():
-    #             # TODO
-    #             ...
-
-    # class EmbeddedFiles(): # 11
-    #     def __init__(self, buffer, pos):
-    #         get_unpacked_data(self, "EmbeddedFiles", buffer, pos)
\ No newline at end of file
+            for i in range(self.header.material_count):
+                self.materials.append(self.FMAT(buffer, self.header.materials_offset + i * layouts["FMATHeader"].size, self.strings, pointers))
+
+        def get_name(self):
+            return self.strings[self.header.name_offset]
+
+        def get_shape(self, name: str):
+            return self.shapes[self.shapes_dict.index(name)]
+
+        def get_material(self, name: str):
+            return self.materials[self.materials_dict.index(name)]
+
+        # Separate each section of the FMDL file into classes, allowing for easier association
+        class Header(Record, layout="FMDLHeader"):
+            ...
+
+        class FVTX():
+            # caFe VerTeX
+            def __init__(self, buffer, pos, strings=None, pointers=None):
+                self.buffer = buffer
+                self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+                self.header = self.Header(buffer, pos, pointers)
+                self.attributes = self.Attribute.unpack_list(buffer, self.header.attributes_offset, self.header.attribute_count, pointers)
+                self.attributes_dict = get_index_group(buffer, self.header.attribute_dict_offset, self.strings)
+                self.buffer_sizes = self.BufferSize.unpack_list(buffer, self.header.buffer_sizes_offset, self.header.buffer_count)
+                self.buffer_strides = self.BufferStride.unpack_list(buffer, self.header.buffer_strides_offset, self.header.buffer_count)
+                # Offset of each buffer in the buffer section, stored one after
+                # the other from buffer_offset, 8 bytes aligned
+                self.buffer_offsets: List[int] = []
+                offset = self.header.buffer_offset
+                for size in self.buffer_sizes:
+                    self.buffer_offsets.append(offset)
+                    offset += (size.size + 7) & ~7
+
+            def attribute_names(self):
+                return [self.strings[attribute.name_offset] for attribute in self.attributes]
+
+            class Header(Record, layout="FVTXHeader"):
+                ...
+
+            class Attribute(Record, layout="VertexAttribute"):
+                ...
+
+            class BufferSize(Record, layout="BufferSize"):
+                ...
+
+            class BufferStride(Record, layout="BufferStride"):
+                ...
+
+        class FSKL():
+            # caFe SKeLeton
+            def __init__(self, buffer, pos, strings=None, pointers=None):
+                self.buffer = buffer
+                self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+                self.header: self.Header = self.Header(buffer, pos, pointers)
+                self.bones: List[self.Bone] = self.Bone.unpack_list(buffer, self.header.bones_offset, self.header.bone_count, pointers)
+                self.bones_dict = get_index_group(buffer, self.header.bone_dict_offset, self.strings)
+
+                # Bone of every smooth matrix, then of every rigid one
+                self.matrix_to_bone = get_array(buffer, "H", self.header.matrix_to_bone_offset, self.header.smooth_matrix_count + self.header.rigid_matrix_count)
+
+                self.scale_mode = (self.header.flags >> 8) & 0b11
+                self.is_euler = bool(self.header.flags & 0b1000000000000)
+
+            def get_bone_names(self):
+                return [self.strings[bone.name_offset] for bone in self.bones]
+
+            def get_bone(self, name: str):
+                return self.bones[self.bones_dict.index(name)]
+
+            def get_inverse_matrices(self):
+                # (smooth matrices, 3, 4) inverse bind matrices
+                import numpy as np
+                count = self.header.smooth_matrix_count
+                return np.frombuffer(self.buffer, "<f4", count * 12, self.header.inverse_matrices_offset).reshape(count, 3, 4)
+
+            class Header(Record, layout="FSKLHeader"):
+                ...
+
+            class Bone(Record, layout="Bone"):
+                ...
+
+        class FSHP():
+            # caFe SHaPe
+            def __init__(self, buffer, pos, strings=None, pointers=None):
+                self.buffer = buffer
+                self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+                self.header = self.Header(buffer, pos, pointers)
+                self.meshes: List[self.Mesh] = self.Mesh.unpack_list(buffer, self.header.meshes_offset, self.header.mesh_count, pointers)
+                for mesh in self.meshes:
+                    mesh.sub_meshes = self.SubMesh.unpack_list(buffer, mesh.sub_meshes_offset, mesh.sub_mesh_count)
+                    mesh.buffer_size = self.BufferSize(buffer, mesh.buffer_size_offset) if mesh.buffer_size_offset else None
+
+                self.skin_bone_indices = get_array(buffer, "H", self.header.skin_bone_indices_offset, self.header.skin_bone_index_count)
+                self.key_shapes_dict = get_index_group(buffer, self.header.key_shape_dict_offset, self.strings)
+
+                # One bounding box for the whole first mesh, then one per sub mesh of it
+                count = len(self.meshes[0].sub_meshes) + 1 if self.meshes else 0
+                self.bounding_boxes = self.Bounding.unpack_list(buffer, self.header.bounding_boxes_offset, count)
+
+            def get_name(self):
+                return self.strings[self.header.name_offset]
+
+            class Header(Record, layout="FSHPHeader"):
+                ...
+
+            class Mesh(Record, layout="Mesh"):
+                # A level of detail, drawn in sub meshes
+                __slots__ = ("sub_meshes", "buffer_size")
+
+            class SubMesh(Record, layout="SubMesh"):
+                ...
+
+            class BufferSize(Record, layout="BufferSize"):
+                ...
+
+            class Bounding(Record, layout="Bounding"):
+                ...
+
+        class FMAT():
+            # caFe MATerial
+            def __init__(self, buffer, pos, strings=None, pointers=None):
+                self.buffer = buffer
+                self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+                self.header = self.Header(buffer, pos, pointers)
+
+                self.render_info_dict = get_index_group(buffer, self.header.render_info_dict_offset, self.strings)
+                self.render_infos = []
+                for i in range(self.header.render_info_count):
+                    pos = self.header.render_infos_offset + i * layouts["RenderInfo"].size
+                    self.render_infos.append(self.RenderInfo(buffer, pos, pointers, self.strings))
+
+                self.shader_assign = None
+                if self.header.shader_assign_offset:
+                    self.shader_assign = self.ShaderAssign(buffer, self.header.shader_assign_offset, pointers, self.strings)
+
+                self.texture_name_offsets = get_pointer_array(buffer, self.header.texture_names_offset, self.header.texture_count, pointers)
+                self.samplers = self.Sampler.unpack_list(buffer, self.header.samplers_offset, self.header.sampler_count)
+                self.samplers_dict = get_index_group(buffer, self.header.sampler_dict_offset, self.strings)
+                self.shader_params = self.ShaderParam.unpack_list(buffer, self.header.shader_params_offset, self.header.shader_param_count, pointers)
+                self.shader_params_dict = get_index_group(buffer, self.header.shader_param_dict_offset, self.strings)
+                # Values of every shader param, each one at its data_offset
+                start = self.header.shader_param_data_offset
+                self.shader_param_data = buffer[start:start + self.header.param_data_length]
+
+            def get_name(self):
+                return self.strings[self.header.name_offset]
+
+            def get_texture_names(self):
+                return [self.strings[offset] for offset in self.texture_name_offsets]
+
+            def get_render_info(self, name: str):
+                return self.render_infos[self.render_info_dict.index(name)].values
+
+            def get_shader_param(self, name: str):
+                return self.shader_params[self.shader_params_dict.index(name)]
+
+            class Header(Record, layout="FMATHeader"):
+                ...
+
+            class RenderInfo(Record, layout="RenderInfo"):
+                __slots__ = ("values",)
+
+                def __init__(self, buffer, pos, pointers=None, strings=None):
+                    super().__init__(buffer, pos, pointers)
+                    # Ints, floats, or names
+                    if self.type_ == 0:
+                        self.values = get_array(buffer, "i", self.data_offset, self.count)
+                    elif self.type_ == 1:
+                        self.values = get_array(buffer, "f", self.data_offset, self.count)
+                    else:
+                        self.values = [strings[offset] for offset in get_pointer_array(buffer, self.data_offset, self.count, pointers)]
+
+            class ShaderAssign(Record, layout="ShaderAssign"):
+                # Names of the shader's attributes, samplers and options,
+                # by the name of what they're assigned to in the model
+                __slots__ = ("attrib_assigns", "sampler_assigns", "shader_options")
+
+                def __init__(self, buffer, pos, pointers=None, strings=None):
+                    super().__init__(buffer, pos, pointers)
+                    self.attrib_assigns = get_assigns(buffer, self.attrib_assigns_offset, self.attrib_assign_dict_offset, self.attrib_assign_count, strings, pointers)
+                    self.sampler_assigns = get_assigns(buffer, self.sampler_assigns_offset, self.sampler_assign_dict_offset, self.sampler_assign_count, strings, pointers)
+                    self.shader_options = get_assigns(buffer, self.shader_options_offset, self.shader_option_dict_offset, self.shader_option_count, strings, pointers)
+
+            class Sampler(Record, layout="Sampler"):
+                ...
+
+            class ShaderParam(Record, layout="ShaderParam"):
+                ...
+
+    class SkeletalAnimation(): #1
+        # FSKA: caFe SKeletal Animation
+        def __init__(self, buffer, pos, strings=None, pointers=None):
+            self.buffer = buffer
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header: self.Header = self.Header(buffer, pos, pointers)
+            # Bone of the bound skeleton each bone animation targets
+            self.bind_indices = get_array(buffer, "H", self.header.bind_indices_offset, self.header.bone_animation_count)
+
+            self.bone_animations: List[self.BoneAnimation] = []
+            for i in range(self.header.bone_animation_count):
+                pos = self.header.bone_animations_offset + i * layouts["BoneAnimation"].size
+                self.bone_animations.append(self.BoneAnimation(buffer, pos, pointers))
+
+            # Perform bitwise operations on the flags to determine the Skeleton properties
+            self.baked_curves = bool(self.header.flags & 0b1)
+            self.is_looping = bool(self.header.flags & 0b100)
+            self.scale_type = (self.header.flags & 0b1100000000) >> 8
+            # Euler XYZ angles when set, quaternions otherwise
+            self.rotation_module = bool(self.header.flags & 0b1000000000000)
+
+        def get_name(self):
+            return self.strings[self.header.name_offset]
+
+        def get_bone_names(self):
+            return [self.strings[bone_animation.name_offset] for bone_animation in self.bone_animations]
+
+        class Header(Record, layout="FSKAHeader"):
+            ...
+
+        class BoneAnimation(Record, layout="BoneAnimation"):
+            # Base values of the bone, for whichever of scale, translation
+            # and rotation are stored, then the curves animating them
+            __slots__ = ("scale", "translation", "rotation", "curves")
+
+            def __init__(self, buffer, pos, pointers=None):
+                super().__init__(buffer, pos, pointers)
+                pos = self.base_data_offset
+                self.scale = self.translation = self.rotation = None
+                if self.flags & 0b1000:
+                    self.scale = struct.unpack_from("<3f", buffer, pos)
+                    pos += 12
+                if self.flags & 0b100000:
+                    self.translation = struct.unpack_from("<3f", buffer, pos)
+                    pos += 12
+                if self.flags & 0b10000:
+                    self.rotation = struct.unpack_from("<4f", buffer, pos)
+                self.curves = Curve.unpack_list(buffer, self.curves_offset, self.curve_count, pointers)
+
+    class MaterialAnimation(): #2
+        # FMAA: caFe MAterial Animation, shader params, texture patterns
+        # and visibility of a model's materials
+        def __init__(self, buffer, pos, strings=None, pointers=None):
+            self.buffer = buffer
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header = self.Header(buffer, pos, pointers)
+            self.texture_name_offsets = get_pointer_array(buffer, self.header.texture_names_offset, self.header.texture_name_count, pointers)
+
+        def get_name(self):
+            return self.strings[self.header.name_offset]
+
+        def get_texture_names(self):
+            return [self.strings[offset] for offset in self.texture_name_offsets]
+
+        class Header(Record, layout="FMAAHeader"):
+            ...
+
+    class BoneVisualAnimation(): #3
+        # FVIS: caFe VISibility animation of a model's bones
+        def __init__(self, buffer, pos, strings=None, pointers=None):
+            self.buffer = buffer
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header = self.Header(buffer, pos, pointers)
+            self.bind_indices = get_array(buffer, "H", self.header.bind_indices_offset, self.header.animation_count)
+            self.name_offsets = get_pointer_array(buffer, self.header.names_offset, self.header.animation_count, pointers)
+            self.curves = Curve.unpack_list(buffer, self.header.curves_offset, self.header.curve_count, pointers)
+
+        def get_name(self):
+            return self.strings[self.header.name_offset]
+
+        def get_names(self):
+            # Bones whose visibility is animated
+            return [self.strings[offset] for offset in self.name_offsets]
+
+        def get_base_values(self):
+            # Visibility of every bone before animation, one bit each
+            start = self.header.base_values_offset
+            bits = bytes(self.buffer[start:start + (self.header.animation_count + 7) // 8])
+            return [bool(bits[i >> 3] >> (i & 7) & 1) for i in range(self.header.animation_count)]
+
+        class Header(Record, layout="FVISHeader"):
+            ...
+
+    class ShapeAnimation(): #4
+        # FSHA: caFe SHape Animation
+        def __init__(self, buffer, pos, strings=None, pointers=None):
+            self.buffer = buffer
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header = self.Header(buffer, pos, pointers)
+            self.bind_indices = get_array(buffer, "H", self.header.bind_indices_offset, self.header.vertex_shape_animation_count)
+
+        def get_name(self):
+            return self.strings[self.header.name_offset]
+
+        class Header(Record, layout="FSHAHeader"):
+            ...
+
+    class SceneAnimation(): #5
+        # FSCN: caFe SCeNe animation, of cameras, lights and fogs
+        def __init__(self, buffer, pos, strings=None, pointers=None):
+            self.buffer = buffer
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header = self.Header(buffer, pos, pointers)
+            self.cameras_dict = get_index_group(buffer, self.header.camera_dict_offset, self.strings)
+            self.lights_dict = get_index_group(buffer, self.header.light_dict_offset, self.strings)
+            self.fogs_dict = get_index_group(buffer, self.header.fog_dict_offset, self.strings)
+
+        def get_name(self):
+            return self.strings[self.header.name_offset]
+
+        class Header(Record, layout="FSCNHeader"):
+            ...
+
+    class EmbeddedFiles(Record, layout="EmbeddedFile"): #6
+        # A file stored as is, named by the FRES dict. Textures are stored
+        # in one, as a BNTX
+        __slots__ = ("data", "buffer", "bntx")
+
+        def __init__(self, buffer, pos, strings=None, pointers=None):
+            super().__init__(buffer, pos, pointers)
+            self.buffer = buffer
+            self.data = buffer[self.data_offset:self.data_offset + self.length]
+            self.bntx = None
+
+        def is_bntx(self):
+            return bytes(self.data[:4]) == b"BNTX"
+
+        def get_bntx(self):
+            # The file parsed as a BNTX, once
+            if self.bntx is None:
+                from bntx import BNTX
+                self.bntx = BNTX(self.buffer, self.data_offset, self.length)
+            return self.bntx
+
+class Curve(Record, layout="CurveHeader"):
+    # Keys of an animated value, shared by every kind of animation
+    __slots__ = ("buffer",)
+
+    # frame_type: float, 10.5 fixed point, byte
+    frame_types = {0: "<f4", 1: "<i2", 2: "<u1"}
+    # key_type: float, short, signed byte
+    key_types = {0: "<f4", 1: "<i2", 2: "<i1"}
+    # Values stored per key, cubic curves have the 4 coefficients of each segment
+    key_sizes = {0: 4, 1: 2}
+
+    def __init__(self, buffer, pos, pointers=None):
+        super().__init__(buffer, pos, pointers)
+        self.buffer = buffer
+
+    @property
+    def frame_type(self):
+        return self.flags & 0b11
+
+    @property
+    def key_type(self):
+        return (self.flags >> 2) & 0b11
+
+    @property
+    def curve_type(self):
+        # xxxxxxxx xCCCKKFF
+        return (self.flags >> 4) & 0b111
+
+    def get_frames(self):
+        import numpy as np
+        frames = np.frombuffer(self.buffer, self.frame_types[self.frame_type], self.key_count, self.frames_offset).astype(np.float32)
+        if self.frame_type == 1:
+            frames /= 32
+        return frames
+
+    def get_keys(self):
+        # (key_count, values per key) float array, with scale and offset
+        # applied to the constant term of each segment. Boolean curves (6
+        # and 7) store one bit per key
+        import numpy as np
+        if self.curve_type in (6, 7):
+            bits = np.frombuffer(self.buffer, np.uint8, (self.key_count + 7) // 8, self.keys_offset)
+            return np.unpackbits(bits, bitorder="little")[:self.key_count].astype(bool)
+        size = self.key_sizes.get(self.curve_type, 1)
+        keys = np.frombuffer(self.buffer, self.key_types[self.key_type], self.key_count * size, self.keys_offset)
+        keys = keys.astype(np.float32).reshape(self.key_count, size) * self.scale
+        keys[:, 0] += self.offset
+        return keys
+
+def get_index_group(buffer, pos: int, strings: StringTable):
+    # The dict at pos, None for null dicts
+    return IndexGroup(buffer, pos, strings) if pos else None
+
+def get_array(buffer, fmt: str, pos: int, count: int):
+    # count little endian values at pos
+    return struct.unpack_from(f"<{count}{fmt}", buffer, pos) if count else ()
+
+def get_pointer_array(buffer, pos: int, count: int, pointers=None):
+    # Targets of count consecutive pointers, from the relocation table when
+    # the file has one
+    if not count:
+        return []
+    if pointers is None:
+        return list(get_array(buffer, "Q", pos, count))
+    return pointers.get_array(pos, count)
+
+def get_assigns(buffer, pos: int, dict_pos: int, count: int, strings: StringTable, pointers=None):
+    # Names stored in an array of name pointers, by the names of their dict
+    if not count:
+        return {}
+    values = get_pointer_array(buffer, pos, count, pointers)
+    return {name: strings[values[i]] for name, i in IndexGroup(buffer, dict_pos, strings).names().items()}
+
+def get_string(buffer: bytes, pos: int):
+    # Names start with their 2 bytes length
+    length = struct.unpack_from("<H", buffer, pos)[0]
+    return bytes(buffer[pos + 2:pos + 2 + length]).decode()
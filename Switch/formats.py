@@ -2,543 +2,546 @@
 
 import struct
 
-# A dict composed of each structure and their respective elements
+# A dict composed of each structure and their respective elements. Switch
+# files are little endian, and their offsets are 64 bits pointers from the
+# start of the file, listed in the relocation table. Blocks of version 0.5
+# start with their magic, then the offset and size of the block
 structs_fmts = {
-    "Header": {
-        "magic":                ">4s",      # 0x00 - char[4]
-        "signature":            ">I",       # 0x04 - uInt
-        "version":              ">I",       # 0x08 - uInt
-        "bom":                  ">H",       # 0x0A - uShort
-        "byte_alignment":       ">B",       # 0x0E - byte
-        "target_addr_size":     ">B",       # 0x0F - byte
-        "name_offset":          ">I",       # 0x10 - uInt
-        "flags":                ">H",       # 0x14 - uShort
-        "block_offset":         ">H"
-    },
-
-    "IndexGroup": {
-        "length":               ">I",
-        "count":                ">I" 
-    },
-
-    "IndexEntry": {
-        "search_value":         ">i",       # 0x00 - int
-        "left_index":           ">H",       # 0x04 - uShort
-        "right_index":          ">H",       # 0x08 - uShort
-        "name_offset":          ">I",       # 0x0C - uInt
-        "data_offset":          ">i"        # 0x10 - int
-    },
-
     "FMDLHeader": {
-        "magic":                ">4s",      # 0x00 - char[4]
-        "file_name_offset":     ">i",       # 0x04 - int
-        "file_path_offset":     ">i",       # 0x08 - int
-        "fskl_offset":          ">i",       # 0x0C - int
-        "fvtx_offset":          ">i",       # 0x10 - int
-        "fshp_dict_offset":     ">i",       # 0x14 - int
-        "fmat_dict_offset":     ">i",       # 0x18 - int
-        "usr_data_dict_offset": ">i",       # 0x1C - int
-        "fvtx_count":           ">H",       # 0x20 - uShort
-        "fshp_count":           ">H",       # 0x22 - uShort
-        "fmat_count":           ">H",       # 0x24 - uShort
-        "user_data_count":      ">H",       # 0x26 - uShort
-        "vertex_count":         ">I",       # 0x28 - uInt
-        "user_pointer":         ">I"        # 0x2C - uInt
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "name_offset":              "<Q",       # 0x10 - char*
+        "path_offset":              "<Q",       # 0x18 - char*
+        "skeleton_offset":          "<Q",       # 0x20 - FSKL*
+        "vertices_offset":          "<Q",       # 0x28 - FVTX[]
+        "shapes_offset":            "<Q",       # 0x30 - FSHP[]
+        "shape_dict_offset":        "<Q",       # 0x38 - _DIC*
+        "materials_offset":         "<Q",       # 0x40 - FMAT[]
+        "material_dict_offset":     "<Q",       # 0x48 - _DIC*
+        "user_data_offset":         "<Q",       # 0x50 - UserData[]
+        "user_data_dict_offset":    "<Q",       # 0x58 - _DIC*
+        "user_pointer":             "<Q",       # 0x60 - uLong
+        "vertex_count":             "<H",       # 0x68 - uShort
+        "shape_count":              "<H",       # 0x6A - uShort
+        "material_count":           "<H",       # 0x6C - uShort
+        "user_data_count":          "<H",       # 0x6E - uShort
+        "total_vertex_count":       "<I 4x"     # 0x70 - uInt, padding[4]
     },
 
     "FVTXHeader": {
-        "magic":                ">4s",      # 0x00 - char[4]
-        "attrib_count":         ">B",       # 0x04 - byte
-        "buffer_count":         ">B",       # 0x05 - byte
-        "section_index":        ">H",       # 0x06 - uShort
-        "vertex_count":         ">I",       # 0x08 - uInt
-        "vertex_skin_count":    ">B3x",     # 0x0C - byte, padding[3]
-        "attribs_offset":       ">i",       # 0x10 - int
-        "attrib_dict_offset":   ">i",       # 0x14 - int
-        "buffers_offset":       ">i",       # 0x18 - int
-        "user_pointer":         ">I"        # 0x1C - uInt
-    },
-
-    "FVTXAttribute": {
-        "attrib_name_offset":   ">i",       # 0x00 - int
-        "buffer_index":         ">Bx",      # 0x04 - byte, padding
-        "buffer_offset":        ">H",       # 0x06 - uShort
-        "format":               ">I"        # 0x08 - uInt
-    },
-
-    "FVTXBuffer": {
-        "data_pointer":         ">I",       # 0x00 - uInt
-        "length":               ">I",       # 0x04 - uInt
-        "handle":               ">I",       # 0x08 - uInt
-        "stride":               ">H",       # 0x0C - uShort
-        "buffering_count":      ">H",       # 0x0E - uShort
-        "context_pointer":      ">I",       # 0x10 - uInt
-        "data_offset":          ">i"        # 0x14 - int
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "attributes_offset":        "<Q",       # 0x10 - Attribute[]
+        "attribute_dict_offset":    "<Q",       # 0x18 - _DIC*
+        "memory_pool_offset":       "<Q",       # 0x20 - MemoryPool*
+        "runtime_buffers_offset":   "<Q",       # 0x28 - runtime Buffer[]
+        "user_buffers_offset":      "<Q",       # 0x30 - runtime Buffer[]
+        "buffer_sizes_offset":      "<Q",       # 0x38 - BufferSize[]
+        "buffer_strides_offset":    "<Q",       # 0x40 - BufferStride[]
+        "memory_pool_pointer":      "<Q",       # 0x48 - uLong
+        "buffer_offset":            "<I",       # 0x50 - uInt, offset in the buffer section
+        "attribute_count":          "<B",       # 0x54 - byte
+        "buffer_count":             "<B",       # 0x55 - byte
+        "section_index":            "<H",       # 0x56 - uShort
+        "vertex_count":             "<I",       # 0x58 - uInt
+        "vertex_skin_count":        "<B 3x"     # 0x5C - byte, padding[3]
+    },
+
+    "VertexAttribute": {
+        "name_offset":              "<Q",       # 0x00 - char*
+        "format":                   ">I",       # 0x08 - uInt, big endian
+        "buffer_offset":            "<H",       # 0x0C - uShort
+        "buffer_index":             "<H"        # 0x0E - uShort
+    },
+
+    "BufferSize": {
+        "size":                     "<I",       # 0x00 - uInt
+        "flags":                    "<I 8x"     # 0x04 - uInt, padding[8]
+    },
+
+    "BufferStride": {
+        "stride":                   "<I",       # 0x00 - uInt
+        "divisor":                  "<I 8x"     # 0x04 - uInt, padding[8]
     },
 
     "FSKLHeader": {
-        "magic":                ">4s",      # 0x00 - char[4]
-        "flags":                ">I",       # 0x04 - uInt
-        "bone_count":           ">H",       # 0x06 - uShort
-        "smooth_index_count":   ">H",       # 0x08 - uShort
-        "rigid_index_count":    ">H2x",     # 0x0C - uShort, padding[2]
-        "bone_dict_offset":     ">i",       # 0x10 - int
-        "bones_offset":         ">i",       # 0x14 - int
-        "smooth_index_offset":  ">i",       # 0x18 - int
-        "smooth_matrix_offset": ">i",       # 0x1C - int
-        "user_pointer":         ">I"        # 0x20 - uInt
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "bone_dict_offset":         "<Q",       # 0x10 - _DIC*
+        "bones_offset":             "<Q",       # 0x18 - Bone[]
+        "matrix_to_bone_offset":    "<Q",       # 0x20 - uShort[]
+        "inverse_matrices_offset":  "<Q",       # 0x28 - float[3][4][]
+        "user_pointer":             "<Q",       # 0x30 - uLong
+        "flags":                    "<I",       # 0x38 - uInt
+        "bone_count":               "<H",       # 0x3C - uShort
+        "smooth_matrix_count":      "<H",       # 0x3E - uShort
+        "rigid_matrix_count":       "<H 6x"     # 0x40 - uShort, padding[6]
     },
 
     "Bone": {
-        "name_offset":          ">i",       # 0x00 - int
-        "bone_index":           ">H",       # 0x04 - uShort
-        "parent_index":         ">H",       # 0x06 - uShort
-        "smooth_matrix_index":  ">h",       # 0x08 - short
-        "rigid_matrix_index":   ">h",       # 0x0A - short
-        "billboard_index":      ">h",       # 0x0C - short
-        "user_data_count":      ">H",       # 0x0E - uShort
-        "flags":                ">I",       # 0x10 - uInt
-        "scale_vector_x":       ">f",       # 0x14 - float
-        "scale_vector_y":       ">f",       # 0x18 - float
-        "scale_vector_z":       ">f",       # 0x1C - float
-        "rotation_vector_x":    ">f",       # 0x20 - float
-        "rotation_vector_y":    ">f",       # 0x24 - float
-        "rotation_vector_z":    ">f",       # 0x28 - float
-        "rotation_vector_w":    ">f",       # 0x2C - float
-        "translation_vector_x": ">f",       # 0x30 - float
-        "translation_vector_y": ">f",       # 0x34 - float
-        "translation_vector_z": ">f",       # 0x38 - float
-        "user_data_dict_offset":">i"        # 0x3C - int
+        "name_offset":              "<Q",       # 0x00 - char*
+        "user_data_offset":         "<Q",       # 0x08 - UserData[]
+        "user_data_dict_offset":    "<Q",       # 0x10 - _DIC*
+        "bone_index":               "<H",       # 0x18 - uShort
+        "parent_index":             "<h",       # 0x1A - short
+        "smooth_matrix_index":      "<h",       # 0x1C - short
+        "rigid_matrix_index":       "<h",       # 0x1E - short
+        "billboard_index":          "<h",       # 0x20 - short
+        "user_data_count":          "<H",       # 0x22 - uShort
+        "flags":                    "<I",       # 0x24 - uInt
+        "scale":                    "<3f",      # 0x28 - float[3]
+        "rotation":                 "<4f",      # 0x34 - float[4]
+        "translation":              "<3f"       # 0x44 - float[3]
     },
 
     "FSHPHeader": {
-        "magic":                ">4s",      # 0x00 - char[4]
-        "poly_name_offset":     ">i",       # 0x04 - int
-        "flags":                ">I",       # 0x08 - uInt
-        "section_index":        ">H",       # 0x0C - uShort
-        "fmat_index":           ">H",       # 0x0E - uShort
-        "fskl_index":           ">H",       # 0x10 - uShort
-        "fvtx_index":           ">H",       # 0x12 - uShort
-        "fskl_bone_skin_index": ">H",       # 0x14 - uShort
-        "vertex_skin_count":    ">B",       # 0x16 - byte
-        "lod_mdl_count":        ">B",       # 0x17 - byte
-        "key_shp_count":        ">B",       # 0x18 - byte
-        "target_attrib_count":  ">B",       # 0x19 - byte
-        "vis_tree_node_count":  ">H",       # 0x1A - uShort
-        "bounding_box_radius":  ">f",       # 0x1C - float
-        "fvtx_offset":          ">i",       # 0x20 - int
-        "lod_mdls_offset":      ">i",       # 0x24 - int
-        "fskl_indexs_offset":   ">i",       # 0x28 - int
-        "key_shp_dict":         ">i",       # 0x2C - int
-        "vis_tree_ranges_offset":">i",      # 0x30 - int
-        "user_pointer":         ">I"        # 0x34 - uInt
-    },
-
-    "LoDModel": {
-        "primitive_type":       ">I",       # 0x00 - uInt
-        "index_format":         ">I",       # 0x04 - uInt
-        "point_count":          ">I",       # 0x08 - uInt
-        "vis_group_count":      ">H2x",     # 0x0C - uShort, padding[2]
-        "vis_group_offset":     ">i",       # 0x10 - int
-        "index_buffer_offset":  ">i",       # 0x14 - int
-        "vertex_skip_count":    ">I"        # 0x18 - uInt
-    },
-
-    "VisibilityGroup": {
-        "index_buffer_offset":  ">I",       # 0x00 - uInt
-        "count":                ">I"        # 0x04 - uInt
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "name_offset":              "<Q",       # 0x10 - char*
+        "vertex_buffer_offset":     "<Q",       # 0x18 - FVTX*
+        "meshes_offset":            "<Q",       # 0x20 - Mesh[]
+        "skin_bone_indices_offset": "<Q",       # 0x28 - uShort[]
+        "key_shapes_offset":        "<Q",       # 0x30 - KeyShape[]
+        "key_shape_dict_offset":    "<Q",       # 0x38 - _DIC*
+        "bounding_boxes_offset":    "<Q",       # 0x40 - Bounding[]
+        "bounding_radii_offset":    "<Q",       # 0x48 - float[]
+        "user_pointer":             "<Q",       # 0x50 - uLong
+        "flags":                    "<I",       # 0x58 - uInt
+        "section_index":            "<H",       # 0x5C - uShort
+        "material_index":           "<H",       # 0x5E - uShort
+        "bone_index":               "<H",       # 0x60 - uShort
+        "vertex_buffer_index":      "<H",       # 0x62 - uShort
+        "skin_bone_index_count":    "<H",       # 0x64 - uShort
+        "vertex_skin_count":        "<B",       # 0x66 - byte
+        "mesh_count":               "<B",       # 0x67 - byte
+        "key_shape_count":          "<B",       # 0x68 - byte
+        "target_attribute_count":   "<B 6x"     # 0x69 - byte, padding[6]
+    },
+
+    "Mesh": {
+        "sub_meshes_offset":        "<Q",       # 0x00 - SubMesh[]
+        "memory_pool_offset":       "<Q",       # 0x08 - MemoryPool*
+        "runtime_buffer_offset":    "<Q",       # 0x10 - runtime Buffer*
+        "buffer_size_offset":       "<Q",       # 0x18 - BufferSize*
+        "buffer_offset":            "<I",       # 0x20 - uInt, offset in the buffer section
+        "primitive_type":           "<I",       # 0x24 - uInt
+        "index_format":             "<I",       # 0x28 - uInt
+        "index_count":              "<I",       # 0x2C - uInt
+        "first_vertex":             "<I",       # 0x30 - uInt
+        "sub_mesh_count":           "<H 2x"     # 0x34 - uShort, padding[2]
+    },
+
+    "SubMesh": {
+        "offset":                   "<I",       # 0x00 - uInt, in bytes
+        "count":                    "<I"        # 0x04 - uInt
+    },
+
+    "Bounding": {
+        "center":                   "<3f",      # 0x00 - float[3]
+        "extent":                   "<3f"       # 0x0C - float[3]
     },
 
     "FMATHeader": {
-        "magic":                ">4s",      # 0x00 - char[4]
-        "mat_name_offset":      ">i",       # 0x04 - int
-        "mat_flags":            ">I",       # 0x08 - uInt
-        "section_index":        ">H",       # 0x0C - uShort
-        "render_info_count":    ">H",       # 0x0E - uShort
-        "tex_ref_count":        ">B",       # 0x10 - byte
-        "tex_sampler_count":    ">B",       # 0x11 - byte
-        "mat_param_count":      ">H",       # 0x12 - uShort
-        "volatile_param_count": ">H",       # 0x14 - uShort
-        "mat_param_data_length":">H",       # 0x16 - uShort
-        "raw_param_data_length":">H",       # 0x18 - uShort
-        "usr_data_entry_count": ">H",       # 0x1A - uShort
-        "render_info_dict_offset":">i",     # 0x1C - int
-        "render_state_offset":  ">i",       # 0x20 - int
-        "shdr_assign_offset":   ">i",       # 0x24 - int
-        "tex_refs_offset":      ">i",       # 0x28 - int
-        "tex_samplers_offset":  ">i",       # 0x2C - int
-        "tex_sampler_dict_offset":">i",     # 0x30 - int
-        "mat_params_offset":    ">i",       # 0x34 - int
-        "mat_param_dict_offset":">i",       # 0x38 - int
-        "mat_param_data_offset":">i",       # 0x3C - int
-        "usr_data_dict_offset": ">i",       # 0x40 - int
-        "volatile_flags_offset":">i",       # 0x44 - int
-        "user_pointer":         ">i"        # 0x48 - int
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "name_offset":              "<Q",       # 0x10 - char*
+        "render_infos_offset":      "<Q",       # 0x18 - RenderInfo[]
+        "render_info_dict_offset":  "<Q",       # 0x20 - _DIC*
+        "shader_assign_offset":     "<Q",       # 0x28 - ShaderAssign*
+        "runtime_textures_offset":  "<Q",       # 0x30 - runtime Texture*[]
+        "texture_names_offset":     "<Q",       # 0x38 - char*[]
+        "runtime_samplers_offset":  "<Q",       # 0x40 - runtime Sampler*[]
+        "samplers_offset":          "<Q",       # 0x48 - Sampler[]
+        "sampler_dict_offset":      "<Q",       # 0x50 - _DIC*
+        "shader_params_offset":     "<Q",       # 0x58 - ShaderParam[]
+        "shader_param_dict_offset": "<Q",       # 0x60 - _DIC*
+        "shader_param_data_offset": "<Q",       # 0x68 - byte[]
+        "user_data_offset":         "<Q",       # 0x70 - UserData[]
+        "user_data_dict_offset":    "<Q",       # 0x78 - _DIC*
+        "volatile_flags_offset":    "<Q",       # 0x80 - byte[]
+        "user_pointer":             "<Q",       # 0x88 - uLong
+        "sampler_slots_offset":     "<Q",       # 0x90 - uLong[]
+        "texture_slots_offset":     "<Q",       # 0x98 - uLong[]
+        "flags":                    "<I",       # 0xA0 - uInt
+        "section_index":            "<H",       # 0xA4 - uShort
+        "render_info_count":        "<H",       # 0xA6 - uShort
+        "sampler_count":            "<B",       # 0xA8 - byte
+        "texture_count":            "<B",       # 0xA9 - byte
+        "shader_param_count":       "<H",       # 0xAA - uShort
+        "volatile_param_count":     "<H",       # 0xAC - uShort
+        "param_data_length":        "<H",       # 0xAE - uShort
+        "raw_param_data_length":    "<H",       # 0xB0 - uShort
+        "user_data_count":          "<H 4x"     # 0xB2 - uShort, padding[4]
     },
 
     "RenderInfo": {
-        "array_length":         ">H",       # 0x00 - uShort
-        "element_type":         ">Bx",      # 0x02 - byte, padding
-        "variable_name_offset": ">i"        # 0x04 - int
-    },
-
-    "TextureSampler": {
-        "GX2Sampler_struct1":   ">I",       # 0x00 - uInt
-        "GX2Sampler_struct2":   ">I",       # 0x04 - uInt
-        "GX2Sampler_struct3":   ">I",       # 0x08 - uInt
-        "handle":               ">I",       # 0x0C - uInt
-        "attrib_name_offset":   ">i",       # 0x10 - int
-        "element_index":        ">B3x"      # 0x14 - byte, padding[3]
-    },
-
-    "MaterialParameter": {
-        "type_":                ">B",       # 0x00 - byte
-        "length":               ">B",       # 0x01 - byte
-        "mat_param_data_offset":">H",       # 0x02 - uShort
-        "uniform_var_offset":   ">i",       # 0x04 - int
-        "conversion_callback_ptr":">I",     # 0x08 - uInt
-        "mat_param_index":      ">H",       # 0x0C - uShort
-        "mat_param_index_copy": ">H",       # 0x0E - uShort 
-        "variable_name_offset": ">i"        # 0x10 - int 
-    },
-
-    "RenderState": {
-        "flags":                ">I",       # 0x00 - uInt
-        "poly_ctrl":            ">I",       # 0x04 - uInt
-        "depth_ctrl":           ">I",       # 0x08 - uInt
-        "alpha_test1":          ">I",       # 0x0C - uInt
-        "alpha_test2":          ">f",       # 0x10 - float
-        "color_ctrl":           ">I",       # 0x14 - uInt
-        "blend_ctrl1":          ">I",       # 0x18 - uInt
-        "blend_ctrl2":          ">I",       # 0x1C - uInt
-        "blend_color_r":        ">f",       # 0x20 - float
-        "blend_color_g":        ">f",       # 0x24 - float
-        "blend_color_b":        ">f",       # 0x28 - float
-        "blend_color_a":        ">f"        # 0x2C - float
+        "name_offset":              "<Q",       # 0x00 - char*
+        "data_offset":              "<Q",       # 0x08 - int[]/float[]/char*[]
+        "count":                    "<H",       # 0x10 - uShort
+        "type_":                    "<B 5x"     # 0x12 - byte, padding[5]
+    },
+
+    "Sampler": {
+        "wrap_mode_u":              "<B",       # 0x00 - byte
+        "wrap_mode_v":              "<B",       # 0x01 - byte
+        "wrap_mode_w":              "<B",       # 0x02 - byte
+        "compare_function":         "<B",       # 0x03 - byte
+        "border_color":             "<B",       # 0x04 - byte
+        "max_anisotropy":           "<B",       # 0x05 - byte
+        "filter":                   "<H",       # 0x06 - uShort
+        "min_lod":                  "<f",       # 0x08 - float
+        "max_lod":                  "<f",       # 0x0C - float
+        "lod_bias":                 "<f 12x"    # 0x10 - float, padding[12]
+    },
+
+    "ShaderParam": {
+        "callback_pointer":         "<Q",       # 0x00 - uLong
+        "name_offset":              "<Q",       # 0x08 - char*
+        "type_":                    "<B",       # 0x10 - byte
+        "length":                   "<B",       # 0x11 - byte
+        "data_offset":              "<H",       # 0x12 - uShort, in the material's param data
+        "uniform_offset":           "<i",       # 0x14 - int
+        "depended_index":           "<H",       # 0x18 - uShort
+        "depend_index":             "<H 4x"     # 0x1A - uShort, padding[4]
     },
 
     "ShaderAssign": {
-        "shader_archive_name_offset":       ">i",       # 0x00 - int
-        "shading_mdl_name_offset":          ">i",       # 0x04 - int
-        "revision":                         ">I",       # 0x08 - uInt
-        "vtx_shader_input_count":           ">B",       # 0x0C - byte
-        "fragment_shader_input_count":      ">B",       # 0x0D - byte
-        "param_count":                      ">H",       # 0x0E - uShort
-        "vtx_shader":                       ">i",       # 0x10 - int
-        "fragment_shader_input_dict_offset":">i",       # 0x14 - int
-        "param_dict_offset":                ">i"        # 0x18 - int
-    },
-
-    "FTEXHeader": {
-        "magic":                ">4s",      # 0x00 - char[4]
-        "dimension":            ">I",       # 0x04 - uInt
-        "width":                ">I",       # 0x08 - uInt
-        "height":               ">I",       # 0x0C - uInt
-        "depth":                ">I",       # 0x10 - uInt
-        "mipmap_count":         ">I",       # 0x14 - uInt
-        "format":               ">I",       # 0x18 - uInt
-        "aa_mode":              ">I",       # 0x1C - uInt
-        "usage":                ">I",       # 0x20 - uInt
-        "data_length":          ">I",       # 0x24 - uInt
-        "data_pointer":         ">I",       # 0x28 - uInt
-        "mipmaps_data_length":  ">I",       # 0x2C - uInt
-        "mipmaps_pointer":      ">I",       # 0x30 - uInt
-        "tile_mode":            ">I",       # 0x34 - uInt
-        "swizzle_value":        ">I",       # 0x38 - uInt
-        "alignment":            ">I",       # 0x3C - uInt
-        "pitch":                ">I",       # 0x40 - uInt
-        "mipmaps_offsets":      ">13I",     # 0x44 - uInt[13]
-        "first_mipmap":         ">I",       # 0x78 - uInt
-        "mipmap_count_copy":    ">I",       # 0x7C - uInt
-        "first_slice":          ">I",       # 0x80 - uInt
-        "slice_count":          ">I",       # 0x84 - uInt
-        "component_selector":   ">4B",      # 0x88 - byte[4]
-        "texture_registers":    ">5I",      # 0x8C - uInt[5]
-        "texture_handle":       ">I",       # 0xA0 - uInt
-        "array_length":         ">B 3x",    # 0xA4 - byte, padding[3]
-        "file_name_offset":     ">i",       # 0xA8 - int
-        "file_path_offset":     ">i",       # 0xAC - int
-        "data_offset":          ">i",       # 0xB0 - int
-        "mipmap_data_offset":   ">i",       # 0xB4 - int
-        "user_data_dict_offset":">i",       # 0xB8 - int
-        "user_data_entry_count":">H 2x",    # 0xBC - uShort, padding[2]
+        "shader_archive_name_offset":   "<Q",   # 0x00 - char*
+        "shading_model_name_offset":    "<Q",   # 0x08 - char*
+        "attrib_assigns_offset":        "<Q",   # 0x10 - char*[]
+        "attrib_assign_dict_offset":    "<Q",   # 0x18 - _DIC*
+        "sampler_assigns_offset":       "<Q",   # 0x20 - char*[]
+        "sampler_assign_dict_offset":   "<Q",   # 0x28 - _DIC*
+        "shader_options_offset":        "<Q",   # 0x30 - char*[]
+        "shader_option_dict_offset":    "<Q",   # 0x38 - _DIC*
+        "revision":                     "<I",   # 0x40 - uInt
+        "attrib_assign_count":          "<B",   # 0x44 - byte
+        "sampler_assign_count":         "<B",   # 0x45 - byte
+        "shader_option_count":          "<H"    # 0x46 - uShort
     },
 
     "FSKAHeader": {
-        "magic":                ">4s",      # 0x00 - char[4]
-        "file_name_offset":     ">i",       # 0x04 - int
-        "file_path_offset":     ">i",       # 0x08 - int
-        "flags":                ">I",       # 0x0C - uInt
-        "frame_count":          ">I",       # 0x10 - uInt
-        "bone_animation_count": ">H",       # 0x14 - uShort
-        "user_data_entry_count":">H",       # 0x16 - uShort
-        "curve_count":          ">I",       # 0x18 - uInt
-        "baked_length":         ">I",       # 0x1C - uInt
-        "bone_animation_offset":">i",       # 0x20 - int
-        "skeleton_offset":      ">i",       # 0x24 - int
-        "bind_index_array":     ">i",       # 0x28 - int
-        "user_data_index_group":">i"        # 0x2C - int
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "name_offset":              "<Q",       # 0x10 - char*
+        "path_offset":              "<Q",       # 0x18 - char*
+        "skeleton_offset":          "<Q",       # 0x20 - FSKL*
+        "bind_indices_offset":      "<Q",       # 0x28 - uShort[]
+        "bone_animations_offset":   "<Q",       # 0x30 - BoneAnimation[]
+        "user_data_offset":         "<Q",       # 0x38 - UserData[]
+        "user_data_dict_offset":    "<Q",       # 0x40 - _DIC*
+        "flags":                    "<I",       # 0x48 - uInt
+        "frame_count":              "<i",       # 0x4C - int
+        "curve_count":              "<i",       # 0x50 - int
+        "baked_length":             "<I",       # 0x54 - uInt
+        "bone_animation_count":     "<H",       # 0x58 - uShort
+        "user_data_count":          "<H 4x"     # 0x5A - uShort, padding[4]
     },
 
     "BoneAnimation": {
-        "flags":                     ">I",      # 0x00 - uInt 
-        "bone_name":                 ">I",      # 0x04 - uInt
-        "start_rotation":            ">B",      # 0x08 - byte
-        "start_translation":         ">B",      # 0x09 - byte
-        "curve_count":               ">B",      # 0x0A - byte
-        "base_data_translate_offset":">B",      # 0x0B - byte
-        "start_curve_index":         ">B 3x",   # 0x0C - byte, padding[3]   
-        "curves_offset":             ">i",      # 0x10 - int
-        "base_data_offset":          ">i"       # 0x14 - int
-    },
-
-    "FSHUHeader": {
-        "magic":                            ">4s",      # 0x00
-        "file_name_offset":                 ">i",       # 0x04
-        "file_path_offset":                 ">i",       # 0x08
-        "flags":                            ">I",       # 0x0C
-        "frame_count":                      ">i",       # 0x10
-        "material_animation_count":         ">H",       # 0x14
-        "user_data_entry_count":            ">H",       # 0x16
-        "parameter_animation_info_count":   ">i",       # 0x18
-        "curve_count":                      ">I",       # 0x1C
-        "baked_length":                     ">I",       # 0x20
-        "model_offset":                     ">i",       # 0x24
-        "bind_index_offset":                ">i",       # 0x28
-        "material_animation_offset":        ">i",       # 0x2C
-        "user_data_dict_offset":            ">i"        # 0x30
-    },
-
-    "MaterialAnimation": {
-        "parameter_animation_info_count":          ">H",        # 0x00 - uShort
-        "curve_count":                             ">H",        # 0x02 - uShort
-        "animation_constant_count":                ">H 2x",     # 0x04 - uShort, padding[2]
-        "start_curve_index":                       ">i",        # 0x08 - int
-        "start_parameter_animation_info_index":    ">i",        # 0x0C - int
-        "animation_name_offset":                   ">i",        # 0x10 - int
-        "parameter_animation_info_offset":         ">i",        # 0x14 - int
-        "curves_offset":                           ">i",        # 0x18 - int
-        "animation_constant_offset":               ">i"         # 0x1C - int
-    },
-
-    "ParameterAnimationInfo": {
-        "start_curve_index":                ">H",   # 0x00 - uShort
-        "float_curve_count":                ">H",   # 0x02 - uShort
-        "int_curve_count":                  ">H",   # 0x04 - uShort
-        "start_animation_constant_index":   ">H",   # 0x06 - uShort
-        "animation_constant_count":         ">H",   # 0x08 - uShort
-        "sub_bind_index":                   ">H",   # 0x0A - uShort
-        "name_offset":                      ">i"    # 0x0C - int
-    },
-
-    "AnimationConstant": {
-        "anim_data_offset":                 ">I",   # 0x00 - uInt  
-        "value":                            ">i"    # 0x04 - int
-    },
-
-    "FTXPHeader": {
-        "magic":                  ">4s",        # 0x00 - char[4]
-        "file_name_offset":       ">i",         # 0x04 - int
-        "file_path_offset":       ">i",         # 0x08 - int
-        "flags":                  ">H",         # 0x0C - uShort
-        "usr_data_entry_count":   ">H",         # 0x0E - uShort
-        "frame_count":            ">i",         # 0x10 - int
-        "tex_ref_count":          ">H",         # 0x14 - uShort
-        "mat_pattern_anim_count": ">H",         # 0x16 - uShort
-        "pattern_anim_info_count":">I",         # 0x18 - uInt
-        "curve_count":            ">I",         # 0x1C - uInt
-        "baked_length":           ">I",         # 0x20 - uInt
-        "mdl_offset":             ">i",         # 0x24 - int
-        "bind_index_offset":      ">i",         # 0x28 - int
-        "mat_pattern_anim_offset":">i",         # 0x2C - int
-        "tex_ref_index_gr_offset":">i",         # 0x30 - int
-        "usr_data_indexg_offset": ">i"          # 0x34 - int
-    },
-
-    "MaterialPatternAnimation": {
-        "pattern_anim_info_count":          ">H",     # 0x00 - uShort
-        "curve_count":                      ">H",     # 0x02 - uShort
-        "start_curve_index":                ">i",     # 0x04 - int
-        "start_pattern_anim_info_index":    ">i",     # 0x08 - int
-        "anim_name_offset":                 ">i",     # 0x0C - int
-        "pattern_anim_info_array_offset":   ">i",     # 0x10 - int
-        "curve_array_offset":               ">i",     # 0x14 - int
-        "base_value_array_offset":          ">i",     # 0x18 - int
+        "name_offset":              "<Q",       # 0x00 - char*
+        "curves_offset":            "<Q",       # 0x08 - Curve[]
+        "base_data_offset":         "<Q",       # 0x10 - float[]
+        "flags":                    "<I",       # 0x18 - uInt
+        "begin_rotation":           "<B",       # 0x1C - byte
+        "begin_translation":        "<B",       # 0x1D - byte
+        "curve_count":              "<B",       # 0x1E - byte
+        "begin_base_translation":   "<B",       # 0x1F - byte
+        "begin_curve":              "<i 4x"     # 0x20 - int, padding[4]
     },
 
-    "PatternAnimationInfo": {
-        "curve_index":           ">b",       # 0x00 - Sbyte
-        "sub_bind_index":        ">b 2x",    # 0x01 - Sbyte, padding[2]
-        "name_offset":           ">i"        # 0x04 - int
+    "CurveHeader": {
+        "frames_offset":            "<Q",       # 0x00 - float[]/short[]/byte[]
+        "keys_offset":              "<Q",       # 0x08 - float[]/short[]/byte[]
+        "flags":                    "<H",       # 0x10 - uShort
+        "key_count":                "<H",       # 0x12 - uShort
+        "anim_data_offset":         "<I",       # 0x14 - uInt, offset of the animated value
+        "start_frame":              "<f",       # 0x18 - float
+        "end_frame":                "<f",       # 0x1C - float
+        "scale":                    "<f",       # 0x20 - float
+        "offset":                   "<f",       # 0x24 - float
+        "delta":                    "<f 4x"     # 0x28 - float, padding[4]
+    },
+
+    "FMAAHeader": {
+        "magic":                        "<4s",  # 0x00 - char[4]
+        "block_offset":                 "<I",   # 0x04 - uInt
+        "block_size":                   "<Q",   # 0x08 - uLong
+        "name_offset":                  "<Q",   # 0x10 - char*
+        "path_offset":                  "<Q",   # 0x18 - char*
+        "model_offset":                 "<Q",   # 0x20 - FMDL*
+        "bind_indices_offset":          "<Q",   # 0x28 - uShort[]
+        "material_animations_offset":   "<Q",   # 0x30 - MaterialAnimation[]
+        "texture_names_offset":         "<Q",   # 0x38 - char*[]
+        "user_data_offset":             "<Q",   # 0x40 - UserData[]
+        "user_data_dict_offset":        "<Q",   # 0x48 - _DIC*
+        "texture_binds_offset":         "<Q",   # 0x50 - uLong[]
+        "user_pointer":                 "<Q",   # 0x58 - uLong
+        "flags":                        "<H",   # 0x60 - uShort
+        "user_data_count":              "<H",   # 0x62 - uShort
+        "frame_count":                  "<i",   # 0x64 - int
+        "baked_length":                 "<I",   # 0x68 - uInt
+        "shader_param_animation_count": "<H",   # 0x6C - uShort
+        "texture_pattern_count":        "<H",   # 0x6E - uShort
+        "visibility_animation_count":   "<H",   # 0x70 - uShort
+        "material_animation_count":     "<H",   # 0x72 - uShort
+        "texture_name_count":           "<H 2x" # 0x74 - uShort, padding[2]
     },
 
     "FVISHeader": {
-        "magic":                 ">4s",      # 0x00 - char[4]
-        "file_name_offset":      ">i",       # 0x04 - int
-        "file_path_offset":      ">i",       # 0x08 - int
-        "flags":                 ">H",       # 0x0C - uShort
-        "user_data_entry_count": ">H",       # 0x0E - uShort
-        "frame_count":           ">i",       # 0x10 - int
-        "animation_count":       ">H",       # 0x14 - uShort
-        "curve_count":           ">H",       # 0x16 - uShort
-        "baked_length":          ">I",       # 0x18 - uInt
-        "model_offset":          ">i",       # 0x1C - int
-        "bind_index_offset":     ">i",       # 0x20 - int
-        "names_offset":          ">i",       # 0x24 - int
-        "curves_offset":         ">i",       # 0x28 - int
-        "base_values_offset":    ">i",       # 0x2C - int
-        "user_data_dict_offset": ">i"        # 0x30 - int
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "name_offset":              "<Q",       # 0x10 - char*
+        "path_offset":              "<Q",       # 0x18 - char*
+        "model_offset":             "<Q",       # 0x20 - FMDL*
+        "bind_indices_offset":      "<Q",       # 0x28 - uShort[]
+        "names_offset":             "<Q",       # 0x30 - char*[]
+        "curves_offset":            "<Q",       # 0x38 - Curve[]
+        "base_values_offset":       "<Q",       # 0x40 - byte[], one bit per bone
+        "user_data_offset":         "<Q",       # 0x48 - UserData[]
+        "user_data_dict_offset":    "<Q",       # 0x50 - _DIC*
+        "flags":                    "<H",       # 0x58 - uShort
+        "user_data_count":          "<H",       # 0x5A - uShort
+        "frame_count":              "<i",       # 0x5C - int
+        "animation_count":          "<H",       # 0x60 - uShort
+        "curve_count":              "<H",       # 0x62 - uShort
+        "baked_length":             "<I"        # 0x64 - uInt
     },
 
     "FSHAHeader": {
-        "magic":                          ">4s",    # 0x00 - char[4]
-        "file_name":                      ">i",     # 0x04 - int
-        "file_path":                      ">i",     # 0x08 - int
-        "flags":                          ">H",     # 0x0C - uShort
-        "user_data_entry_count":          ">H",     # 0x0E - uShort
-        "frame_count":                    ">i",     # 0x10 - int
-        "vertex_shape_animation_count":   ">H",     # 0x14 - uShort
-        "shape_animation_key_count":      ">H",     # 0x16 - uShort
-        "curve_count":                    ">H 2x",  # 0x18 - uShort, padding[2]
-        "baked_length":                   ">I",     # 0x1C - uInt
-        "model_offset":                   ">i",     # 0x20 - int
-        "bind_indexs_offset":             ">i",     # 0x24 - int
-        "vertex_shape_animations_offset": ">i",     # 0x28 - int
-        "user_data_index_group":          ">i"      # 0x2C - int
-    },
-
-    "VertexShapeAnimation": {
-        "curve_count":                      ">H",   # 0x00 - uShort
-        "shape_animation_key_count":        ">H",   # 0x02 - uShort
-        "start_curve_index":                ">i",   # 0x04 - int
-        "start_shape_animation_key_index":  ">i",   # 0x08 - int
-        "name_offset":                      ">i 8x",# 0x0C - int, padding[8]
-        "shape_animation_keys_offset":      ">i",   # 0x14 - int
-        "curves_offset":                    ">i",   # 0x18 - int 
-        "bone_transformation_data_offset":  ">i"    # 0x1C - int
-    },
-
-    "ShapeAnimationKey": {
-        "curve_index":          ">b",       # 0x01 - Sbyte
-        "sub_bind_index":       ">b 2x",    # 0x02 - Sbyte, padding[2]
-        "name_offset":          ">i"        # 0x04 - int
+        "magic":                        "<4s",  # 0x00 - char[4]
+        "block_offset":                 "<I",   # 0x04 - uInt
+        "block_size":                   "<Q",   # 0x08 - uLong
+        "name_offset":                  "<Q",   # 0x10 - char*
+        "path_offset":                  "<Q",   # 0x18 - char*
+        "model_offset":                 "<Q",   # 0x20 - FMDL*
+        "bind_indices_offset":          "<Q",   # 0x28 - uShort[]
+        "vertex_shape_animations_offset":"<Q",  # 0x30 - VertexShapeAnimation[]
+        "user_data_offset":             "<Q",   # 0x38 - UserData[]
+        "user_data_dict_offset":        "<Q",   # 0x40 - _DIC*
+        "flags":                        "<H",   # 0x48 - uShort
+        "user_data_count":              "<H",   # 0x4A - uShort
+        "frame_count":                  "<i",   # 0x4C - int
+        "vertex_shape_animation_count": "<H",   # 0x50 - uShort
+        "key_shape_animation_count":    "<H",   # 0x52 - uShort
+        "curve_count":                  "<H 2x",# 0x54 - uShort, padding[2]
+        "baked_length":                 "<I 4x" # 0x58 - uInt, padding[4]
     },
 
     "FSCNHeader": {
-        "magic":                     ">4s",     # 0x00 - char[4]
-        "file_name_offset":          ">i",      # 0x04 - int
-        "file_path_offset":          ">i",      # 0x08 - int
-        "user_data_entry_count":     ">H",      # 0x0C - uShort
-        "camera_anim_count":         ">H",      # 0x0E - uShort
-        "light_anim_count":          ">H",      # 0x10 - uShort
-        "fog_anim_count":            ">H",      # 0x12 - uShort
-        "camera_anim_dict_offset":   ">i",      # 0x14 - int
-        "light_anim_dict_offset":    ">i",      # 0x18 - int
-        "fog_anim_dict_offset":      ">i",      # 0x1C - int
-        "user_data_dict_offset":     ">i"       # 0x20 - int
-    },
-
-    "FCAMHeader": {
-        "magic":                                ">4s",      # 0x00 - char[4]
-        "flags":                                ">H 2x",    # 0x04 - uShort, padding[2]
-        "frame_count":                          ">i",       # 0x08 - int
-        "curve_count":                          ">B x",     # 0x0C - byte, padding
-        "user_data_entry_count":                ">H",       # 0x0E - uShort
-        "baked_length":                         ">I",       # 0x10 - uInt
-        "name_offset":                          ">i",       # 0x14 - int
-        "curves_offset":                        ">i",       # 0x18 - int
-        "base_cam_anim_data_offset":            ">i",       # 0x1C - int
-        "user_data_index_group_offset":         ">i"        # 0x20 - int
-    },
-
-    "CameraAnimationData": {
-        "near_clipping_plaen_distance":     ">f",       # 0x00 - float
-        "far_clipping_plane_distance":      ">f",       # 0x04 - float
-        "aspect_ratio":                     ">f",       # 0x08 - float
-        "height_offset":                    ">f",       # 0x0C - float
-        "position":                         ">3f",      # 0x10 - float[3]
-        "rotation":                         ">3f",      # 0x1C - float[3]
-        "twist":                            ">f"        # 0x28 - float
-    },
-
-    "FLITHeader": {
-        "magic":                                          ">4s",    # 0x00 - char[4]
-        "flags":                                          ">H",     # 0x04 - uShort
-        "user_data_entry_count":                          ">H",     # 0x06 - uShort
-        "frame_count":                                    ">i",     # 0x08 - int
-        "curve_count":                                    ">B",     # 0x0C - byte
-        "light_type":                                     ">b",     # 0x0D - Sbyte
-        "distance_attenuation_function_index":            ">b",     # 0x0E - Sbyte
-        "angle_attenuation_function_index":               ">b",     # 0x0F - Sbyte
-        "baked_length":                                   ">I",     # 0x10 - uInt
-        "name_offset":                                    ">i",     # 0x14 - int
-        "light_type_name_offset":                         ">i",     # 0x18 - int
-        "distance_attenuation_function_name_offset":      ">i",     # 0x1C - int
-        "angle_attenuation_function_name_offset":         ">i",     # 0x20 - int
-        "curves_offset":                                  ">i",     # 0x24 - int
-        "base_light_animation_data_offset":               ">i",     # 0x28 - int
-        "user_data_dict_offset":                          ">i"      # 0x2C - int
-    },
-
-    "LightAnimationData": {
-        "on_off":                 ">i",     # 0x00 - int
-        "position":               ">3f",    # 0x04 - float[3]
-        "rotation":               ">3f",    # 0x10 - float[3]
-        "distance_attenuation":   ">2f",    # 0x1C - float[2]
-        "angle_attenuation":      ">2f",    # 0x24 - float[2]
-        "first_color":            ">3f",    # 0x2C - float[3]
-        "second_color":           ">3f"     # 0x38 - float[3]
-    },
-
-    "FFOGHeader": {
-        "magic":                                      ">4s",        # 0x00 - char[4]
-        "flags":                                      ">H 2x",      # 0x04 - uShort, padding[2]
-        "frame_count":                                ">i",         # 0x08 - int
-        "curve_count":                                ">B",         # 0x0C - byte
-        "distance_attenuation_function_index":        ">B",         # 0x0D - byte
-        "user_data_entry_count":                      ">H",         # 0x0E - uShort
-        "baked_length":                               ">I",         # 0x10 - uInt
-        "name_offset":                                ">i 12x",     # 0x14 - int, padding[12]
-        "distance_attenuation_function_name_offset":  ">i",         # 0x18 - int
-        "curves_offset":                              ">i",         # 0x24 - int
-        "base_fog_animation_data_offset":             ">i",         # 0x28 - int
-        "user_data_dict_offset":                      ">i"          # 0x2C - int
-    },
-
-    "FogAnimationData": {
-        "distance_attenuation":    ">2f",
-        "color":                   ">3f"
-    },
-
-    "CurveHeader": {
-        "flags":                ">H",       # 0x00 - uShort
-        "key_count":            ">H",       # 0x02 - uShort
-        "anim_data_offset":     ">I",       # 0x04 - uInt
-        "start_frame":          ">f",       # 0x08 - float
-        "end_frame":            ">f",       # 0x0C - float
-        "scale":                ">f",       # 0x10 - float
-        "offset":               ">f",       # 0x14 - float
-        "delta":                ">f",       # 0x18 - float
-        "frames":               ">i",       # 0x1C - int
-        "keys":                 ">i"        # 0x20 - int
-    },
-
-    "EmbeddedFiles": {
-        "offset":               ">i",       # 0x00 - int
-        "length":               ">I"        # 0x04 - uInt
-    },
-
-    "SwitchFSCN":   {
-        "magic":                "<4s",
-        "path":                 "<4s",
-        "camera_anims_offset":  "<Q",
-        "light_anims_offset":   "",
-        "fog_anims_offset":     "",
-        "user_data_offset":     "",
-        "user_data_count":      "",
-        "camera_anim_count":    "",
-        "light_anim_count":     "",
-        "fog_anim_count":       ""
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "name_offset":              "<Q",       # 0x10 - char*
+        "path_offset":              "<Q",       # 0x18 - char*
+        "camera_animations_offset": "<Q",       # 0x20 - FCAM[]
+        "camera_dict_offset":       "<Q",       # 0x28 - _DIC*
+        "light_animations_offset":  "<Q",       # 0x30 - FLIT[]
+        "light_dict_offset":        "<Q",       # 0x38 - _DIC*
+        "fog_animations_offset":    "<Q",       # 0x40 - FFOG[]
+        "fog_dict_offset":          "<Q",       # 0x48 - _DIC*
+        "user_data_offset":         "<Q",       # 0x50 - UserData[]
+        "user_data_dict_offset":    "<Q",       # 0x58 - _DIC*
+        "flags":                    "<H",       # 0x60 - uShort
+        "camera_animation_count":   "<H",       # 0x62 - uShort
+        "light_animation_count":    "<H",       # 0x64 - uShort
+        "fog_animation_count":      "<H",       # 0x66 - uShort
+        "user_data_count":          "<H 6x"     # 0x68 - uShort, padding[6]
+    },
+
+    "BufferInfo": {
+        "flags":                    "<I",       # 0x00 - uInt
+        "size":                     "<I",       # 0x04 - uInt
+        "data_offset":              "<Q"        # 0x08 - byte[], followed by 16 reserved bytes
+    },
+
+    "EmbeddedFile": {
+        "data_offset":              "<Q",       # 0x00 - byte[]
+        "length":                   "<I 4x"     # 0x08 - uInt, padding[4]
+    },
+
+    # BNTX, the texture container embedded in a BFRES
+    "BNTXHeader": {
+        "magic":                    "<8s",      # 0x00 - char[8]
+        "version":                  "<I",       # 0x08 - uInt
+        "bom":                      "<H",       # 0x0C - uShort
+        "alignment":                "<B",       # 0x0E - byte
+        "target_addr_size":         "<B",       # 0x0F - byte
+        "file_name_offset":         "<I",       # 0x10 - uInt, past the name's length
+        "flags":                    "<H",       # 0x14 - uShort
+        "block_offset":             "<H",       # 0x16 - uShort
+        "reloc_table_offset":       "<I",       # 0x18 - uInt
+        "file_size":                "<I"        # 0x1C - uInt
+    },
+
+    "NXHeader": {
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "texture_count":            "<I",       # 0x04 - uInt
+        "textures_offset":          "<Q",       # 0x08 - BRTI*[]
+        "data_block_offset":        "<Q",       # 0x10 - BRTD*
+        "texture_dict_offset":      "<Q",       # 0x18 - _DIC*
+        "memory_pool_offset":       "<Q",       # 0x20 - MemoryPool*
+        "user_memory_pool_offset":  "<Q",       # 0x28 - MemoryPool*
+        "base_memory_pool_offset":  "<I 4x"     # 0x30 - uInt, padding[4]
+    },
+
+    "TextureInfo": {
+        "magic":                    "<4s",      # 0x00 - char[4]
+        "block_offset":             "<I",       # 0x04 - uInt
+        "block_size":               "<Q",       # 0x08 - uLong
+        "flags":                    "<B",       # 0x10 - byte
+        "dimension":                "<B",       # 0x11 - byte
+        "tile_mode":                "<H",       # 0x12 - uShort, 0 block linear, 1 pitch linear
+        "swizzle":                  "<H",       # 0x14 - uShort
+        "mip_count":                "<H",       # 0x16 - uShort
+        "sample_count":             "<H 2x",    # 0x18 - uShort, padding[2]
+        "format":                   "<I",       # 0x1C - uInt, type << 8 | kind
+        "access_flags":             "<I",       # 0x20 - uInt
+        "width":                    "<i",       # 0x24 - int
+        "height":                   "<i",       # 0x28 - int
+        "depth":                    "<i",       # 0x2C - int
+        "array_length":             "<i",       # 0x30 - int
+        "texture_layout":           "<i",       # 0x34 - int, block height log2 in the low 3 bits
+        "texture_layout2":          "<i 20x",   # 0x38 - int, padding[20]
+        "image_size":               "<I",       # 0x50 - uInt, every level of every layer
+        "image_alignment":          "<I",       # 0x54 - uInt
+        "channel_types":            "<I",       # 0x58 - uInt
+        "texture_dimension":        "<i",       # 0x5C - int
+        "name_offset":              "<Q",       # 0x60 - char*
+        "parent_offset":            "<Q",       # 0x68 - NX*
+        "mip_offsets_offset":       "<Q",       # 0x70 - byte*[]
+        "user_data_offset":         "<Q",       # 0x78 - UserData[]
+        "runtime_texture_offset":   "<Q",       # 0x80 - runtime Texture*
+        "runtime_view_offset":      "<Q",       # 0x88 - runtime TextureView*
+        "descriptor_slot_offset":   "<Q",       # 0x90 - uLong*
+        "user_data_dict_offset":    "<Q"        # 0x98 - _DIC*
     }
 
-}
\ No newline at end of file
+}
+
+
+FIELD_VALUE = 0         # First unpacked value, as is
+FIELD_LIST = 1          # Every unpacked value, as a list
+FIELD_POINTER = 2       # 64 bits pointer, resolved through the relocation table
+
+class Layout():
+    # A structs_fmts entry compiled into a single struct, so a whole record
+    # is decoded with one unpack_from call instead of one call per field.
+    # Fields stored big endian (vertex formats) are swapped afterwards
+    def __init__(self, fields: dict):
+        self.fields = []
+        fmts = []
+        index = offset = 0
+        for name, fmt in fields.items():
+            big_endian = fmt.startswith(">")
+            fmt = fmt.lstrip("<>!=@")
+            size = struct.calcsize("<" + fmt)
+            count = len(struct.unpack("<" + fmt, bytes(size)))
+            # Every 8 bytes field named like an offset is a pointer
+            if fmt.strip() == "Q" and name.endswith("offset"):
+                kind = FIELD_POINTER
+            else:
+                kind = FIELD_VALUE if count == 1 else FIELD_LIST
+            # Size of the value to swap, for big endian ones
+            swap = size if big_endian else 0
+            self.fields.append((name, kind, index, count, offset, swap))
+            fmts.append(fmt)
+            index += count
+            offset += size
+
+        self.names = tuple(field[0] for field in self.fields)
+        self.fmts = tuple(fmts)
+        self.struct = struct.Struct("<" + " ".join(fmts))
+        self.size = self.struct.size
+
+    def unpack(self, buffer, pos: int, pointers=None):
+        # Unpack the whole struct at once, as the value of each field.
+        # Pointers are taken from the resolved relocation table when there is
+        # one, those it doesn't list being null
+        unpacked_data = self.struct.unpack_from(buffer, pos)
+        values = []
+        for name, kind, index, count, offset, swap in self.fields:
+            if kind == FIELD_POINTER:
+                value = unpacked_data[index] if pointers is None else pointers.get(pos + offset, 0)
+            elif kind == FIELD_VALUE:
+                value = unpacked_data[index]
+                if swap:
+                    value = int.from_bytes(value.to_bytes(swap, "little"), "big")
+            else:
+                value = list(unpacked_data[index:index + count])
+            values.append(value)
+        return values
+
+    def unpack_into(self, obj, buffer, pos: int, pointers=None):
+        # The same, storing each field as an attribute of obj
+        unpacked_data = self.struct.unpack_from(buffer, pos)
+        for name, kind, index, count, offset, swap in self.fields:
+            if kind == FIELD_POINTER:
+                value = unpacked_data[index] if pointers is None else pointers.get(pos + offset, 0)
+            elif kind == FIELD_VALUE:
+                value = unpacked_data[index]
+                if swap:
+                    value = int.from_bytes(value.to_bytes(swap, "little"), "big")
+            else:
+                value = list(unpacked_data[index:index + count])
+            setattr(obj, name, value)
+
+    def pack_from(self, obj, buffer, pos: int, pointers=None):
+        # Pack back the fields of obj which differ from the record at pos,
+        # the inverse of unpack_into. Pointers are stored relative to the
+        # start of the file, and can only be changed where the relocation
+        # table lists one. Returns how many fields were written
+        written = 0
+        for (name, kind, index, count, offset, swap), fmt, current in zip(self.fields, self.fmts, self.unpack(buffer, pos, pointers)):
+            value = getattr(obj, name)
+            if value == current:
+                continue
+            if kind == FIELD_POINTER:
+                if pointers is not None and pos + offset not in pointers:
+                    raise ValueError(f"{name} at {pos + offset:#x} isn't in the relocation table, it can't be pointed elsewhere")
+                value = value - pointers.base if value and pointers is not None else value
+            elif kind == FIELD_VALUE and swap:
+                value = int.from_bytes(value.to_bytes(swap, "big"), "little")
+            struct.pack_into("<" + fmt, buffer, pos + offset, *(value if kind == FIELD_LIST else [value]))
+            written += 1
+        return written
+
+# Every structs_fmts entry, compiled once at import time
+layouts = {name: Layout(fields) for name, fields in structs_fmts.items()}
+
+class RecordMeta(type):
+    # Gives every record class one slot per field of its layout, plus
+    # whichever extra slots the class declares itself
+    def __new__(mcs, name, bases, namespace, layout=None):
+        slots = tuple(namespace.get("__slots__", ()))
+        if layout is not None:
+            namespace["_layout"] = layouts[layout]
+            slots = layouts[layout].names + slots
+        namespace["__slots__"] = slots
+        return super().__new__(mcs, name, bases, namespace)
+
+class Record(metaclass=RecordMeta):
+    # A struct read from the file, with its fields stored as plain
+    # attributes, and where it was read from
+    __slots__ = ("pos",)
+
+    def __init__(self, buffer, pos, pointers=None):
+        self.pos = pos
+        self._layout.unpack_into(self, buffer, pos, pointers)
+
+    def pack_into(self, buffer, pointers=None):
+        # Write the changed fields of the record back where it was read from
+        return self._layout.pack_from(self, buffer, self.pos, pointers)
+
+    @classmethod
+    def unpack_list(cls, buffer, pos: int, count: int, pointers=None):
+        # count consecutive records, as a list of records
+        size = cls._layout.size
+        return [cls(buffer, pos + i * size, pointers) for i in range(count)]
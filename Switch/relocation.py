@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+import struct
+
+import numpy as np
+
+# Sections split the file into the parts the console relocates separately
+# (the main data, the GPU buffer section), each one owning a range of entries
+section_dtype = np.dtype([
+    ("pointer", "<u8"),
+    ("position", "<u4"),
+    ("length", "<u4"),
+    ("entry_index", "<u4"),
+    ("entry_count", "<u4"),
+])
+
+# Entries describe runs of struct_count structs, each one made of
+# offset_count pointers followed by padding_count other 8 bytes values
+entry_dtype = np.dtype([
+    ("position", "<u4"),
+    ("struct_count", "<u2"),
+    ("offset_count", "u1"),
+    ("padding_count", "u1"),
+])
+
+class RelocationTable(struct.Struct):
+    # Where every pointer of the file is, so that they can all be relocated
+    # at load time. Sections and entries are read as structured arrays, so
+    # that the position of every pointer is computed in one pass
+    def __init__(self, buffer, pos):
+        super().__init__("<4s 2I 4x")
+        self.magic, self.offset, self.section_count = self.unpack_from(buffer, pos)
+        if self.magic != b"_RLT":
+            raise ValueError(f"No relocation table at {pos:#x}")
+
+        pos += self.size
+        self.sections = np.frombuffer(buffer, section_dtype, self.section_count, pos)
+        pos += self.sections.nbytes
+        self.entries = np.frombuffer(buffer, entry_dtype, int(self.sections["entry_count"].sum()), pos)
+
+    def get_length(self):
+        return self.size + self.sections.nbytes + self.entries.nbytes
+
+    def get_pointers(self):
+        # Position of every pointer, in file order, as an int64 array: each
+        # entry is expanded into its structs, then each struct into its pointers
+        entries = self.entries
+        struct_counts = entries["struct_count"].astype(np.int64)
+        offset_counts = entries["offset_count"].astype(np.int64)
+        strides = (offset_counts + entries["padding_count"]) * 8
+
+        owner = np.repeat(np.arange(len(entries)), struct_counts)
+        index = np.arange(len(owner)) - np.repeat(np.cumsum(struct_counts) - struct_counts, struct_counts)
+        starts = entries["position"][owner] + index * strides[owner]
+
+        counts = offset_counts[owner]
+        owner = np.repeat(np.arange(len(starts)), counts)
+        index = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return starts[owner] + index * 8
+
+    def pack_into(self, buffer, pos):
+        # Write the table at pos, which it records as its own offset
+        super().pack_into(buffer, pos, self.magic, pos, self.section_count)
+        pos += self.size
+        buffer[pos:pos + self.sections.nbytes] = self.sections.tobytes()
+        pos += self.sections.nbytes
+        buffer[pos:pos + self.entries.nbytes] = self.entries.tobytes()
+
+class Pointers():
+    # Target of every pointer the relocation table lists, all read at once
+    # the first time one is needed, instead of one 8 bytes field at a time.
+    # Targets are relative to the start of the file, which is at base in the
+    # buffer, and null pointers stay null. Positions are absolute
+    def __init__(self, buffer, table: RelocationTable, base: int = 0):
+        self.buffer = buffer
+        self.table = table
+        self.base = base
+        self.targets = None
+
+    def resolve(self):
+        if self.targets is None:
+            positions = self.table.get_pointers() + self.base
+            data = np.frombuffer(self.buffer, np.uint8)
+            raw = data[positions[:, None] + np.arange(8)].view("<u8").ravel().astype(np.int64)
+            targets = np.where(raw != 0, raw + self.base, 0)
+            self.targets = dict(zip(positions.tolist(), targets.tolist()))
+        return self.targets
+
+    def __len__(self):
+        return len(self.resolve())
+
+    def __contains__(self, pos):
+        return pos in self.resolve()
+
+    def get(self, pos: int, default: int = 0):
+        # Pointers the table doesn't list are never relocated by the
+        # console, so they are read as null
+        return self.resolve().get(pos, default)
+
+    def get_array(self, pos: int, count: int):
+        # Targets of count consecutive pointers
+        targets = self.resolve()
+        return [targets.get(pos + i * 8, 0) for i in range(count)]
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+import numpy as np
+from functools import lru_cache
+
+# Tegra X1 block linear surfaces are made of GOBs (groups of bytes), 64
+# bytes wide and 8 rows tall, stacked block_height GOBs high into blocks.
+# Blocks are laid out left to right, then top to bottom
+GOB_WIDTH = 64
+GOB_HEIGHT = 8
+GOB_SIZE = GOB_WIDTH * GOB_HEIGHT
+
+# BNTX texture tile modes
+BLOCK_LINEAR = 0
+PITCH_LINEAR = 1
+
+# Pitch linear rows are aligned to this many bytes
+PITCH_ALIGNMENT = 32
+
+# BNTX format type (format >> 8) to (bytes per element, block width, block
+# height). For block compressed formats an element is a block
+texture_formats = {
+    0x01: (1, 1, 1),    # R4G4
+    0x02: (1, 1, 1),    # R8
+    0x03: (2, 1, 1),    # R4G4B4A4
+    0x05: (2, 1, 1),    # R5G5B5A1
+    0x07: (2, 1, 1),    # R5G6B5
+    0x09: (2, 1, 1),    # R8G8
+    0x0A: (2, 1, 1),    # R16
+    0x0B: (4, 1, 1),    # R8G8B8A8
+    0x0C: (4, 1, 1),    # B8G8R8A8
+    0x0E: (4, 1, 1),    # R10G10B10A2
+    0x0F: (4, 1, 1),    # R11G11B10
+    0x12: (4, 1, 1),    # R16G16
+    0x14: (4, 1, 1),    # R32
+    0x16: (8, 1, 1),    # R16G16B16A16
+    0x18: (8, 1, 1),    # R32G32
+    0x19: (16, 1, 1),   # R32G32B32A32
+    0x1A: (8, 4, 4),    # BC1
+    0x1B: (16, 4, 4),   # BC2
+    0x1C: (16, 4, 4),   # BC3
+    0x1D: (8, 4, 4),    # BC4
+    0x1E: (16, 4, 4),   # BC5
+    0x1F: (16, 4, 4),   # BC6H
+    0x20: (16, 4, 4),   # BC7
+    0x2D: (16, 4, 4),   # ASTC 4x4
+    0x2E: (16, 5, 4),   # ASTC 5x4
+    0x2F: (16, 5, 5),   # ASTC 5x5
+    0x30: (16, 6, 5),   # ASTC 6x5
+    0x31: (16, 6, 6),   # ASTC 6x6
+    0x32: (16, 8, 5),   # ASTC 8x5
+    0x33: (16, 8, 6),   # ASTC 8x6
+    0x34: (16, 8, 8),   # ASTC 8x8
+    0x35: (16, 10, 5),  # ASTC 10x5
+    0x36: (16, 10, 6),  # ASTC 10x6
+    0x37: (16, 10, 8),  # ASTC 10x8
+    0x38: (16, 10, 10), # ASTC 10x10
+    0x39: (16, 12, 10), # ASTC 12x10
+    0x3A: (16, 12, 12), # ASTC 12x12
+}
+
+# ASTC format types, decoded by astc rather than bcn
+ASTC_TYPES = range(0x2D, 0x3B)
+
+# Block compressed format types to their BCn number, as decoded by bcn. The
+# low byte of a format is its kind: 0x01 unorm, 0x02 snorm, 0x06 sRGB
+bcn_types = {0x1A: 1, 0x1B: 2, 0x1C: 3, 0x1D: 4, 0x1E: 5}
+SNORM = 0x02
+
+def get_format_info(format_: int):
+    if format_ >> 8 not in texture_formats:
+        raise NotImplementedError(f"Unsupported texture format {format_:#x}")
+    return texture_formats[format_ >> 8]
+
+def get_bcn_format(format_: int):
+    # (BCn number, signed) of a block compressed format
+    if format_ >> 8 not in bcn_types:
+        raise NotImplementedError(f"Format {format_:#x} isn't block compressed")
+    return bcn_types[format_ >> 8], format_ & 0xFF == SNORM
+
+def is_astc(format_: int):
+    return format_ >> 8 in ASTC_TYPES
+
+def div_round_up(value: int, divisor: int):
+    return (value + divisor - 1) // divisor
+
+def get_element_size(width: int, height: int, format_: int):
+    # Size of a level in elements, blocks for block compressed formats
+    bpp, block_width, block_height = get_format_info(format_)
+    return div_round_up(width, block_width), div_round_up(height, block_height)
+
+def get_mip_block_height(height: int, block_height: int):
+    # Block height, in GOBs, of a level height elements tall. Levels no
+    # taller than half a block use blocks half as tall
+    while block_height > 1 and height <= block_height * GOB_HEIGHT // 2:
+        block_height //= 2
+    return block_height
+
+def get_pitch(width: int, bpp: int):
+    # Bytes per row of a pitch linear surface
+    return div_round_up(width * bpp, PITCH_ALIGNMENT) * PITCH_ALIGNMENT
+
+def get_surface_size(width: int, height: int, bpp: int, block_height: int):
+    # Bytes taken by a surface of (width, height) elements. A block height
+    # of 0 is a pitch linear surface
+    if not block_height:
+        return get_pitch(width, bpp) * height
+    return div_round_up(width * bpp, GOB_WIDTH) * div_round_up(height, GOB_HEIGHT * block_height) * GOB_SIZE * block_height
+
+@lru_cache(maxsize=128)
+def get_address_table(width: int, height: int, bpp: int, block_height: int):
+    # Byte address of the first byte of every element of a (height, width)
+    # linear image inside the surface. The bytes of an element are always
+    # consecutive, since elements are at most 16 bytes and GOBs are made of
+    # 16 bytes rows. Tables are cached, so textures of the same shape share them
+    y, x = np.indices((height, width), np.int64)
+    x *= bpp
+    if not block_height:
+        table = y * get_pitch(width, bpp) + x
+    else:
+        block_rows = GOB_HEIGHT * block_height
+        block_size = GOB_SIZE * block_height
+        table = (
+            y // block_rows * block_size * div_round_up(width * bpp, GOB_WIDTH)
+            + x // GOB_WIDTH * block_size
+            + y % block_rows // GOB_HEIGHT * GOB_SIZE
+            # Inside a GOB: two 32 bytes halves, each one made of 2 rows
+            # high, 16 bytes wide sectors
+            + x % 64 // 32 * 256
+            + y % 8 // 2 * 64
+            + x % 32 // 16 * 32
+            + y % 2 * 16
+            + x % 16
+            )
+    table.flags.writeable = False
+    return table
+
+def get_levels(width: int, height: int, format_: int, block_height_log2: int, mip_count: int, tile_mode: int = BLOCK_LINEAR):
+    # (width, height, block height, offset, size) of every mip level of a
+    # layer, width and height in elements. Returns them with the size of
+    # the layer, aligned to a block of the first level
+    bpp = get_format_info(format_)[0]
+    block_height = 1 << block_height_log2
+    levels = []
+    offset = 0
+    for level in range(max(1, mip_count)):
+        level_width, level_height = get_element_size(max(1, width >> level), max(1, height >> level), format_)
+        level_block_height = 0 if tile_mode == PITCH_LINEAR else get_mip_block_height(level_height, block_height)
+        size = get_surface_size(level_width, level_height, bpp, level_block_height)
+        levels.append((level_width, level_height, level_block_height, offset, size))
+        offset += size
+    alignment = GOB_SIZE * levels[0][2] if levels[0][2] else PITCH_ALIGNMENT
+    return levels, div_round_up(offset, alignment) * alignment
+
+def deswizzle_surface(data, levels, layers, layer_size: int, bpp: int):
+    # Gather several levels of several layers at once into linear (height,
+    # width, bytes per element) arrays, indexed by [level][layer]. levels
+    # are the (width, height, block height, offset) of each level, offsets
+    # being relative to the start of a layer
+    starts = []
+    shapes = []
+    for width, height, block_height, offset in levels:
+        table = get_address_table(width, height, bpp, block_height).ravel()
+        for layer in layers:
+            starts.append(table + (offset + layer * layer_size))
+            shapes.append((height, width))
+    starts = np.concatenate(starts)
+
+    data = np.frombuffer(data, np.uint8)
+    addresses = starts[:, None] + np.arange(bpp)
+    if starts.max() + bpp <= len(data):
+        pixels = data[addresses]
+    else:
+        # Elements lying outside of the given data (truncated surfaces) are left blank
+        inside = addresses < len(data)
+        pixels = np.where(inside, data[np.where(inside, addresses, 0)], 0).astype(np.uint8)
+
+    images = []
+    start = 0
+    for height, width in shapes:
+        images.append(pixels[start:start + height * width].reshape(height, width, bpp))
+        start += height * width
+    return [images[i:i + len(layers)] for i in range(0, len(images), len(layers))]
+
+def deswizzle(data, width: int, height: int, bpp: int, block_height: int):
+    # Gather one surface into a linear (height, width, bytes per element) array
+    return deswizzle_surface(data, [(width, height, block_height, 0)], [0], 0, bpp)[0][0]
+
+def swizzle(image, width: int, height: int, bpp: int, block_height: int):
+    # Scatter a linear image back into a surface of its own size
+    table = get_address_table(width, height, bpp, block_height)
+    result = np.zeros(get_surface_size(width, height, bpp, block_height), np.uint8)
+    result[table[..., None] + np.arange(bpp)] = np.frombuffer(image, np.uint8).reshape(height, width, bpp)
+    return result
@@ -0,0 +1,66 @@
+import re
+
+import pytest
+
+import formats
+from formats import layouts
+
+# Sizes of the records whose layout is known from the BFRES 0.5 and BNTX
+# format documentation, independently of this parser
+known_sizes = {
+    "FMDLHeader": 0x78,
+    "VertexAttribute": 0x10,
+    "BufferSize": 0x10,
+    "BufferStride": 0x10,
+    "Bone": 0x50,
+    "Mesh": 0x38,
+    "SubMesh": 0x8,
+    "Bounding": 0x18,
+    "RenderInfo": 0x18,
+    "Sampler": 0x20,
+    "ShaderParam": 0x20,
+    "BoneAnimation": 0x28,
+    "CurveHeader": 0x30,
+    "BufferInfo": 0x10,
+    "EmbeddedFile": 0x10,
+    "BNTXHeader": 0x20,
+}
+
+# (layout, field, offset) of fields at known offsets
+known_offsets = [
+    ("FMDLHeader", "skeleton_offset", 0x20),
+    ("FMDLHeader", "vertex_count", 0x68),
+    ("Bone", "bone_index", 0x18),
+    ("Bone", "flags", 0x24),
+    ("Bone", "scale", 0x28),
+    ("Bone", "translation", 0x44),
+    ("CurveHeader", "flags", 0x10),
+    ("CurveHeader", "key_count", 0x12),
+    ("CurveHeader", "scale", 0x20),
+    ("Mesh", "buffer_offset", 0x20),
+    ("Mesh", "index_count", 0x2C),
+    ("TextureInfo", "format", 0x1C),
+    ("TextureInfo", "image_size", 0x50),
+    ("TextureInfo", "name_offset", 0x60),
+]
+
+def get_offset(name: str, field: str):
+    return next(offset for field_name, kind, index, count, offset, swap in layouts[name].fields if field_name == field)
+
+@pytest.mark.parametrize("name, size", known_sizes.items())
+def test_size(name, size):
+    assert layouts[name].size == size
+
+@pytest.mark.parametrize("name, field, offset", known_offsets)
+def test_offset(name, field, offset):
+    assert get_offset(name, field) == offset
+
+@pytest.mark.parametrize("name", layouts)
+def test_commented_offsets(name):
+    # Every field is commented with its offset, which must be where the
+    # compiled layout puts it
+    with open(formats.__file__) as file:
+        source = file.read()
+    block = re.search(r'"%s": \{(.*?)\n    \}' % name, source, re.S).group(1)
+    comments = {field: int(offset, 16) for field, offset in re.findall(r'"(\w+)":\s*"[^"]*",?\s*#\s*(0x[0-9A-Fa-f]+)', block)}
+    assert comments == {field[0]: field[4] for field in layouts[name].fields}
@@ -0,0 +1,25 @@
+from benchmark import generate
+from classes import FRES
+
+def test_renames_reach_every_name_pointer():
+    data = generate(models=2, animations=1, textures=0)
+    fres = FRES(memoryview(data), 0, lazy=True)
+    out = fres.serialize({"model0": "Renamed", "bone1": "model1", "synthetic": "file"})
+    renamed = FRES(memoryview(bytes(out)), 0)
+
+    assert renamed.get_name() == "file"
+    assert list(renamed.index_groups["Model"].names()) == ["Renamed", "model1"]
+    assert renamed.index_groups["Model"].search("Renamed") == 0
+    model = renamed.model_files[0]
+    assert model.get_name() == "Renamed"
+    assert model.skeleton.get_bone_names() == ["bone0", "model1", "bone2", "bone3"]
+    assert model.skeleton.bones_dict.search("model1") == 1
+    assert renamed.model_files[1].skeleton.get_bone_names() == ["bone0", "model1", "bone2", "bone3"]
+
+    # model1 is in the pool already, only the other two names are added
+    added = len("Renamed") + 3 + len("file") + 3
+    assert len(out) - len(data) <= added + 1 + 8
+
+def test_unchanged_file_is_written_as_is():
+    data = generate(models=1, animations=1, textures=1)
+    assert bytes(FRES(memoryview(data), 0).serialize()) == data
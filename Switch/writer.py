@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+import struct
+from typing import Dict, List
+
+import numpy as np
+
+from classes import FRES, Subfiles, get_string
+from formats import Record
+from patricia import build_tree
+
+def get_records(obj, offset: int = 0, pointers=None):
+    # (record, position in the file of the buffer it was read from, pointers
+    # it was read with) of every record reachable from a parsed subfile:
+    # its own attributes, the records and lists they hold, and the textures
+    # of an embedded BNTX, which are read from a view starting at the BNTX
+    seen = set()
+    stack = [(obj, offset, pointers)]
+    while stack:
+        obj, offset, pointers = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, (list, tuple)):
+            stack.extend((item, offset, pointers) for item in obj)
+            continue
+        if isinstance(obj, Record):
+            yield obj, offset, pointers
+            values = [getattr(obj, name, None) for cls in type(obj).__mro__ for name in cls.__dict__.get("__slots__", ()) if name not in obj._layout.names]
+            if isinstance(obj, FRES.EmbeddedFiles) and obj.bntx is not None:
+                bntx = obj.bntx
+                # Its header is read from the file itself
+                stack.append((bntx.header, offset, None))
+                stack.extend((value, offset + obj.data_offset, bntx.pointers) for value in (bntx.nx, bntx.textures))
+                continue
+        elif type(obj).__module__ == "classes" and hasattr(obj, "__dict__"):
+            values = vars(obj).values()
+        else:
+            continue
+        stack.extend((value, offset, pointers) for value in values if isinstance(value, (list, tuple, Record)) or type(value).__module__ == "classes")
+
+def get_strings(buffer, positions, end: int):
+    # Every string of a pool to its position. Strings follow each other, each
+    # one after its 2 bytes length, null terminated and 2 bytes aligned, so
+    # the pool is read from the first one pointed to up to its end
+    strings = {}
+    pos = min(positions, default=end)
+    while pos + 2 <= end:
+        length = struct.unpack_from("<H", buffer, pos)[0]
+        if pos + 2 + length >= end:
+            break
+        try:
+            strings.setdefault(bytes(buffer[pos + 2:pos + 2 + length]).decode(), pos)
+        except UnicodeDecodeError:
+            pass
+        pos += 2 + length + 1
+        pos += pos % 2
+    return strings
+
+class Serializer():
+    # Writes a parsed FRES back to bytes. The file keeps its layout: it is
+    # copied as is, then every field changed in a record of a loaded subfile
+    # is packed back where it was read from. Names are replaced through the
+    # relocation table: every pointer it lists which points to a renamed
+    # string is pointed to the new one, and every dict holding one has its
+    # tree rebuilt. Names the string pool doesn't have yet are added after
+    # the data of the file, each one once, and the relocation table is
+    # written again after them, at the end of the file where it belongs.
+    # Pointers stay where they were, so the table itself doesn't change
+    def __init__(self, fres: FRES, renames: Dict[str, str] = None):
+        self.fres = fres
+        self.buffer = fres.buffer
+        self.renames = renames or {}
+
+    def write(self):
+        fres = self.fres
+        table = fres.relocation_table
+        end = fres.header.reloc_table_offset if table else len(self.buffer)
+        file_name = fres.get_name()
+        targets = self.get_pointers(self.buffer)[1]
+
+        # Strings of the whole pool, past its header, new names are only added
+        # if it lacks them
+        start = fres.header.string_table_offset
+        stop = start + fres.header.string_table_size
+        pooled = (targets > start) & (targets < stop)
+        existing = get_strings(self.buffer, targets[pooled].tolist() + list(fres.strings.strings), stop)
+        strings = {self.renames.get(name, name) for group in fres.index_groups.values() for name in group.names()}
+        strings.add(self.renames.get(file_name, file_name))
+        strings.update(self.renames[string] for string in existing if string in self.renames)
+
+        # Everything is written into one buffer, allocated once
+        size = end
+        added = {}
+        for string in sorted(strings - existing.keys()):
+            size += size % 2
+            added[string] = size
+            size += 2 + len(string.encode()) + 1
+        if table:
+            size += -size % 8
+            table_pos = size
+            size += table.get_length()
+        out = bytearray(size)
+        out[:end] = self.buffer[:end]
+        pool = dict(existing)
+        existing.update(added)
+        for string, pos in added.items():
+            encoded = string.encode()
+            struct.pack_into("<H", out, pos, len(encoded))
+            out[pos + 2:pos + 2 + len(encoded)] = encoded
+
+        for record, offset, pointers in self.get_records():
+            record.pack_into(memoryview(out)[offset:] if offset else out, pointers)
+
+        if fres.pointers is not None:
+            self.write_names(out, pool, existing)
+        else:
+            # Without a relocation table, only the dicts of the FRES are known
+            for group in fres.index_groups.values():
+                names = [self.renames.get(name, name) for name in group.names()]
+                self.write_index_group(out, group.pos, [existing[name] for name in names], names)
+        if file_name in self.renames:
+            pos = existing[self.renames[file_name]]
+            struct.pack_into("<I", out, fres.pos + 0x10, pos + 2)
+            struct.pack_into("<Q", out, fres.pos + 0x20, pos)
+        if table:
+            table.pack_into(out, table_pos)
+            struct.pack_into("<I", out, fres.pos + 0x18, table_pos)
+        struct.pack_into("<I", out, fres.pos + 0x1C, len(out))
+        return out
+
+    def get_pointers(self, buffer):
+        # (positions, targets) arrays of every pointer the relocation table
+        # lists, read from buffer
+        pointers = self.fres.pointers
+        if pointers is None:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        positions = pointers.table.get_pointers() + pointers.base
+        data = np.frombuffer(buffer, np.uint8)
+        raw = data[positions[:, None] + np.arange(8)].view("<u8").ravel().astype(np.int64)
+        return positions, np.where(raw != 0, raw + pointers.base, 0)
+
+    def write_names(self, out: bytearray, pool: Dict[str, int], existing: Dict[str, int]):
+        # Point every pointer to a renamed string of the pool to its new
+        # name, then build the tree of every dict with a renamed entry again
+        base = self.fres.pointers.base
+        renamed = {pos: existing[self.renames[string]] for string, pos in pool.items() if string in self.renames}
+        positions, targets = self.get_pointers(out)
+        dicts = set()
+        for pos, target in zip(positions.tolist(), targets.tolist()):
+            if target in renamed:
+                struct.pack_into("<Q", out, pos, renamed[target] - base)
+            elif out[target:target + 4] == b"_DIC":
+                dicts.add(target)
+
+        for pos in sorted(dicts):
+            count = struct.unpack_from("<i", out, pos + 4)[0]
+            entries = [struct.unpack_from("<Q", out, pos + 32 + 16 * i)[0] for i in range(count)]
+            if entries != [struct.unpack_from("<Q", self.buffer, pos + 32 + 16 * i)[0] for i in range(count)]:
+                self.write_index_group(out, pos, entries, [get_string(out, entry + base) for entry in entries])
+
+    def get_records(self):
+        fres = self.fres
+        if fres.buffer_section is not None:
+            yield fres.buffer_section, 0, None
+        for key in fres.subfile_offsets:
+            files = getattr(fres, "{}_files".format(key.lower()), [])
+            # Lazy subfiles which were never accessed are still as they were read
+            for file in files.files if isinstance(files, Subfiles) else files:
+                if file is not None:
+                    yield from get_records(file, 0, fres.pointers)
+
+    def write_index_group(self, out: bytearray, group_pos: int, positions: List[int], names: List[str]):
+        # The tree is built again from the names, in entry order
+        nodes = build_tree([name.encode() for name in names])
+        struct.pack_into("<2H", out, group_pos + 12, nodes[0][1], nodes[0][2])
+        for i, (pos, node) in enumerate(zip(positions, nodes[1:])):
+            struct.pack_into("<i 2H Q", out, group_pos + 24 + 16 * i, *node, pos)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+
+import numpy as np
+from functools import lru_cache
+
+# Wii U GPU (R7xx) configuration, as set up by GX2
+BANKS = 4
+BANKS_BITCOUNT = 2
+PIPES = 2
+PIPES_BITCOUNT = 1
+PIPE_INTERLEAVE_BYTES = 256
+PIPE_INTERLEAVE_BYTES_BITCOUNT = 8
+ROW_SIZE = 2048
+SWAP_SIZE = 256
+SPLIT_SIZE = 2048
+MICRO_TILE_PIXELS = 64
+
+# GX2SurfaceFormat (hardware format, without the type bits) to bits per element.
+# For block compressed formats an element is a 4x4 block
+surface_bpp = {
+    0x01: 8,    # 8
+    0x02: 8,    # 4_4
+    0x05: 16,   # 16
+    0x06: 16,   # 16 float
+    0x07: 16,   # 8_8
+    0x08: 16,   # 5_6_5
+    0x0A: 16,   # 5_5_5_1
+    0x0B: 16,   # 4_4_4_4
+    0x0D: 32,   # 32
+    0x0E: 32,   # 32 float
+    0x0F: 32,   # 16_16
+    0x10: 32,   # 16_16 float
+    0x11: 32,   # 24_8
+    0x16: 32,   # 10_11_11 float
+    0x19: 32,   # 10_10_10_2
+    0x1A: 32,   # 8_8_8_8
+    0x1B: 32,   # 2_10_10_10
+    0x1D: 64,   # 32_32
+    0x1E: 64,   # 32_32 float
+    0x1F: 64,   # 16_16_16_16
+    0x20: 64,   # 16_16_16_16 float
+    0x22: 128,  # 32_32_32_32
+    0x23: 128,  # 32_32_32_32 float
+    0x31: 64,   # BC1
+    0x32: 128,  # BC2
+    0x33: 128,  # BC3
+    0x34: 64,   # BC4
+    0x35: 128,  # BC5
+}
+
+# Block compressed formats to their BCn number, as decoded by bcn. The sRGB
+# (0x400) and snorm (0x200) variants share the same block layout
+bcn_formats = {0x31: 1, 0x32: 2, 0x33: 3, 0x34: 4, 0x35: 5}
+
+# GX2TileMode
+LINEAR_GENERAL = 0
+LINEAR_ALIGNED = 1
+TILED_1D_THIN1 = 2
+TILED_1D_THICK = 3
+TILED_2D_THIN1 = 4
+
+def get_bpp(format_: int):
+    return surface_bpp[format_ & 0x3F]
+
+def get_thickness(tile_mode: int):
+    if tile_mode in (3, 7, 11, 13, 15):
+        return 4
+    if tile_mode in (16, 17):
+        return 8
+    return 1
+
+def is_bank_swapped(tile_mode: int):
+    return tile_mode in (8, 9, 10, 11, 14, 15)
+
+def get_macro_tile_aspect_ratio(tile_mode: int):
+    if tile_mode in (5, 9):
+        return 2
+    if tile_mode in (6, 10):
+        return 4
+    return 1
+
+def get_rotation(tile_mode: int):
+    if tile_mode in (4, 5, 6, 7, 8, 9, 10, 11):
+        return PIPES * ((BANKS >> 1) - 1)
+    if tile_mode in (12, 13, 14, 15):
+        return 1 if PIPES < 4 else (PIPES >> 1) - 1
+    return 0
+
+def get_pixel_index(x, y, z, bpp: int, tile_mode: int):
+    # Position of each pixel inside its 8x8 micro tile
+    if bpp == 8:
+        bits = (x & 1, (x >> 1) & 1, (x >> 2) & 1, (y >> 1) & 1, y & 1, (y >> 2) & 1)
+    elif bpp == 16:
+        bits = (x & 1, (x >> 1) & 1, (x >> 2) & 1, y & 1, (y >> 1) & 1, (y >> 2) & 1)
+    elif bpp == 64:
+        bits = (x & 1, y & 1, (x >> 1) & 1, (x >> 2) & 1, (y >> 1) & 1, (y >> 2) & 1)
+    elif bpp == 128:
+        bits = (y & 1, x & 1, (x >> 1) & 1, (x >> 2) & 1, (y >> 1) & 1, (y >> 2) & 1)
+    else:
+        bits = (x & 1, (x >> 1) & 1, y & 1, (x >> 2) & 1, (y >> 1) & 1, (y >> 2) & 1)
+
+    index = bits[0] | bits[1] << 1 | bits[2] << 2 | bits[3] << 3 | bits[4] << 4 | bits[5] << 5
+    thickness = get_thickness(tile_mode)
+    if thickness > 1:
+        index |= (z & 1) << 6 | ((z >> 1) & 1) << 7
+    if thickness == 8:
+        index |= ((z >> 2) & 1) << 8
+    return index
+
+def get_bank_swapped_width(tile_mode: int, bpp: int, pitch: int):
+    if not is_bank_swapped(tile_mode):
+        return 0
+
+    num_samples = 1
+    bytes_per_sample = 8 * bpp
+    samples_per_tile = SPLIT_SIZE // bytes_per_sample
+    slices_per_tile = max(1, num_samples // samples_per_tile)
+    if get_thickness(tile_mode) > 1:
+        num_samples = 4
+
+    bytes_per_tile_slice = num_samples * bytes_per_sample // slices_per_tile
+    factor = get_macro_tile_aspect_ratio(tile_mode)
+    swap_tiles = max(1, (SWAP_SIZE >> 1) // bpp)
+
+    swap_width = swap_tiles * 8 * BANKS
+    height_bytes = num_samples * factor * PIPES * bpp // slices_per_tile
+    swap_max = PIPES * BANKS * ROW_SIZE // height_bytes
+    swap_min = PIPE_INTERLEAVE_BYTES * 8 * BANKS // bytes_per_tile_slice
+
+    width = min(swap_max, max(swap_min, swap_width))
+    while width >= 2 * pitch:
+        width >>= 1
+    return width
+
+def get_address_linear(x, y, z, bpp: int, pitch: int, height: int):
+    return (y * pitch + x + pitch * height * z) * bpp // 8
+
+def get_address_micro_tiled(x, y, z, bpp: int, pitch: int, height: int, tile_mode: int):
+    thickness = get_thickness(tile_mode)
+    micro_tile_bytes = (MICRO_TILE_PIXELS * thickness * bpp + 7) // 8
+    micro_tile_offset = micro_tile_bytes * ((x >> 3) + (y >> 3) * (pitch >> 3))
+    slice_offset = (z // thickness) * ((pitch * height * thickness * bpp + 7) // 8)
+    pixel_offset = (bpp * get_pixel_index(x, y, z, bpp, tile_mode)) >> 3
+    return pixel_offset + micro_tile_offset + slice_offset
+
+def get_address_macro_tiled(x, y, z, bpp: int, pitch: int, height: int, tile_mode: int, pipe_swizzle: int, bank_swizzle: int):
+    thickness = get_thickness(tile_mode)
+    elem_offset = (bpp * get_pixel_index(x, y, z, bpp, tile_mode) + 7) // 8
+
+    pipe = ((y >> 3) ^ (x >> 3)) & 1
+    bank = (((y // (16 * PIPES)) ^ (x >> 3)) & 1) | 2 * (((y // (8 * PIPES)) ^ (x >> 4)) & 1)
+
+    bank_pipe = pipe + PIPES * bank
+    slice_in = z >> 2 if thickness > 1 else z
+    bank_pipe ^= pipe_swizzle + PIPES * bank_swizzle + slice_in * get_rotation(tile_mode)
+    bank_pipe %= PIPES * BANKS
+    pipe = bank_pipe % PIPES
+    bank = bank_pipe // PIPES
+
+    slice_offset = ((height * pitch * thickness * bpp + 7) // 8) * (z // thickness)
+
+    factor = get_macro_tile_aspect_ratio(tile_mode)
+    macro_tile_pitch = 8 * BANKS // factor
+    macro_tile_height = 8 * PIPES * factor
+    macro_tile_bytes = (thickness * bpp * macro_tile_height * macro_tile_pitch + 7) // 8
+    macro_tile_x = x // macro_tile_pitch
+    macro_tile_y = y // macro_tile_height
+    macro_tile_offset = (macro_tile_x + (pitch // macro_tile_pitch) * macro_tile_y) * macro_tile_bytes
+
+    if is_bank_swapped(tile_mode):
+        bank_swap_order = np.array([0, 1, 3, 2, 6, 7, 5, 4])
+        swap_index = macro_tile_pitch * macro_tile_x // get_bank_swapped_width(tile_mode, bpp, pitch)
+        bank ^= bank_swap_order[swap_index & (BANKS - 1)]
+
+    group_mask = (1 << PIPE_INTERLEAVE_BYTES_BITCOUNT) - 1
+    swizzle_bits = BANKS_BITCOUNT + PIPES_BITCOUNT
+    total_offset = elem_offset + ((macro_tile_offset + slice_offset) >> swizzle_bits)
+
+    return (
+        bank << (PIPES_BITCOUNT + PIPE_INTERLEAVE_BYTES_BITCOUNT)
+        | pipe << PIPE_INTERLEAVE_BYTES_BITCOUNT
+        | total_offset & group_mask
+        | (total_offset & ~group_mask) << swizzle_bits
+        )
+
+@lru_cache(maxsize=128)
+def get_address_table(width: int, height: int, bpp: int, tile_mode: int, swizzle_value: int, pitch: int, aligned_height: int = 0, z: int = 0):
+    # Byte address of every element of a (height, width) linear image inside
+    # the tiled surface. Tables are cached, so textures of the same shape share them
+    y, x = np.indices((height, width), np.int64)
+    aligned_height = aligned_height or height
+
+    if tile_mode in (LINEAR_GENERAL, LINEAR_ALIGNED):
+        table = get_address_linear(x, y, z, bpp, pitch, aligned_height)
+    elif tile_mode in (TILED_1D_THIN1, TILED_1D_THICK):
+        table = get_address_micro_tiled(x, y, z, bpp, pitch, aligned_height, tile_mode)
+    else:
+        table = get_address_macro_tiled(x, y, z, bpp, pitch, aligned_height, tile_mode, (swizzle_value >> 8) & 1, (swizzle_value >> 9) & 3)
+
+    table.flags.writeable = False
+    return table
+
+def get_bcn_format(format_: int):
+    # (BCn number, signed) of a block compressed format
+    if format_ & 0x3F not in bcn_formats:
+        raise NotImplementedError(f"Format {format_:#x} isn't block compressed")
+    return bcn_formats[format_ & 0x3F], bool(format_ & 0x200)
+
+def get_element_size(width: int, height: int, format_: int):
+    # Images of block compressed formats are addressed in 4x4 blocks
+    if format_ & 0x3F in bcn_formats:
+        return (width + 3) // 4, (height + 3) // 4
+    return width, height
+
+def deswizzle(data, width: int, height: int, format_: int, tile_mode: int, swizzle_value: int, pitch: int, aligned_height: int = 0, z: int = 0):
+    # Gather a tiled surface into a linear (height, width, bytes per element) array,
+    # width and height being in elements (4x4 blocks for block compressed formats)
+    bpp = get_bpp(format_)
+    width, height = get_element_size(width, height, format_)
+    table = get_address_table(width, height, bpp, tile_mode, swizzle_value, pitch, aligned_height, z)
+
+    data = np.frombuffer(data, np.uint8)
+    addresses = table[..., None] + np.arange(bpp // 8)
+    # Elements lying outside of the given data (truncated surfaces) are left blank
+    inside = addresses < len(data)
+    return np.where(inside, data[np.where(inside, addresses, 0)], 0).astype(np.uint8)
+
+def swizzle(image, width: int, height: int, format_: int, tile_mode: int, swizzle_value: int, pitch: int, size: int, aligned_height: int = 0, z: int = 0):
+    # Scatter a linear image back into a tiled surface of the given size
+    bpp = get_bpp(format_)
+    width, height = get_element_size(width, height, format_)
+    table = get_address_table(width, height, bpp, tile_mode, swizzle_value, pitch, aligned_height, z)
+
+    result = np.zeros(size, np.uint8)
+    addresses = table[..., None] + np.arange(bpp // 8)
+    inside = addresses < size
+    result[addresses[inside]] = np.frombuffer(image, np.uint8).reshape(addresses.shape)[inside]
+    return result
+
+def next_pow2(value: int):
+    return 1 << (max(1, value) - 1).bit_length()
+
+def get_mip_level_tile_mode(tile_mode: int, bpp: int, level: int, width: int, height: int):
+    # The base level keeps its tile mode. Mip levels are never bank swapped,
+    # and small ones can't fill a macro tile and fall back to micro tiling
+    if not level:
+        return tile_mode
+    tile_mode = {8: 4, 9: 5, 10: 6, 11: 7, 14: 12, 15: 13}.get(tile_mode, tile_mode)
+
+    if bpp in (24, 48, 96):
+        bpp //= 3
+    micro_tile_bytes = (bpp * (get_thickness(tile_mode) << 6) + 7) >> 3
+    width_align_factor = max(1, 256 // micro_tile_bytes) if micro_tile_bytes < 256 else 1
+    macro_tile_width, macro_tile_height = {5: (16, 32), 6: (8, 64)}.get(tile_mode, (32, 16))
+    too_small = next_pow2(width) < width_align_factor * macro_tile_width or next_pow2(height) < macro_tile_height
+
+    if tile_mode in (4, 5, 6, 12) and too_small:
+        tile_mode = TILED_1D_THIN1
+    elif tile_mode in (7, 13) and too_small:
+        tile_mode = TILED_1D_THICK
+    # 2D textures are a single slice, never enough for thick tiling
+    return {3: 2, 7: 4, 13: 12}.get(tile_mode, tile_mode)
+
+def get_surface_info(width: int, height: int, format_: int, tile_mode: int, level: int = 0):
+    # Tile mode, pitch and height (both in elements, aligned) and size in bytes of a mip level
+    bpp = get_bpp(format_)
+    if level:
+        width = next_pow2(max(1, width >> level))
+        height = next_pow2(max(1, height >> level))
+    width, height = get_element_size(width, height, format_)
+    tile_mode = get_mip_level_tile_mode(tile_mode, bpp, level, width, height)
+    thickness = get_thickness(tile_mode)
+
+    if tile_mode == LINEAR_GENERAL:
+        pitch_align, height_align = 1, 1
+    elif tile_mode == LINEAR_ALIGNED:
+        pitch_align, height_align = max(64, PIPE_INTERLEAVE_BYTES * 8 // bpp), 1
+    elif tile_mode in (TILED_1D_THIN1, TILED_1D_THICK):
+        pitch_align, height_align = max(8, PIPE_INTERLEAVE_BYTES // (bpp // 8) // thickness), 8
+    else:
+        factor = get_macro_tile_aspect_ratio(tile_mode)
+        macro_tile_width = 8 * BANKS // factor
+        pitch_align = max(macro_tile_width, macro_tile_width * (PIPE_INTERLEAVE_BYTES // bpp // (8 * thickness)))
+        pitch_align = max(pitch_align, get_bank_swapped_width(tile_mode, bpp, width))
+        height_align = 8 * PIPES * factor
+
+    pitch = (width + pitch_align - 1) // pitch_align * pitch_align
+    height = (height + height_align - 1) // height_align * height_align
+    return tile_mode, pitch, height, pitch * height * thickness * bpp // 8
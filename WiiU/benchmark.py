@@ -0,0 +1,551 @@
+#!/usr/bin/env python
+
+import argparse
+import functools
+import io
+import random
+import struct
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from addrlib import get_surface_info
+from classes import FRES, IndexGroup, StringTable
+from curves import frame_types, key_sizes, key_types
+from formats import *
+from patricia import build_tree
+from skeleton import BoneArrays, bone_dtype
+from stream import StreamReader
+from yaz0 import decompress, is_compressed
+
+# Synthetic BFRES files
+# ---------------------
+
+class Writer():
+    # Builds a file out of structs_fmts records. Offset fields are given
+    # as absolute positions (0 for none) or as strings, and are stored
+    # relative to themselves once the string table is known
+    def __init__(self):
+        self.data = bytearray()
+        self.strings = []
+        # Writes left for after the string table
+        self.deferred = []
+
+    def align(self, alignment: int):
+        self.data += bytes(-len(self.data) % alignment)
+
+    def write(self, data: bytes, alignment: int = 4):
+        self.align(alignment)
+        pos = len(self.data)
+        self.data += data
+        return pos
+
+    def reserve(self, name: str, count: int = 1):
+        return self.write(bytes(layouts[name].size * count))
+
+    def record(self, name: str, pos: int = None, **fields):
+        layout = layouts[name]
+        if pos is None:
+            pos = self.reserve(name)
+
+        values = []
+        for field, kind, index, count, offset, size in layout.fields:
+            value = fields.get(field, 0)
+            items = list(value) if isinstance(value, (list, tuple)) else [value]
+            items += [0] * (count - len(items))
+            for i, item in enumerate(items):
+                at = pos + offset + i * size
+                if isinstance(item, str):
+                    self.strings.append((at, item))
+                    item = 0
+                elif kind in (FIELD_OFFSET, FIELD_OFFSET_ARRAY) and isinstance(item, int) and item:
+                    item -= at
+                values.append(item)
+        layout.pack_into(self.data, pos, *values)
+        return pos
+
+    def index_group(self, entries):
+        # entries are (name, absolute position) pairs
+        nodes = build_tree([name.encode() for name, _ in entries])
+        pos = self.record("IndexGroup", length=8 + 16 * len(nodes), count=len(entries))
+        self.record("IndexEntry", search_value=-1, left_index=nodes[0][1], right_index=nodes[0][2])
+        for (name, target), (search_value, left_index, right_index) in zip(entries, nodes[1:]):
+            self.record("IndexEntry", search_value=search_value, left_index=left_index, right_index=right_index, name_offset=name, data_offset=target)
+        return pos
+
+    def finish(self):
+        # Write the string table and point every string field to it
+        self.align(4)
+        start = len(self.data)
+        positions = {}
+        for string in sorted(set(string for _, string in self.strings)):
+            encoded = string.encode()
+            self.write(struct.pack(">I", len(encoded)))
+            positions[string] = len(self.data)
+            self.data += encoded + b"\x00"
+        self.align(4)
+        for at, string in self.strings:
+            struct.pack_into(">i", self.data, at, positions[string] - at)
+        return start, len(self.data) - start
+
+def write_texture(writer: Writer, name: str, size: int, mipmap_count: int, rng: random.Random):
+    # A BC1 2D tiled texture filled with random blocks
+    format_, tile_mode = 0x31, 4
+    levels = [get_surface_info(size, size, format_, tile_mode, level) for level in range(mipmap_count)]
+    header = writer.reserve("FTEXHeader")
+    data = writer.write(rng.randbytes(levels[0][3]), 0x800)
+    mipmaps = writer.write(b"".join(rng.randbytes(level[3]) for level in levels[1:]), 0x800)
+
+    mipmaps_offsets = [0]
+    for level in levels[1:-1]:
+        mipmaps_offsets.append(mipmaps_offsets[-1] + level[3])
+    writer.record(
+        "FTEXHeader", header,
+        magic=b"FTEX", dimension=1, width=size, height=size, depth=1, mipmap_count=mipmap_count,
+        format=format_, data_length=levels[0][3], mipmaps_data_length=len(writer.data) - mipmaps,
+        tile_mode=tile_mode, alignment=0x800, pitch=levels[0][1], mipmaps_offsets=mipmaps_offsets,
+        mipmap_count_copy=mipmap_count, slice_count=1, array_length=1,
+        file_name_offset=name, data_offset=data, mipmap_data_offset=mipmaps if mipmap_count > 1 else 0
+        )
+    return header
+
+def write_model(writer: Writer, name: str, bones: int, vertices: int, rng: random.Random):
+    header = writer.reserve("FMDLHeader")
+
+    # Skeleton, a chain of bones
+    skeleton = writer.reserve("FSKLHeader")
+    bones_offset = writer.reserve("Bone")
+    for i in range(1, bones):
+        writer.reserve("Bone")
+    for i in range(bones):
+        writer.record(
+            "Bone", bones_offset + i * 0x40,
+            name_offset=f"bone{i}", bone_index=i, parent_index=i - 1 if i else 0xFFFF,
+            smooth_matrix_index=i, rigid_matrix_index=-1, billboard_index=-1, flags=0x1000000,
+            scale_vector_x=1.0, scale_vector_y=1.0, scale_vector_z=1.0, rotation_vector_w=1.0,
+            translation_vector_y=1.0 if i else 0.0
+            )
+    bone_dict = writer.index_group([(f"bone{i}", bones_offset + i * 0x40) for i in range(bones)])
+    smooth_indices = writer.write(struct.pack(f">{bones}H", *range(bones)))
+    writer.record(
+        "FSKLHeader", skeleton,
+        magic=b"FSKL", flags=0x1100, bone_count=bones, smooth_index_count=bones,
+        bone_dict_offset=bone_dict, bones_offset=bones_offset,
+        smooth_index_offset=smooth_indices, smooth_matrix_offset=smooth_indices
+        )
+
+    # Vertices, a float position and unorm texture coordinates in separate buffers
+    positions = writer.write(struct.pack(f">{vertices * 3}f", *(rng.uniform(-100, 100) for _ in range(vertices * 3))), 0x40)
+    uvs = writer.write(rng.randbytes(vertices * 4), 0x40)
+    vertex_buffers = writer.record("FVTXBuffer", length=vertices * 12, stride=12, buffering_count=1, data_offset=positions)
+    writer.record("FVTXBuffer", length=vertices * 4, stride=4, buffering_count=1, data_offset=uvs)
+    attributes = writer.record("FVTXAttribute", attrib_name_offset="_p0", buffer_index=0, format=0x811)
+    writer.record("FVTXAttribute", attrib_name_offset="_u0", buffer_index=1, format=0x207)
+    attribute_dict = writer.index_group([("_p0", attributes), ("_u0", attributes + 0xC)])
+    fvtx = writer.record(
+        "FVTXHeader",
+        magic=b"FVTX", attrib_count=2, buffer_count=2, vertex_count=vertices, vertex_skin_count=1,
+        attribs_offset=attributes, attrib_dict_offset=attribute_dict, buffers_offset=vertex_buffers
+        )
+
+    # Shape, a triangle list over random vertices
+    count = vertices // 3 * 3
+    indices = writer.write(struct.pack(f">{count}H", *(rng.randrange(vertices) for _ in range(count))), 0x40)
+    index_buffer = writer.record("FVTXBuffer", length=count * 2, stride=2, buffering_count=1, data_offset=indices)
+    visibility_group = writer.record("VisibilityGroup", index_buffer_offset=0, count=count)
+    lod_mdl = writer.record(
+        "LoDModel",
+        primitive_type=4, index_format=4, point_count=count, vis_group_count=1,
+        vis_group_offset=visibility_group, index_buffer_offset=index_buffer
+        )
+    skin_indices = writer.write(struct.pack(">H", 0))
+    shape = writer.record(
+        "FSHPHeader",
+        magic=b"FSHP", poly_name_offset="shape0", lod_mdl_count=1, vertex_skin_count=1,
+        fvtx_offset=fvtx, lod_mdls_offset=lod_mdl, fskl_indexs_offset=skin_indices
+        )
+    shape_dict = writer.index_group([("shape0", shape)])
+
+    # Material
+    render_state = writer.record("RenderState", flags=1)
+    shader_assign = writer.record("ShaderAssign", shader_archive_name_offset="shader", shading_mdl_name_offset="model")
+    sampler = writer.record("TextureSampler", attrib_name_offset="_a0")
+    parameter = writer.record("MaterialParameter", type_=12, length=4, uniform_var_offset=-1, variable_name_offset="gsys_alpha")
+    parameter_data = writer.write(struct.pack(">f", 1.0))
+    render_info_dict = writer.index_group([])
+    material = writer.record(
+        "FMATHeader",
+        magic=b"FMAT", mat_name_offset="material0", tex_sampler_count=1, mat_param_count=1, mat_param_data_length=4,
+        render_info_dict_offset=render_info_dict, render_state_offset=render_state, shdr_assign_offset=shader_assign,
+        tex_samplers_offset=sampler, mat_params_offset=parameter, mat_param_data_offset=parameter_data
+        )
+    material_dict = writer.index_group([("material0", material)])
+
+    writer.record(
+        "FMDLHeader", header,
+        magic=b"FMDL", file_name_offset=name, fskl_offset=skeleton, fvtx_offset=fvtx,
+        fshp_dict_offset=shape_dict, fmat_dict_offset=material_dict,
+        fvtx_count=1, fshp_count=1, fmat_count=1, vertex_count=vertices
+        )
+    return header
+
+# Curves each bone animation can have, as (flag bit, offset of the animated
+# value), translation first
+curve_targets = ((13, 0x10), (14, 0x14), (15, 0x18), (9, 0x20), (10, 0x24), (11, 0x28), (6, 0x04), (7, 0x08), (8, 0x0C))
+
+def write_curves(writer: Writer, curves_offset: int, frame_count: int, curves):
+    # Frames and keys of (target, frames, keys) curves, then their headers,
+    # reserved after the data unless curves_offset is given
+    offsets = [(writer.write(struct.pack(f">{len(frames)}f", *frames)), writer.write(struct.pack(f">{len(keys)}f", *keys))) for _, frames, keys in curves]
+    if curves_offset is None:
+        curves_offset = writer.reserve("CurveHeader", len(curves)) if curves else 0
+    for j, ((target, frames, _), (frames_offset, keys_offset)) in enumerate(zip(curves, offsets)):
+        writer.record(
+            "CurveHeader", curves_offset + j * 0x24,
+            key_count=len(frames), anim_data_offset=target, end_frame=float(frame_count),
+            scale=1.0, delta=1.0, frames_offset=frames_offset, keys_offset=keys_offset
+            )
+    return curves_offset
+
+def write_animation(writer: Writer, name: str, bones: int, curves: int, frame_count: int, rng: random.Random, data_last: bool = False):
+    # A skeletal animation with one bone animation per bone, each one made of
+    # cubic float curves keyed every few frames. Curve data comes before the
+    # headers pointing to it, or with data_last at the very end of the file
+    curves = min(curves, len(curve_targets))
+    key_count = max(2, frame_count // 4)
+    bone_animations = []
+    for i in range(bones):
+        curve_values = [
+            (target, [j * frame_count / (key_count - 1) for j in range(key_count)], [rng.uniform(-1, 1) for _ in range(key_count * 4)])
+            for bit, target in curve_targets[:curves]
+        ]
+        if data_last:
+            curves_offset = writer.reserve("CurveHeader", curves) if curves else 0
+            writer.deferred.append(functools.partial(write_curves, writer, curves_offset, frame_count, curve_values))
+        else:
+            curves_offset = write_curves(writer, None, frame_count, curve_values)
+        base_data = writer.write(struct.pack(">10f", 1, 1, 1, 0, 0, 0, 0, 0, 0, 1))
+        flags = 0b111 << 3
+        for bit, target in curve_targets[:curves]:
+            flags |= 1 << bit
+        bone_animations.append((flags, curves_offset, base_data))
+
+    bone_animation_offset = writer.reserve("BoneAnimation", max(1, bones))
+    for i, (flags, curves_offset, base_data) in enumerate(bone_animations):
+        writer.record(
+            "BoneAnimation", bone_animation_offset + i * 0x18,
+            flags=flags, bone_name_offset=f"bone{i}", curve_count=curves, start_curve_index=(i * curves) & 0xFF,
+            curves_offset=curves_offset, base_data_offset=base_data
+            )
+    bind_indices = writer.write(struct.pack(f">{bones}H", *range(bones)))
+    return writer.record(
+        "FSKAHeader",
+        magic=b"FSKA", file_name_offset=name, flags=0b100000100, frame_count=frame_count,
+        bone_animation_count=bones, curve_count=bones * curves,
+        bone_animation_offset=bone_animation_offset, bind_index_array=bind_indices
+        )
+
+def generate(models: int = 1, bones: int = 4, textures: int = 1, animations: int = 1, curves: int = 3,
+             vertices: int = 1024, texture_size: int = 256, mipmap_count: int = 4, frame_count: int = 60, seed: int = 0,
+             animation_data_last: bool = False):
+    # A Wii U BFRES file with the given amount of each subfile. Animation
+    # curve data is written last, after the string table, with
+    # animation_data_last
+    rng = random.Random(seed)
+    writer = Writer()
+    writer.reserve("Header")
+
+    groups = [[] for _ in range(12)]
+    for i in range(models):
+        groups[0].append((f"model{i}", write_model(writer, f"model{i}", bones, vertices, rng)))
+    for i in range(textures):
+        groups[1].append((f"texture{i}", write_texture(writer, f"texture{i}", texture_size, mipmap_count, rng)))
+    for i in range(animations):
+        groups[2].append((f"animation{i}", write_animation(writer, f"animation{i}", bones, curves, frame_count, rng, animation_data_last)))
+    dicts_offsets = [writer.index_group(entries) if entries else 0 for entries in groups]
+    writer.record(
+        "Header", 0,
+        magic=b"FRES", version=0x03040000, bom=0xFEFF, length=0x10, file_align=0x2000, name_offset="synthetic",
+        dicts_offsets=dicts_offsets, dicts_counts=[len(entries) for entries in groups]
+        )
+
+    # The string table comes last, along with the file size
+    string_table_offset, string_table_length = writer.finish()
+    for write in writer.deferred:
+        write()
+    struct.pack_into(">I", writer.data, 0x0C, len(writer.data))
+    struct.pack_into(">2i", writer.data, 0x18, string_table_length, string_table_offset - 0x1C)
+    return bytes(writer.data)
+
+def compress(data: bytes):
+    # Greedy Yaz0 compression, matching against the last position each 3
+    # bytes were seen at
+    out = bytearray(struct.pack(">4sI8x", b"Yaz0", len(data)))
+    last = {}
+    pos = 0
+    while pos < len(data):
+        code_pos = len(out)
+        out.append(0)
+        code = 0
+        for bit in range(8):
+            if pos >= len(data):
+                break
+            key = data[pos:pos + 3]
+            start = last.get(key, -1)
+            last[key] = pos
+            count = 0
+            if len(key) == 3 and start >= 0 and pos - start <= 0x1000:
+                while count < 0x111 and pos + count < len(data) and data[start + count] == data[pos + count]:
+                    count += 1
+            if count >= 3:
+                distance = pos - start - 1
+                if count >= 0x12:
+                    out += bytes((distance >> 8, distance & 0xFF, count - 0x12))
+                else:
+                    out += bytes(((count - 2) << 4 | distance >> 8, distance & 0xFF))
+                pos += count
+            else:
+                code |= 0x80 >> bit
+                out.append(data[pos])
+                pos += 1
+        out[code_pos] = code
+    return bytes(out)
+
+# Benchmark
+# ---------
+
+def measure(function, repeat: int):
+    # Best time out of repeat runs, then the peak memory of one more traced run
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def get_curve_length(curve):
+    # Bytes of frames and keys of an animation curve
+    header = curve.header
+    frame_size = np.dtype(frame_types[header.frame_data_flag]).itemsize
+    key_size = np.dtype(key_types[header.key_data_flag]).itemsize * key_sizes.get(header.curve_data_flag, 1)
+    return header.key_count * (frame_size + key_size)
+
+def get_index_groups(fres):
+    # Every index group of a parsed file, subfiles' ones included
+    groups = list(fres.index_groups.values())
+    for model in getattr(fres, "fmdl_files", []):
+        groups += [model.shapes_dict, model.materials_dict, model.skele_file.get_bones_dict()]
+    return groups
+
+def tweak_materials(fres):
+    # Flip a render state bit and the sign of the float parameters of every
+    # material, then patch the file in place
+    for model in getattr(fres, "fmdl_files", []):
+        for material in model.materials:
+            material.render_state.flags ^= 1
+            for parameter in material.material_parameters:
+                if parameter.values is not None and 12 <= parameter.type_ < 27:
+                    parameter.values = tuple(-value for value in parameter.values)
+    return fres.patch()
+
+def get_tables(fres):
+    # (record class, pos, count) of the record arrays of a parsed file
+    tables = [(IndexGroup.IndexEntry, group.pos + 24, group.count) for group in fres.index_groups.values()]
+    for model in getattr(fres, "fmdl_files", []):
+        for fvtx in model.vertices:
+            tables.append((FRES.FMDL.FVTX.Buffer, fvtx.header.buffers_offset, fvtx.header.buffer_count))
+        for shape in model.shapes:
+            tables.append((FRES.FMDL.FSHP.LoDModel, shape.header.lod_mdls_offset, shape.header.lod_mdl_count))
+        for material in model.materials:
+            tables.append((FRES.FMDL.FMAT.TextureSampler, material.header.tex_samplers_offset, material.header.tex_sampler_count))
+            tables.append((FRES.FMDL.FMAT.MaterialParameter, material.header.mat_params_offset, material.header.mat_param_count))
+    for animation in getattr(fres, "fska_files", []):
+        tables.append((FRES.FSKA.BoneAnimation, animation.header.bone_animation_offset, animation.header.bone_animation_count))
+        for bone_animation in animation.bone_animations:
+            tables.append((FRES.FSKA.BoneAnimation.Curve.Header, bone_animation.curves_offset, bone_animation.curve_count))
+    return [table for table in tables if table[2]]
+
+def get_stages(buffer):
+    # (name, function, bytes processed, objects processed) of every stage
+    fres = FRES(buffer, 0)
+    models = getattr(fres, "fmdl_files", [])
+    textures = getattr(fres, "ftex_files", [])
+    animations = getattr(fres, "fska_files", [])
+    vertices = [fvtx for model in models for fvtx in model.vertices]
+    lod_mdls = [lod_mdl for model in models for shape in model.shapes for lod_mdl in shape.lod_mdls]
+
+    stages = [
+        ("header", lambda: FRES.Header(buffer, 0), layouts["Header"].size, 1),
+        ("index groups", lambda: FRES(buffer, 0, lazy=True), len(buffer), sum(group.count for group in fres.index_groups.values())),
+        ("eager parse", lambda: FRES(buffer, 0), len(buffer), sum(fres.header.dicts_counts)),
+        ("stream parse", lambda: list(StreamReader(io.BytesIO(buffer), 64 * 1024)), len(buffer), sum(fres.header.dicts_counts)),
+        ("serialize", lambda: fres.serialize(), len(buffer), sum(fres.header.dicts_counts)),
+        ]
+    # Patching needs a writable copy
+    writable = FRES(memoryview(bytearray(buffer)), 0)
+    materials = sum(len(model.materials) for model in getattr(writable, "fmdl_files", []))
+    stages.append(("patch", lambda: tweak_materials(writable), materials * layouts["RenderState"].size, materials))
+    compressed = compress(bytes(buffer))
+    stages.append(("yaz0 decompress", lambda: decompress(compressed), len(buffer), 1))
+    # Loads of an unchanged Yaz0 file, from the snapshot written by a first
+    # load. Mapping the snapshot replaces the decompression above
+    from cache import DecompressionCache
+    directory = tempfile.TemporaryDirectory()
+    cache = DecompressionCache(directory.name)
+    cache.decompress(compressed)
+
+    def cached_load():
+        # Keeps the directory alive for as long as the stage is
+        directory.name
+        return FRES(memoryview(cache.decompress(compressed)), 0, lazy=True)
+    stages.append(("yaz0 cached load", cached_load, len(buffer), len(fres.index_groups)))
+    stages.append((
+        "yaz0 stream parse",
+        lambda: list(StreamReader(io.BytesIO(compressed), 64 * 1024)),
+        len(buffer),
+        sum(fres.header.dicts_counts)
+        ))
+    groups = get_index_groups(fres)
+    names = [(group, name) for group in groups for name in group.names()]
+    stages.append((
+        "name lookup",
+        lambda: [group[name] for group, name in names],
+        len(names) * layouts["IndexEntry"].size,
+        len(names)
+        ))
+    stages.append((
+        "tree search",
+        lambda: [group.search(name) for group, name in names],
+        len(names) * layouts["IndexEntry"].size,
+        len(names)
+        ))
+    name_offsets = [entry.name_offset for group in groups for entry in group]
+    for model in models:
+        name_offsets += model.skele_file.get_arrays().name_offsets.tolist()
+        name_offsets += [attribute.attrib_name_offset for fvtx in model.vertices for attribute in fvtx.attributes]
+    for animation in animations:
+        name_offsets += [bone_animation.bone_name_offset for bone_animation in animation.bone_animations]
+    stages.append((
+        "string decode",
+        lambda: [table[offset] for table in [StringTable(buffer)] for offset in name_offsets],
+        fres.header.string_table_length,
+        len(name_offsets)
+        ))
+    tables = get_tables(fres)
+    if tables:
+        stages.append((
+            "table decode",
+            lambda: [cls.unpack_array(buffer, pos, count) for cls, pos, count in tables],
+            sum(cls._layout.size * count for cls, pos, count in tables),
+            sum(count for cls, pos, count in tables)
+            ))
+        stages.append((
+            "record decode",
+            lambda: [[cls(buffer, pos + i * cls._layout.size) for i in range(count)] for cls, pos, count in tables],
+            sum(cls._layout.size * count for cls, pos, count in tables),
+            sum(count for cls, pos, count in tables)
+            ))
+    if vertices:
+        stages.append((
+            "vertex decode",
+            lambda: [fvtx.get_attributes() for fvtx in vertices],
+            sum(vertex_buffer.length for fvtx in vertices for vertex_buffer in fvtx.buffers),
+            sum(fvtx.header.vertex_count for fvtx in vertices)
+            ))
+    if lod_mdls:
+        stages.append((
+            "index decode",
+            lambda: [lod_mdl.get_triangles() for lod_mdl in lod_mdls],
+            sum(lod_mdl.index_buffer.length for lod_mdl in lod_mdls),
+            sum(lod_mdl.point_count for lod_mdl in lod_mdls)
+            ))
+    if textures:
+        stages.append((
+            "texture decode",
+            lambda: [texture.decode() for texture in textures],
+            sum(texture.header.data_length + texture.header.mipmaps_data_length for texture in textures),
+            len(textures)
+            ))
+    if animations:
+        stages.append((
+            "curve evaluate",
+            lambda: [animation.evaluate() for animation in animations],
+            sum(get_curve_length(curve) for animation in animations for bone_animation in animation.bone_animations for curve in bone_animation.curves),
+            sum(animation.header.curve_count * animation.header.frame_count for animation in animations)
+            ))
+    if models:
+        skeletons = [model.skele_file for model in models]
+        stages.append((
+            "skeleton decode",
+            lambda: [BoneArrays(skeleton.buffer, skeleton.header.bones_offset, skeleton.header.bone_count) for skeleton in skeletons],
+            sum(skeleton.header.bone_count * bone_dtype.itemsize for skeleton in skeletons),
+            sum(skeleton.header.bone_count for skeleton in skeletons)
+            ))
+    if animations and models:
+        skeleton = models[0].skele_file
+        stages.append((
+            "pose sample",
+            lambda: [animation.sample(skeleton) for animation in animations],
+            sum(get_curve_length(curve) for animation in animations for bone_animation in animation.bone_animations for curve in bone_animation.curves),
+            sum(animation.header.frame_count * len(skeleton.bones) for animation in animations)
+            ))
+    return stages
+
+def run(buffer, repeat: int = 5):
+    # Stages the parser can't handle yet are reported with their error
+    results = []
+    for name, function, length, objects in get_stages(buffer):
+        try:
+            seconds, peak = measure(function, repeat)
+        except Exception as error:
+            results.append((name, f"{type(error).__name__}: {error}"))
+            continue
+        results.append((name, seconds, length / seconds / 1e6, objects / seconds, peak))
+    return results
+
+def print_results(title: str, results):
+    print(title)
+    print(f"  {'stage':<16}{'time (ms)':>12}{'MB/s':>12}{'objects/s':>14}{'peak (KB)':>12}")
+    for result in results:
+        if len(result) == 2:
+            print(f"  {result[0]:<16}  failed, {result[1]}")
+            continue
+        name, seconds, throughput, objects, peak = result
+        print(f"  {name:<16}{seconds * 1000:>12.3f}{throughput:>12.1f}{objects:>14.0f}{peak / 1024:>12.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the Wii U parser on synthetic BFRES files and on real ones")
+    parser.add_argument("files", nargs="*", help="real .bfres/.sbfres files to time as well")
+    parser.add_argument("--models", type=int, default=4)
+    parser.add_argument("--bones", type=int, default=32)
+    parser.add_argument("--textures", type=int, default=4)
+    parser.add_argument("--animations", type=int, default=4)
+    parser.add_argument("--curves", type=int, default=3, help="curves per bone animation")
+    parser.add_argument("--vertices", type=int, default=4096, help="vertices per model")
+    parser.add_argument("--texture-size", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", default=None, help="write the synthetic file there")
+    args = parser.parse_args()
+
+    data = generate(args.models, args.bones, args.textures, args.animations, args.curves, args.vertices, args.texture_size)
+    if args.save:
+        with open(args.save, "wb") as file:
+            file.write(data)
+    print_results(f"synthetic ({len(data) / 1e6:.2f} MB)", run(memoryview(data), args.repeat))
+
+    for path in args.files:
+        with open(path, "rb") as file:
+            data = file.read()
+        if is_compressed(data):
+            data = bytes(decompress(data))
+        print_results(f"{path} ({len(data) / 1e6:.2f} MB)", run(memoryview(data), args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -1,114 +1,373 @@
 #!/usr/bin/env python
 
 from formats import *
-from typing import List
-
-class IndexGroup():
-    def __init__(self, buffer, pos):
+import mmap
+import os
+import sys
+# Modules shared by the Wii U and Switch scripts live in common/
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "common"))
+from patricia import get_bit
+from yaz0 import decompress, is_compressed
+from typing import Dict, List
+
+class StringTable():
+    # Names of a file by absolute offset. Each one is only decoded the first
+    # time it's asked for, then interned, so every record referencing a name
+    # gets the same str object
+    def __init__(self, buffer, pos=0, length=0):
+        self.buffer = buffer
+        self.pos = pos
+        self.length = length
+        self.strings: Dict[int, str] = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, pos):
+        return pos in self.strings
+
+    def __getitem__(self, pos):
+        string = self.strings.get(pos)
+        if string is None:
+            string = self.strings[pos] = sys.intern(get_string(self.buffer, pos))
+        return string
+
+class IndexGroup(Record, layout="IndexGroup"):
+    # A dict of named entries, stored as a patricia tree. Names can be looked
+    # up by walking the tree, or through a hash index built on first use
+    __slots__ = ("entries", "entry", "buffer", "pos", "root", "indices", "strings")
+
+    def __init__(self, buffer, pos, strings=None):
         self.entries = []
-        get_unpacked_data(self, "IndexGroup", buffer, pos)
-
+        self.buffer = buffer
+        self.pos = pos
+        self.indices: Dict[str, int] = None
+        self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+        super().__init__(buffer, pos)
+
+        # The first entry is the root of the tree, only used to search it
+        self.root = self.IndexEntry(buffer, pos + 8)
         for i in range(self.count):
             # Add an entry to the "entries" list
             self.entry = self.IndexEntry(buffer, (pos + 24) + (16 * i))
             self.entries.append(self.entry)
 
-    class IndexEntry():
-        def __init__(self, buffer, pos):
-            get_unpacked_data(self, "IndexEntry", buffer, pos)
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, name):
+        return name in self.names()
+
+    def __getitem__(self, key):
+        # An entry by index or by name
+        if isinstance(key, str):
+            key = self.index(key)
+        return self.entries[key]
+
+    def names(self):
+        # Every name to its entry index, only read from the string table once
+        if self.indices is None:
+            self.indices = {self.strings[entry.name_offset]: i for i, entry in enumerate(self.entries)}
+        return self.indices
+
+    def index(self, name: str):
+        return self.names()[name]
+
+    def search(self, name: str):
+        # Index of the entry named name, found by walking the tree, which
+        # only reads the name of the entry it ends up at
+        key = name.encode()
+        parent, child = self.root, self.root.left_index
+        while child and self.entries[child - 1].search_value > parent.search_value:
+            parent = self.entries[child - 1]
+            child = parent.right_index if get_bit(key, parent.search_value) else parent.left_index
+        if not child or self.strings[self.entries[child - 1].name_offset] != name:
+            raise KeyError(name)
+        return child - 1
+
+    def get_table(self):
+        # Every entry but the root one as a single NumPy structured array
+        return self.IndexEntry.unpack_array(self.buffer, self.pos + 24, self.count)
+
+    class IndexEntry(Record, layout="IndexEntry"):
+        ...
+
+class Subfiles():
+    # Subfiles listed in an IndexGroup, each one parsed the first time it is
+    # accessed (by index or by name) and cached afterwards
+    def __init__(self, cls, buffer, index_group):
+        self.cls = cls
+        self.buffer = buffer
+        self.index_group = index_group
+        self.strings: StringTable = index_group.strings
+        self.offsets: List[int] = [entry.data_offset for entry in index_group.entries]
+        self.files: List = [None] * len(self.offsets)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __iter__(self):
+        for i in range(len(self.files)):
+            yield self[i]
+
+    def __contains__(self, name):
+        return name in self.index_group
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self.index(key)
+        elif isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self.files)))]
+
+        file = self.files[key]
+        if file is None:
+            file = self.files[key] = self.cls(self.buffer, self.offsets[key], self.strings)
+        return file
+
+    def names(self):
+        return self.index_group.names()
+
+    def index(self, name: str):
+        return self.index_group.index(name)
 
 class FRES():
     # caFe RESource
-    def __init__(self, buffer, pos):
+    def __init__(self, buffer, pos, lazy=False):
+        self.buffer = buffer
+        self.pos = pos
         self.subfile_names = ("FMDL", "FTEX", "FSKA", "FSHU", "ColorAnim", "TextureSRTAnim", "FTXP", "FVIS", "MaterialVisAnim", "FSHA", "FSCN", "EmbeddedFiles")
         self.index_groups = {}
         self.subfiles_offsets = {}
 
         self.header = self.Header(buffer, pos)
+        # Shared by every subfile, so each name is decoded once per file
+        self.strings = StringTable(buffer, self.header.string_table_offset, self.header.string_table_length)
         
         # Store whichever dict offset is available
         for i in range(len(self.header.dicts_offsets)):
             if self.header.dicts_offsets[i] not in [0, -1]:
                 pos = self.header.dicts_offsets[i]
-                self.index_groups[self.subfile_names[i]] = IndexGroup(buffer, pos)
+                self.index_groups[self.subfile_names[i]] = IndexGroup(buffer, pos, self.strings)
 
         for i, j in self.index_groups.items():
             self.subfiles_offsets[i] = []
             if j:
                 for k in j.entries:
                     self.subfiles_offsets[i].append(k.data_offset)
-        for key, value in self.subfiles_offsets.items():
-            exec("self.{}_files = []".format(key.lower()))
-            for i in value:
-                exec("self.{}_files.append(self.{}(buffer, {}))".format(key.lower(), key, i))
+        # In lazy mode, subfiles are only parsed once they're accessed
+        if lazy:
+            for key, value in self.index_groups.items():
+                setattr(self, "{}_files".format(key.lower()), Subfiles(getattr(self, key), buffer, value))
+            return
 
-    class Header():
-        def __init__(self, buffer, pos):
-            get_unpacked_data(self, "Header", buffer, pos)
+        for key, value in self.subfiles_offsets.items():
+            cls = getattr(self, key)
+            setattr(self, "{}_files".format(key.lower()), [cls(buffer, i, self.strings) for i in value])
+
+    def get_name(self):
+        return self.strings[self.header.name_offset]
+
+    def serialize(self, renames: Dict[str, str] = None):
+        # The file with every change made to its parsed records, and every
+        # name found in renames replaced, as a new bytearray
+        from writer import Serializer
+        return Serializer(self, renames).write()
+
+    def patch(self):
+        # Write every change made to the parsed records back into the file's
+        # own buffer, in place, and return how many fields were written. Only
+        # the fields whose value changed are touched
+        from writer import Patcher
+        return Patcher(self).write()
+
+    @classmethod
+    def open(cls, path, lazy=False, writable=False, cache=None):
+        # Map the file instead of reading it, every buffer slice taken while
+        # parsing (texture, vertex and index data) is then a view into the
+        # mapping. Yaz0 compressed files (.sbfres) are decompressed first, or
+        # with a cache (a cache.DecompressionCache) mapped from their
+        # decompressed snapshot. Writable mappings are for patch(), which then edits the
+        # file itself
+        with open(path, "r+b" if writable else "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        if is_compressed(mapping):
+            if writable:
+                mapping.close()
+                raise ValueError("Yaz0 compressed files can't be patched in place")
+            # Yaz0 files are decompressed at once into a buffer of the final
+            # size
+            data = decompress(mapping) if cache is None else cache.decompress(mapping)
+            mapping.close()
+            return cls(memoryview(data), 0, lazy)
+        return cls(memoryview(mapping), 0, lazy)
+
+    class Header(Record, layout="Header"):
+        ...
 
     class FMDL(): #0
         # caFe MoDeL
-        def __init__(self, buffer, pos):
+        def __init__(self, buffer, pos, strings=None):
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
             self.header = self.Header(buffer, pos)
-            self.skele_file = self.FSKL(buffer, self.header.fskl_offset)
+            self.skele_file = self.FSKL(buffer, self.header.fskl_offset, self.strings)
             self.vertices = []
-            self.shapes_dict = IndexGroup(buffer, self.header.fshp_dict_offset)
+            self.shapes_dict = IndexGroup(buffer, self.header.fshp_dict_offset, self.strings)
             self.shapes = []
-            self.materials_dict = IndexGroup(buffer, self.header.fmat_dict_offset)
+            self.materials_dict = IndexGroup(buffer, self.header.fmat_dict_offset, self.strings)
             self.materials = []
             for i in range(self.header.fvtx_count):
-                self.vertices.append(self.FVTX(buffer, self.header.fvtx_offset + i * 0x20))
+                self.vertices.append(self.FVTX(buffer, self.header.fvtx_offset + i * 0x20, self.strings))
             for j in self.shapes_dict.entries:
-                self.shapes.append(self.FSHP(buffer, j.data_offset))
+                self.shapes.append(self.FSHP(buffer, j.data_offset, self.strings))
             for k in self.materials_dict.entries:
-                self.shapes.append(self.FMAT(buffer, k.data_offset))
+                self.materials.append(self.FMAT(buffer, k.data_offset, self.strings))
+
+        def get_name(self):
+            return self.strings[self.header.file_name_offset]
+
+        def get_shape(self, name: str):
+            return self.shapes[self.shapes_dict.index(name)]
+
+        def get_material(self, name: str):
+            return self.materials[self.materials_dict.index(name)]
 
         # Separate each section of the FMDL file into classes, allowing for easier association 
-        class Header():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "FMDLHeader", buffer, pos)
+        class Header(Record, layout="FMDLHeader"):
+            ...
 
         class FVTX():
             # caFe VerTeX
-            def __init__(self, buffer, pos):
+            def __init__(self, buffer, pos, strings=None):
+                self.buffer = buffer
+                self.strings: StringTable = strings if strings is not None else StringTable(buffer)
                 self.header = self.Header(buffer, pos)
                 self.attributes = []
                 self.buffers = []
                 for i in range(self.header.attrib_count):
-                    self.attributes.append(self.Attribute(buffer, self.header.attribs_offset + i + 0xC))
+                    self.attributes.append(self.Attribute(buffer, self.header.attribs_offset + i * 0xC))
                 for i in range(self.header.buffer_count):
                     self.buffers.append(self.Buffer(buffer, self.header.buffers_offset + i * 0x18))
-                
-            class Header():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FVTXHeader", buffer, pos)
 
-            class Attribute():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FVTXAttribute", buffer, pos)
+            def attribute_names(self):
+                return [self.strings[attribute.attrib_name_offset] for attribute in self.attributes]
+
+            def get_attribute(self, key):
+                # Decode an attribute (by index or by name, e.g. "_p0") of every vertex into a NumPy array
+                from vertex import decode_attribute
+
+                if isinstance(key, str):
+                    key = self.attribute_names().index(key)
+                attribute = self.attributes[key]
+                vertex_buffer = self.buffers[attribute.buffer_index]
+                return decode_attribute(
+                    self.buffer,
+                    vertex_buffer.data_offset + attribute.buffer_offset,
+                    self.header.vertex_count,
+                    vertex_buffer.stride,
+                    attribute.format
+                    )
+
+            def get_attributes(self):
+                return {name: self.get_attribute(i) for i, name in enumerate(self.attribute_names())}
+
+            class Header(Record, layout="FVTXHeader"):
+                ...
 
-            class Buffer():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FVTXBuffer", buffer, pos)
+            class Attribute(Record, layout="FVTXAttribute"):
+                ...
+
+            class Buffer(Record, layout="FVTXBuffer"):
+                ...
 
         class FSKL():
             # caFe SKeLeton
-            def __init__(self, buffer, pos):
+            def __init__(self, buffer, pos, strings=None):
+                self.buffer = buffer
+                self.strings: StringTable = strings if strings is not None else StringTable(buffer)
                 self.header: self.Header = self.Header(buffer, pos)
-                self.bones: List[self.Bone] = []
-
-                for i in range(self.header.bone_count):
-                    self.bones.append(self.Bone(buffer, self.header.bones_offset + i * 0x40))
+                # Bones are stored as one array per field, read all at once the
+                # first time they're needed. Bone objects are views over them
+                self.arrays = None
+                self.bones: self.Bones = self.Bones(self)
+                self.bones_dict: IndexGroup = None
 
                 self.smooth_matrices = self.SmoothMatrix(self.header.smooth_index_count, buffer, self.header.smooth_matrix_offset)
 
-            class Header():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FSKLHeader", buffer, pos)
+                self.scale_mode = (self.header.flags >> 8) & 0b11
+                self.is_euler = bool(self.header.flags & 0b1000000000000)
+
+            def get_arrays(self):
+                if self.arrays is None:
+                    from skeleton import BoneArrays
+                    self.arrays = BoneArrays(self.buffer, self.header.bones_offset, self.header.bone_count)
+                return self.arrays
+
+            def get_bones_dict(self):
+                if self.bones_dict is None:
+                    self.bones_dict = IndexGroup(self.buffer, self.header.bone_dict_offset, self.strings)
+                return self.bones_dict
+
+            def get_bone_names(self):
+                return [self.strings[offset] for offset in self.get_arrays().name_offsets.tolist()]
+
+            def get_values(self):
+                # (bones, 10) bind pose [scale xyz, translate xyz, rotate xyzw] of every bone
+                return self.get_arrays().get_values()
+
+            def get_parents(self):
+                return self.get_arrays().parents
+
+            class Header(Record, layout="FSKLHeader"):
+                ...
+
+            class Bones():
+                # The bones of a skeleton, each Bone only created when accessed
+                def __init__(self, skeleton):
+                    self.skeleton = skeleton
+
+                def __len__(self):
+                    return self.skeleton.header.bone_count
+
+                def __iter__(self):
+                    for i in range(len(self)):
+                        yield self[i]
+
+                def __getitem__(self, key):
+                    # A bone by index or by name
+                    if isinstance(key, str):
+                        entry = self.skeleton.get_bones_dict()[key]
+                        key = (entry.data_offset - self.skeleton.header.bones_offset) // layouts["Bone"].size
+                    key = range(len(self))[key]
+                    if isinstance(key, range):
+                        return [self[i] for i in key]
+                    return self.skeleton.Bone(self.skeleton.get_arrays(), key)
 
             class Bone():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "Bone", buffer, pos)
+                # A single bone of the skeleton arrays, with the attributes of the Bone layout
+                __slots__ = ("arrays", "index")
+
+                def __init__(self, arrays, index):
+                    self.arrays = arrays
+                    self.index = index
+
+                def __getattr__(self, name):
+                    try:
+                        return self.arrays.get(name, self.index)
+                    except KeyError:
+                        raise AttributeError(name) from None
+
+                def __setattr__(self, name, value):
+                    # Written into the skeleton arrays, which the writers pack back
+                    if name in self.__slots__:
+                        object.__setattr__(self, name, value)
+                        return
+                    try:
+                        self.arrays.set(name, self.index, value)
+                    except KeyError:
+                        raise AttributeError(name) from None
 
             class SmoothMatrix(struct.Struct):
                 def __init__(self, count, buffer, pos):
@@ -124,61 +383,91 @@ class FRES():
 
         class FSHP():
             # caFe SHaPe
-            def __init__(self, buffer, pos):
+            def __init__(self, buffer, pos, strings=None):
+                self.strings: StringTable = strings if strings is not None else StringTable(buffer)
                 self.header = self.Header(buffer, pos)
                 self.lod_mdls = []
                 for i in range(self.header.lod_mdl_count):
-                    self.lod_mdls.append(self.LoDModel(buffer, self.header.lod_mdls_offset + i * 0x1C))
-                # TODO: FSKLIndexArray, Visibility Group, IndexBuffer
-            class Header():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FSHPHeader", buffer, pos)
+                    lod_mdl = self.LoDModel(buffer, self.header.lod_mdls_offset + i * 0x1C)
+                    lod_mdl.buffer = buffer
+                    lod_mdl.index_buffer = self.IndexBuffer(buffer, lod_mdl.index_buffer_offset)
+                    lod_mdl.visibility_groups = []
+                    for j in range(lod_mdl.vis_group_count):
+                        lod_mdl.visibility_groups.append(self.VisibilityGroup(buffer, lod_mdl.vis_group_offset + j * 0x8))
+                    self.lod_mdls.append(lod_mdl)
 
-            class LoDModel():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "LoDModel", buffer, pos)
+                self.skin_bone_indices = self.FSKLIndexArray(self.header.fskl_bone_skin_index, buffer, self.header.fskl_indexs_offset)
+
+            def get_name(self):
+                return self.strings[self.header.poly_name_offset]
+
+            class Header(Record, layout="FSHPHeader"):
+                ...
+
+            class LoDModel(Record, layout="LoDModel"):
+                __slots__ = ("buffer", "index_buffer", "visibility_groups")
+
+                def get_indices(self):
+                    # A view over the whole index buffer, relative to vertex_skip_count
+                    from primitives import get_indices
+                    return get_indices(self.buffer, self.index_buffer.data_offset, self.point_count, self.index_format)
+
+                def get_visibility_group_indices(self):
+                    # One view per visibility group, over its part of the index buffer
+                    indices = self.get_indices()
+                    return [indices[group.index_buffer_offset // indices.itemsize:][:group.count] for group in self.visibility_groups]
 
-            class FSKLIndexArray():
+                def get_triangles(self, indices=None):
+                    # The given indices (or the whole index buffer) as a (count, 3) triangle list
+                    from primitives import to_triangles
+                    return to_triangles(self.get_indices() if indices is None else indices, self.primitive_type)
+
+            class FSKLIndexArray(struct.Struct):
                 def __init__(self, count, data, pos):
                     super().__init__(f">{count}H")
 
                     self.values = self.unpack_from(data, pos)
 
-            class VisibilityGroup():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "VisibilityGroup", buffer, pos)
+            class VisibilityGroup(Record, layout="VisibilityGroup"):
+                ...
 
-            class IndexBuffer():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FVTXBuffer", buffer, pos)
+            class IndexBuffer(Record, layout="FVTXBuffer"):
+                ...
 
         class FMAT():
             # caFe MATerial
-            def __init__(self, buffer, pos):
+            def __init__(self, buffer, pos, strings=None):
+                self.strings: StringTable = strings if strings is not None else StringTable(buffer)
                 self.header = self.Header(buffer, pos)
                 self.tex_samplers = []
                 self.material_parameters = []
                 self.render_info_params = []
-                self.render_info_dict = IndexGroup(buffer, self.header.render_info_dict_offset)
+                self.render_info_dict = IndexGroup(buffer, self.header.render_info_dict_offset, self.strings)
                 self.render_state = self.RenderState(buffer, self.header.render_state_offset)
                 self.shader_assign = self.ShaderAssign(buffer, self.header.shdr_assign_offset)
 
                 for i in range(self.header.tex_sampler_count):
                     self.tex_samplers.append(self.TextureSampler(buffer, self.header.tex_samplers_offset + i * 0x18))
 
+                # Parameter values are stored together, after the parameters
+                data_offset = self.header.mat_param_data_offset if self.header.mat_param_data_length else None
                 for j in range(self.header.mat_param_count):
-                    self.material_parameters.append(self.MaterialParameter(buffer, self.header.mat_params_offset + i * 0x14))
+                    self.material_parameters.append(self.MaterialParameter(buffer, self.header.mat_params_offset + j * 0x14, data_offset))
 
                 for entry in self.render_info_dict.entries:
                     self.render_info_params.append(self.RenderInfo(buffer, entry.data_offset))
 
-            class Header():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FMATHeader", buffer, pos)
+            def get_name(self):
+                return self.strings[self.header.mat_name_offset]
+
+            class Header(Record, layout="FMATHeader"):
+                ...
+
+            class RenderInfo(Record, layout="RenderInfo"):
+                __slots__ = ("array_data_class", "array_data")
 
-            class RenderInfo():
                 def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "RenderInfo", buffer, pos)
+                    super().__init__(buffer, pos)
 
                     self.array_data_class = self.ArrayData(self.element_type, buffer, pos + 8)
                     self.array_data = self.array_data_class.data # 0x08 - uInt[2]/float[2]/uInt
@@ -195,40 +484,126 @@ class FRES():
                             super().__init__(">I")
                             self.data = self.unpack_from(buffer, pos)[0]
 
-            class TextureSampler():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "TextureSampler", buffer, pos)
+            class TextureSampler(Record, layout="TextureSampler"):
+                ...
 
-            class MaterialParameter():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "MaterialParameter", buffer, pos)
+            class MaterialParameter(Record, layout="MaterialParameter"):
+                # The value is read from the material's parameter data into
+                # values, a tuple written back like the fields when it changes
+                __slots__ = ("value_struct", "values")
 
-            class RenderState():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "RenderState", buffer, pos)
+                def __init__(self, buffer, pos, data_offset=None):
+                    super().__init__(buffer, pos)
+                    self.value_struct = struct.Struct(get_param_format(self.type_, self.length))
+                    self.values = None
+                    if data_offset is not None:
+                        self.values = self.value_struct.unpack_from(buffer, data_offset + self.mat_param_data_offset)
 
-            class ShaderAssign():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "ShaderAssign", buffer, pos)
+            class RenderState(Record, layout="RenderState"):
+                ...
+
+            class ShaderAssign(Record, layout="ShaderAssign"):
+                ...
 
     class FTEX(): #1
         # caFe TEXture
-        def __init__(self, buffer, pos):
+        def __init__(self, buffer, pos, strings=None):
+            self.buffer = buffer
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
             self.header = self.Header(buffer, pos)
             self.data = buffer[self.header.data_offset:self.header.data_offset + self.header.data_length]
             self.mipmaps = []
             for i in self.header.mipmaps_offsets:
                 self.mipmaps.append(buffer[i:i + self.header.mipmaps_data_length])
 
-        class Header():
+        def get_name(self):
+            return self.strings[self.header.file_name_offset]
+
+        def get_level_range(self, level=0):
+            # (start, end) of the tiled data of a mip level. Level 1 starts the
+            # mipmap data, the following ones are found through mipmaps_offsets
+            if not level:
+                return self.header.data_offset, self.header.data_offset + self.header.data_length
+            start = self.header.mipmap_data_offset if level == 1 else self.header.mipmaps_offsets[level - 1]
+            if level + 1 < self.header.mipmap_count:
+                end = self.header.mipmaps_offsets[level]
+            else:
+                end = self.header.mipmap_data_offset + self.header.mipmaps_data_length
+            return start, end
+
+        def get_level_data(self, level=0):
+            # Tiled data of a mip level
+            if not level:
+                return self.data
+            start, end = self.get_level_range(level)
+            return self.buffer[start:end]
+
+        def set_level_data(self, data, level=0):
+            # Overwrite the tiled data of a mip level in place, with data of
+            # the same size. The buffer has to be writable
+            start, end = self.get_level_range(level)
+            if len(data) != end - start:
+                raise ValueError(f"Level {level} data is {end - start} bytes, got {len(data)}")
+            memoryview(self.buffer)[start:end] = data
+
+        def deswizzle(self, level=0, slice_=0):
+            # Linear (height, width, bytes per element) array of a mip level,
+            # in 4x4 blocks for block compressed formats
+            from addrlib import deswizzle, get_surface_info
+
+            tile_mode, pitch, height, size = get_surface_info(self.header.width, self.header.height, self.header.format, self.header.tile_mode, level)
+            return deswizzle(
+                self.get_level_data(level),
+                max(1, self.header.width >> level),
+                max(1, self.header.height >> level),
+                self.header.format,
+                tile_mode,
+                self.header.swizzle_value,
+                pitch if level else self.header.pitch,
+                height,
+                slice_
+                )
+
+        def decode(self, levels=None, slices=None):
+            # RGBA (height, width, 4) arrays of a block compressed texture,
+            # indexed by [level][slice]. Every mip level and array slice is
+            # decoded in a single batch
+            from addrlib import get_bcn_format
+            from bcn import decode_images
+
+            if levels is None:
+                levels = range(max(1, self.header.mipmap_count))
+            if slices is None:
+                slices = range(self.header.first_slice, self.header.first_slice + max(1, self.header.slice_count))
+
+            images, sizes = [], []
+            for level in levels:
+                for slice_ in slices:
+                    images.append(self.deswizzle(level, slice_))
+                    sizes.append((max(1, self.header.width >> level), max(1, self.header.height >> level)))
+            decoded = decode_images(images, *get_bcn_format(self.header.format), sizes)
+            return [decoded[i:i + len(slices)] for i in range(0, len(decoded), len(slices))]
+
+        class Header(Record, layout="FTEXHeader"):
             def __init__(self, buffer, pos):
-                get_unpacked_data(self, "FTEXHeader", buffer, pos)
+                super().__init__(buffer, pos)
                 for i in range(len(self.mipmaps_offsets)):
                     self.mipmaps_offsets[i] += self.mipmap_data_offset
 
+            def pack_into(self, buffer, pos, patch=False):
+                # Mipmap offsets are stored relative to the mipmap data
+                offsets = self.mipmaps_offsets
+                self.mipmaps_offsets = [offset - self.mipmap_data_offset for offset in offsets]
+                try:
+                    return super().pack_into(buffer, pos, patch)
+                finally:
+                    self.mipmaps_offsets = offsets
+
     class FSKA(): #2
         # caFe SKeletal Animation
-        def __init__(self, buffer, pos):
+        def __init__(self, buffer, pos, strings=None):
+            self.buffer = buffer
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
             self.header: self.Header = self.Header(buffer, pos)
             self.bone_animations: List[BoneAnimation] = []
             self.skeleton_offset: int = self.header.skeleton_offset
@@ -242,20 +617,68 @@ class FRES():
             self.baked_curves = bool(self.header.flags & 0b1)
             self.is_looping = bool(self.header.flags & 0b100)
             self.scale_type = (self.header.flags & 0b1100000000) >> 8
+            # Euler XYZ angles when set, quaternions otherwise
             self.rotation_module = bool(self.header.flags & 0b1000000000000)
 
-        class Header():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "FSKAHeader", buffer, pos)
+        def get_name(self):
+            return self.strings[self.header.file_name_offset]
+
+        def get_bone_names(self):
+            # Name of the bone each bone animation targets
+            return [self.strings[bone_animation.bone_name_offset] for bone_animation in self.bone_animations]
+
+        def evaluate(self, times=None, base_values=None):
+            # (bone animations, times, 10) array of the [scale xyz, translate xyz,
+            # rotate xyzw] values of every bone animation, at every frame by
+            # default. Every curve of the animation is evaluated in one batch.
+            # base_values replace what the bone animations don't store
+            from curves import evaluate_bones
+
+            if times is None:
+                times = range(self.header.frame_count)
+            if base_values is None:
+                base_values = [None] * len(self.bone_animations)
+            return evaluate_bones(
+                [bone_animation.data.get_values(values) for bone_animation, values in zip(self.bone_animations, base_values)],
+                [
+                    [(curve.header.anim_data_offset, curve.get_frames(), curve.get_keys(), curve.header.curve_data_flag) for curve in bone_animation.curves]
+                    for bone_animation in self.bone_animations
+                ],
+                times
+                )
+
+        def sample(self, skeleton, times=None):
+            # Local and world (frames, bones, 4, 4) matrices of every bone of
+            # skeleton (the FSKL of the animated model) at every frame. Bones
+            # without a bone animation keep their bind pose
+            from poses import sample
+
+            bind_values = skeleton.get_values()
+            base_values = [bind_values[i] if i < len(bind_values) else None for i in self.bind_index_data]
+            return sample(
+                bind_values,
+                skeleton.get_parents(),
+                skeleton.is_euler,
+                self.evaluate(times, base_values),
+                self.bind_index_data,
+                [bone_animation.is_rotated() for bone_animation in self.bone_animations],
+                self.rotation_module,
+                self.scale_type
+                )
+
+        class Header(Record, layout="FSKAHeader"):
+            ...
         
         class BindIndex(struct.Struct):
             def __init__(self, buffer, count, pos):
                 super().__init__(f">{count}H")
                 self.data = self.unpack_from(buffer, pos)
         
-        class BoneAnimation():
+        class BoneAnimation(Record, layout="BoneAnimation"):
+            __slots__ = ("curves", "which_data", "available_curves", "bone_transform_effect", "data")
+
             def __init__(self, buffer, pos):
-                get_unpacked_data(self, "BoneAnimation", buffer, pos)
+                super().__init__(buffer, pos)
                 self.curves = []
                 # xxxxSSSS Sxxxxxxx CCCCCCCC CCBBBxxx
                 self.which_data: int = (self.flags >> 3) & 0b111
@@ -263,79 +686,92 @@ class FRES():
                 self.bone_transform_effect: int = (self.flags >> 23) & 0b111111
 
                 self.data: self.BoneAnimationData = self.BoneAnimationData(buffer, self.which_data, self.base_data_offset)
-                
+
                 for i in range(self.curve_count):
-                    # TODO: Actually append the curves to the BoneAnimation
-                    self.curves.append(self.Curve(buffer, self.curve_array_offset + i * 0x24))
+                    self.curves.append(self.Curve(buffer, self.curves_offset + i * 0x24))
+
+            def is_rotated(self):
+                # Whether the animation has its own rotation, base or curves
+                return bool(self.which_data & 0b010) or any(0x20 <= curve.header.anim_data_offset < 0x30 for curve in self.curves)
+
             class BoneAnimationData():
                 def __init__(self, buffer, which_data, pos):
+                    # Scaling, translation then rotation, each one only stored if which_data says so
                     self.scaling: Tuple[float, float, float] = struct.unpack_from(">3f", buffer, pos) if which_data & 0b001 else (None)
-                    self.rotation: Tuple[float, float, float, float] = struct.unpack_from(">4f", buffer, pos + 12 if self.scaling else pos) if which_data & 0b010 else (None)
-                    self.translation: Tuple[float, float, float] = struct.unpack_from(">3f", buffer, pos + 24 if self.scaling and self.rotation else pos) if which_data & 0b100 else (None)
+                    pos += 12 if self.scaling else 0
+                    self.translation: Tuple[float, float, float] = struct.unpack_from(">3f", buffer, pos) if which_data & 0b100 else (None)
+                    pos += 12 if self.translation else 0
+                    self.rotation: Tuple[float, float, float, float] = struct.unpack_from(">4f", buffer, pos) if which_data & 0b010 else (None)
+
+                def get_values(self, defaults=None):
+                    # [scale xyz, translate xyz, rotate xyzw], defaults (or identity) for what isn't stored
+                    if defaults is None:
+                        defaults = (1.0, 1.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+                    return [*(self.scaling or defaults[0:3]), *(self.translation or defaults[3:6]), *(self.rotation or defaults[6:10])]
 
             class Curve():
                 def __init__(self, buffer, pos):
+                    self.buffer = buffer
                     self.header = self.Header(buffer, pos)
 
-                class Header():
+                def get_frames(self):
+                    from curves import get_frames
+                    return get_frames(self.buffer, self.header.frames_offset, self.header.key_count, self.header.frame_data_flag)
+
+                def get_keys(self):
+                    # (key_count, values per key) array, scale and offset already applied
+                    from curves import get_keys
+                    return get_keys(
+                        self.buffer,
+                        self.header.keys_offset,
+                        self.header.key_count,
+                        self.header.key_data_flag,
+                        self.header.curve_data_flag,
+                        self.header.scale,
+                        self.header.offset
+                        )
+
+                def evaluate(self, times):
+                    from curves import evaluate_curves
+                    return evaluate_curves([(self.get_frames(), self.get_keys(), self.header.curve_data_flag)], times)[0]
+
+                class Header(Record, layout="CurveHeader"):
+                    __slots__ = ("frame_data_flag", "key_data_flag", "curve_data_flag")
+
                     def __init__(self, buffer, pos):
-                        get_unpacked_data(self, "CurveHeader", buffer, pos)
+                        super().__init__(buffer, pos)
                         # xxxxxxxx xCCCKKFF
                         self.frame_data_flag: int = self.flags & 0b11
                         self.key_data_flag: int = (self.flags >> 2) & 0b11
                         self.curve_data_flag: int = (self.flags >> 4) & 0b111
 
-                class Frames():
-                    def __init__(self, buffer, data_flag, count, pos):
-                        if data_flag == 0b00:
-                            self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-                        elif data_flag == 0b01:
-                            self.data: float = float(buffer[pos:pos + 2]) / (1 << 5)
-                        else:
-                            self.data: int = struct.unpack_from(fmt=f">{count}B", buffer=buffer, offset=pos)
-
-                class Keys():
-                    def __init__(self, buffer, data_flag, count, pos):
-                        if data_flag == 0b00:
-                            self.data: float = struct.unpack_from(fmt=f">{count}f", buffer=buffer, offset=pos)
-                        elif data_flag == 0b01:
-                            self.data: int = struct.unpack_from(fmt=f'>{count}h', buffer=buffer, offset=pos)
-                        else:
-                            self.data: int = struct.unpack_from(fmt=f'>{count}b', buffer=buffer, offset=pos)
-
-                class StepCurves():
-                    # TODO
-                    ...
-
-                class LinearCurves():
-                    # TODO
-                    ...
-
     class FSHU(): #3
         # caFe SHader parameter animation Uber
-        def __init__(self, buffer, pos):
+        def __init__(self, buffer, pos, strings=None):
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
             self.header = self.Header(buffer, pos)
 
-        class Header():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "FSHUHeader", buffer, pos)
+        def get_name(self):
+            return self.strings[self.header.file_name_offset]
 
-        class MaterialAnimation():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "MaterialAnimation", buffer, pos)
+        class Header(Record, layout="FSHUHeader"):
+            ...
 
-        class ParameterAnimationInfo():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "ParameterAnimationInfo", buffer, pos)
+        class MaterialAnimation(Record, layout="MaterialAnimation"):
+            ...
+
+        class ParameterAnimationInfo(Record, layout="ParameterAnimationInfo"):
+            ...
         
-        class AnimationConstant():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "AnimationConstant", buffer, pos)
+        class AnimationConstant(Record, layout="AnimationConstant"):
+            ...
 
         class Curve():
-            class Header():
+            class Header(Record, layout="CurveHeader"):
+                __slots__ = ("frame_data_flag", "key_data_flag", "curve_data_flag")
+
                 def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "CurveHeader", buffer, pos)
+                    super().__init__(buffer, pos)
                     # xxxxxxxx xCCCKKFF
                     self.frame_data_flag: int = self.flags & 0b11
                     self.key_data_flag: int = (self.flags >> 2) & 0b11
@@ -375,25 +811,28 @@ class FRES():
 
     class FTXP(): # 6
         # caFe TeXture Pattern animation
-        def __init__(self, buffer, pos):
+        def __init__(self, buffer, pos, strings=None):
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
             self.header = self.Header(buffer, pos)
 
-        class Header():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "FTXPHeader", buffer, pos)
+        def get_name(self):
+            return self.strings[self.header.file_name_offset]
 
-        class MaterialPatternAnimation():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "MaterialPatternAnimation", buffer, pos)
+        class Header(Record, layout="FTXPHeader"):
+            ...
 
-        class PatternAnimationInfo():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "PatternAnimationInfo", buffer, pos)
+        class MaterialPatternAnimation(Record, layout="MaterialPatternAnimation"):
+            ...
+
+        class PatternAnimationInfo(Record, layout="PatternAnimationInfo"):
+            ...
 
         class Curve():
-            class Header():
+            class Header(Record, layout="CurveHeader"):
+                __slots__ = ("frame_data_flag", "key_data_flag", "curve_data_flag")
+
                 def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "CurveHeader", buffer, pos)
+                    super().__init__(buffer, pos)
                     # xxxxxxxx xCCCKKFF
                     self.frame_data_flag: int = self.flags & 0b11
                     self.key_data_flag: int = (self.flags >> 2) & 0b11
@@ -427,17 +866,22 @@ class FRES():
 
     class FVIS(): # 7
         # caFe VISibility animation
-        def __init__(self, buffer, pos):
-            self.header = Header(buffer, pos)
+        def __init__(self, buffer, pos, strings=None):
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header = self.Header(buffer, pos)
 
-        class Header():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "FVISHeader", buffer, pos)
+        def get_name(self):
+            return self.strings[self.header.file_name_offset]
+
+        class Header(Record, layout="FVISHeader"):
+            ...
 
         class Curve():
-            class Header():
+            class Header(Record, layout="CurveHeader"):
+                __slots__ = ("frame_data_flag", "key_data_flag", "curve_data_flag")
+
                 def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "CurveHeader", buffer, pos)
+                    super().__init__(buffer, pos)
                     # xxxxxxxx xCCCKKFF
                     self.frame_data_flag: int = self.flags & 0b11
                     self.key_data_flag: int = (self.flags >> 2) & 0b11
@@ -474,24 +918,27 @@ class FRES():
 
     class FSHA(): # 9
         # caFe SHape Animation
-        def __init__(self, buffer, pos):
-            self.header = Header(buffer, pos)
+        def __init__(self, buffer, pos, strings=None):
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header = self.Header(buffer, pos)
 
-        class Header():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "FSHAHeader", buffer, pos)
-        class VertexShapeAnimation():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "VertexShapeAnimation", buffer, pos)
+        def get_name(self):
+            return self.strings[self.header.file_name_offset]
 
-            class ShapeAnimationKey():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "ShapeAnimationKey", buffer, pos)
+        class Header(Record, layout="FSHAHeader"):
+            ...
+        class VertexShapeAnimation(Record, layout="VertexShapeAnimation"):
+            ...
+
+            class ShapeAnimationKey(Record, layout="ShapeAnimationKey"):
+                ...
                     
         class Curve():
-            class Header():
+            class Header(Record, layout="CurveHeader"):
+                __slots__ = ("frame_data_flag", "key_data_flag", "curve_data_flag")
+
                 def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "CurveHeader", buffer, pos)
+                    super().__init__(buffer, pos)
                     # xxxxxxxx xCCCKKFF
                     self.frame_data_flag: int = self.flags & 0b11
                     self.key_data_flag: int = (self.flags >> 2) & 0b11
@@ -525,44 +972,43 @@ class FRES():
 
     class FSCN(): # 10
         # caFe SCeNe animation
-        def __init__(self, buffer, pos):
-            self.header = Header(buffer, pos)
+        def __init__(self, buffer, pos, strings=None):
+            self.strings: StringTable = strings if strings is not None else StringTable(buffer)
+            self.header = self.Header(buffer, pos)
 
-        class Header():
-            def __init__(self, buffer, pos):
-                get_unpacked_data(self, "FSCNHeader", buffer, pos)
+        def get_name(self):
+            return self.strings[self.header.file_name_offset]
+
+        class Header(Record, layout="FSCNHeader"):
+            ...
 
         class FCAM():
-            class Header():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FCAMHeader", buffer, pos)
+            class Header(Record, layout="FCAMHeader"):
+                ...
 
-            class Data():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "CameraAnimationData", buffer, pos)
+            class Data(Record, layout="CameraAnimationData"):
+                ...
 
         class FLIT():
-            class Header():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FLITHeader", buffer, pos)
+            class Header(Record, layout="FLITHeader"):
+                ...
 
-            class Data():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "LightAnimationData", buffer, pos)    
+            class Data(Record, layout="LightAnimationData"):
+                ...
                     
         class FFOG():
-            class Header():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FFOGHeader", buffer, pos)
+            class Header(Record, layout="FFOGHeader"):
+                ...
 
-            class Data():
-                def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "FogAnimationData", buffer, pos)
+            class Data(Record, layout="FogAnimationData"):
+                ...
 
         class Curve():
-            class Header():
+            class Header(Record, layout="CurveHeader"):
+                __slots__ = ("frame_data_flag", "key_data_flag", "curve_data_flag")
+
                 def __init__(self, buffer, pos):
-                    get_unpacked_data(self, "CurveHeader", buffer, pos)
+                    super().__init__(buffer, pos)
                     # xxxxxxxx xCCCKKFF
                     self.frame_data_flag: int = self.flags & 0b11
                     self.key_data_flag: int = (self.flags >> 2) & 0b11
@@ -594,30 +1040,28 @@ class FRES():
                 # TODO
                 ...
 
-    class EmbeddedFiles(): # 11
-        def __init__(self, buffer, pos):
-            get_unpacked_data(self, "EmbeddedFiles", buffer, pos)
-
-def to_absolute(unpacked_data: tuple, pos: int, fmt: str):
-    # Convert every relative offset to absolute
-    unpacked_data_list = list(unpacked_data)
-    if len(unpacked_data) > 2:
-        for i in range(len(unpacked_data)):
-            unpacked_data_list[i] += pos + i * (struct.calcsize(fmt) // len(unpacked_data)) if unpacked_data_list[i] else 0
-        return unpacked_data_list
-    else:
-        unpacked_data_list[0] += pos
-        return unpacked_data_list[0]
-
-def get_unpacked_data(self, name: str, buffer: bytes, pos: int):
-    for name, fmt in structs_fmts[name].items():
-        # Unpack the header structs to make them accesible from within the class
-        unpacked_data = struct.unpack(fmt, buffer[pos:pos + struct.calcsize(fmt)])
-        if "offset" in name:
-            if name == "mipmaps_offsets":
-                exec("self.{} = {}".format(name, list(unpacked_data)))
-            else:
-                exec("self.{} = {}".format(name, to_absolute(unpacked_data, pos, fmt)))
-        else:
-            exec("self.{} = {}".format(name, unpacked_data[0]))
-        pos += struct.calcsize(fmt)
+    class EmbeddedFiles(Record, layout="EmbeddedFiles"): # 11
+        def __init__(self, buffer, pos, strings=None):
+            # Embedded files are only named by their index group
+            super().__init__(buffer, pos)
+
+def get_param_format(type_: int, length: int):
+    # Struct format of a material parameter value of length bytes. Ints,
+    # uints and floats (vectors and matrices too) are read as 4 bytes
+    # elements, texture SRTs as their uint mode then floats, and bools (and
+    # unknown types) as raw bytes
+    count = length // 4
+    if 4 <= type_ < 8:
+        return f">{count}i"
+    if 8 <= type_ < 12:
+        return f">{count}I"
+    if 12 <= type_ < 27:
+        return f">{count}f"
+    if type_ in (27, 28) and count:
+        return f">I{count - 1}f"
+    return f">{length}s"
+
+def get_string(buffer: bytes, pos: int):
+    # Names point right after their 4 bytes length
+    length = struct.unpack_from(">I", buffer, pos - 4)[0]
+    return bytes(buffer[pos:pos + length]).decode()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+# Curve types (curve_data_flag)
+CUBIC = 0
+LINEAR = 1
+BAKED_FLOAT = 2
+STEP_INT = 4
+BAKED_INT = 5
+STEP_BOOL = 6
+BAKED_BOOL = 7
+
+# frame_data_flag: float, 10.5 fixed point, byte
+frame_types = {0: ">f4", 1: ">i2", 2: ">u1"}
+# key_data_flag: float, short, signed byte
+key_types = {0: ">f4", 1: ">i2", 2: ">i1"}
+
+# Values stored per key, cubic curves have the 4 coefficients of each segment
+key_sizes = {CUBIC: 4, LINEAR: 2}
+
+# anim_data_offset of a bone animation curve to its column in the
+# [scale xyz, translate xyz, rotate xyzw] values of a bone
+bone_targets = {
+    0x04: 0, 0x08: 1, 0x0C: 2,
+    0x10: 3, 0x14: 4, 0x18: 5,
+    0x20: 6, 0x24: 7, 0x28: 8, 0x2C: 9,
+}
+
+def get_frames(buffer, pos: int, count: int, frame_type: int):
+    frames = np.frombuffer(buffer, frame_types[frame_type], count, pos).astype(np.float32)
+    if frame_type == 1:
+        frames /= 32
+    return frames
+
+def get_frames_size(count: int, frame_type: int):
+    return count * np.dtype(frame_types[frame_type]).itemsize
+
+def get_keys_size(count: int, key_type: int, curve_type: int):
+    if curve_type in (STEP_BOOL, BAKED_BOOL):
+        return (count + 31) // 32 * 4
+    return count * key_sizes.get(curve_type, 1) * np.dtype(key_types[key_type]).itemsize
+
+def get_keys(buffer, pos: int, count: int, key_type: int, curve_type: int, scale: float = 1.0, offset: float = 0.0):
+    # (count, values per key) float array of the keys, with scale and offset
+    # applied (the offset only to the constant term of each segment)
+    if curve_type in (STEP_BOOL, BAKED_BOOL):
+        # One bit per key
+        words = np.frombuffer(buffer, ">u4", (count + 31) // 32, pos)
+        bits = (words[np.arange(count) // 32] >> (np.arange(count, dtype=np.uint32) % 32)) & 1
+        return bits.astype(np.float32).reshape(count, 1)
+
+    size = key_sizes.get(curve_type, 1)
+    keys = np.frombuffer(buffer, key_types[key_type], count * size, pos).astype(np.float32).reshape(count, size)
+    keys *= scale
+    keys[:, 0] += offset
+    return keys
+
+def evaluate_curves(curves, times):
+    # Evaluate (frames, keys, curve_type) curves at every time at once, as a
+    # (curves, times) float array. Frames of every curve are shifted one
+    # after the other into a single sorted array, so a single searchsorted
+    # finds the segment of every curve at every time. Curves without keys
+    # evaluate to 0
+    times = np.asarray(times, np.float64)
+    values = np.zeros((len(curves), len(times)), np.float32)
+
+    keyed = [i for i, curve in enumerate(curves) if len(curve[0])]
+    interpolated = [i for i in keyed if curves[i][2] in (CUBIC, LINEAR)]
+    stepped = [i for i in keyed if curves[i][2] not in (CUBIC, LINEAR)]
+    for indices, interpolate in ((interpolated, True), (stepped, False)):
+        if not indices:
+            continue
+        frames = [np.asarray(curves[i][0], np.float64) for i in indices]
+        lengths = np.array([len(curve_frames) for curve_frames in frames])
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        firsts = np.array([curve_frames[0] for curve_frames in frames])
+        lasts = np.array([curve_frames[-1] for curve_frames in frames])
+
+        span = (lasts - firsts).max() + 1
+        shifts = np.arange(len(indices)) * span - firsts
+        flat = np.concatenate([curve_frames + shift for curve_frames, shift in zip(frames, shifts)])
+        shifted = np.clip(times, firsts[:, None], lasts[:, None]) + shifts[:, None]
+
+        segments = np.searchsorted(flat, shifted, side="right") - 1
+        last_segments = starts + np.maximum(lengths - (2 if interpolate else 1), 0)
+        segments = np.clip(segments, starts[:, None], last_segments[:, None])
+
+        if not interpolate:
+            keys = np.concatenate([curves[i][1][:, 0] for i in indices])
+            values[indices] = keys[segments]
+            continue
+
+        # Linear curves are cubic ones without their last 2 coefficients
+        keys = np.zeros((lengths.sum(), 4), np.float32)
+        for i, start, length in zip(indices, starts, lengths):
+            curve_keys = curves[i][1]
+            keys[start:start + length, :curve_keys.shape[1]] = curve_keys
+        ends = np.minimum(segments + 1, (starts + lengths - 1)[:, None])
+        widths = flat[ends] - flat[segments]
+        t = np.divide(shifted - flat[segments], widths, out=np.zeros_like(widths), where=widths > 0)
+        coefficients = keys[segments]
+        values[indices] = coefficients[..., 0] + t * (coefficients[..., 1] + t * (coefficients[..., 2] + t * coefficients[..., 3]))
+
+    return values
+
+def evaluate_bones(base_values, bone_curves, times):
+    # (bones, times, 10) values of bone animations: their base values,
+    # replaced by their curves (anim_data_offset, frames, keys, curve_type)
+    # wherever they're animated. Curves without keys leave the base values
+    values = np.repeat(np.asarray(base_values, np.float32).reshape(-1, 1, 10), len(times), axis=1)
+
+    curves, bones, columns = [], [], []
+    for bone, bone_curve_list in enumerate(bone_curves):
+        for target, frames, keys, curve_type in bone_curve_list:
+            if target in bone_targets and len(frames):
+                curves.append((frames, keys, curve_type))
+                bones.append(bone)
+                columns.append(bone_targets[target])
+    if curves:
+        values[bones, :, columns] = evaluate_curves(curves, times)
+    return values
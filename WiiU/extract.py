@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import struct
+import traceback
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from classes import FRES
+
+# Files are grouped into chunks of about this many bytes, so that a worker
+# doesn't go back to the pool for every small file
+CHUNK_SIZE = 64 * 1024 * 1024
+
+def find_files(root: str, extension=(".bfres", ".sbfres")):
+    paths = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.lower().endswith(extension):
+                paths.append(os.path.join(directory, name))
+    return paths
+
+def make_chunks(paths: List[str], chunk_size: int = CHUNK_SIZE):
+    # The biggest files come first, each one in a chunk of its own if it
+    # is bigger than chunk_size, so large packs never end up at the tail of
+    # the queue while every other worker sits idle
+    sizes = {path: os.path.getsize(path) for path in paths}
+    chunks = []
+    chunk, total = [], 0
+    for path in sorted(paths, key=sizes.get, reverse=True):
+        if chunk and total + sizes[path] > chunk_size:
+            chunks.append(chunk)
+            chunk, total = [], 0
+        chunk.append(path)
+        total += sizes[path]
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def write_png(path: str, image):
+    # (height, width, 4) uint8 RGBA array to a PNG, without any row filtering
+    height, width = image.shape[:2]
+    rows = bytearray()
+    for row in image.reshape(height, width * 4):
+        rows += b"\x00" + row.tobytes()
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">2I5B", width, height, 8, 6, 0, 0, 0)))
+        file.write(chunk(b"IDAT", zlib.compress(bytes(rows))))
+        file.write(chunk(b"IEND", b""))
+
+def write_obj(path: str, model):
+    # Every shape of a model, using its first LoD, as a Wavefront OBJ.
+    # Positions, UVs and normals are each numbered from the start of the
+    # file, and not every shape has UVs or normals
+    lines = []
+    v_base = vt_base = vn_base = 1
+    for i, shape in enumerate(model.shapes):
+        vertices = model.vertices[shape.header.fvtx_index]
+        names = vertices.attribute_names()
+        positions = vertices.get_attribute("_p0")
+        lines.append(f"o shape{i}")
+        lines.extend("v {:f} {:f} {:f}".format(*p[:3]) for p in positions)
+        bases, corner = [v_base], "{}"
+        if "_u0" in names:
+            uvs = vertices.get_attribute("_u0")
+            lines.extend("vt {:f} {:f}".format(u[0], 1 - u[1]) for u in uvs)
+            bases.append(vt_base)
+            corner += "/{}"
+            vt_base += len(uvs)
+        if "_n0" in names:
+            normals = vertices.get_attribute("_n0")
+            lines.extend("vn {:f} {:f} {:f}".format(*n[:3]) for n in normals)
+            bases.append(vn_base)
+            corner += "/{}" if "_u0" in names else "//{}"
+            vn_base += len(normals)
+
+        if shape.lod_mdls:
+            lod_mdl = shape.lod_mdls[0]
+            triangles = lod_mdl.get_triangles() + lod_mdl.vertex_skip_count
+            face = "f " + " ".join([corner] * 3)
+            lines.extend(face.format(*(index + base for index in t for base in bases)) for t in triangles.tolist())
+        v_base += len(positions)
+
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+def write_animation(path: str, animation):
+    # Animation properties, and the [scale xyz, translate xyz, rotate xyzw]
+    # values of every animated bone at every frame
+    values = animation.evaluate()
+    info = {
+        "frame_count": animation.header.frame_count,
+        "is_looping": animation.is_looping,
+        "baked_curves": animation.baked_curves,
+        "bone_animation_count": animation.header.bone_animation_count,
+        "curve_count": animation.header.curve_count,
+        "bones": {
+            name: values[i].round(6).tolist()
+            for i, name in enumerate(animation.get_bone_names())
+            },
+        }
+    with open(path, "w") as file:
+        json.dump(info, file, indent=4)
+
+def extract_file(path: str, output: str, cache=None):
+    # Extract a single file into its own output directory. Errors on one
+    # subfile are recorded and don't stop the others from being extracted
+    report = {"path": path, "models": 0, "textures": 0, "animations": 0, "errors": []}
+    hits = cache.hits if cache is not None else 0
+    fres = FRES.open(path, lazy=True, cache=cache)
+    report["cached"] = cache is not None and cache.hits > hits
+
+    kinds = (
+        ("fmdl_files", "models", "obj", write_obj),
+        ("ftex_files", "textures", "png", None),
+        ("fska_files", "animations", "json", write_animation),
+        )
+    for attribute, kind, extension, write in kinds:
+        subfiles = getattr(fres, attribute, None)
+        if not subfiles:
+            continue
+        directory = os.path.join(output, kind)
+        os.makedirs(directory, exist_ok=True)
+        for name, index in subfiles.names().items():
+            try:
+                subfile = subfiles[index]
+                if write is None:
+                    slices = subfile.decode(levels=[0])[0]
+                    for i, image in enumerate(slices):
+                        suffix = f"_{i}" if len(slices) > 1 else ""
+                        write_png(os.path.join(directory, f"{name}{suffix}.{extension}"), image)
+                else:
+                    write(os.path.join(directory, f"{name}.{extension}"), subfile)
+                report[kind] += 1
+            except Exception:
+                report["errors"].append(f"{kind[:-1]} {name}: {traceback.format_exc()}")
+    return report
+
+def extract_chunk(paths: List[str], root: str, output: str, cache_dir: str = None):
+    # Each worker opens the cache directory itself, snapshots are only ever
+    # replaced whole so workers can share it
+    cache = None
+    if cache_dir:
+        from cache import DecompressionCache
+        cache = DecompressionCache(cache_dir)
+    reports = []
+    for path in paths:
+        directory = os.path.join(output, os.path.splitext(os.path.relpath(path, root))[0])
+        try:
+            reports.append(extract_file(path, directory, cache))
+        except Exception:
+            reports.append({"path": path, "errors": [traceback.format_exc()]})
+    return reports
+
+def extract(root: str, output: str, workers: int = None, chunk_size: int = CHUNK_SIZE, report_path: str = None, cache_dir: str = None):
+    # Extract every .bfres/.sbfres file found under root into the same tree
+    # under output, across a pool of worker processes. Returns one report
+    # per file. With a cache directory, Yaz0 files unchanged since a previous
+    # run are mapped from their decompressed snapshot instead of being
+    # decompressed again
+    paths = find_files(root) if os.path.isdir(root) else [root]
+    root = root if os.path.isdir(root) else os.path.dirname(root)
+    reports: List[Dict] = []
+    if cache_dir:
+        # Snapshots left by other versions of the Yaz0 decoder are never read again
+        from cache import DecompressionCache
+        DecompressionCache(cache_dir).prune()
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(extract_chunk, chunk, root, output, cache_dir) for chunk in make_chunks(paths, chunk_size)]
+        for future in as_completed(futures):
+            reports.extend(future.result())
+
+    reports.sort(key=lambda report: report["path"])
+    if report_path:
+        with open(report_path, "w") as file:
+            json.dump(reports, file, indent=4)
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract models, textures and animations from every .bfres/.sbfres file in a directory tree")
+    parser.add_argument("input", help="a .bfres/.sbfres file or a directory to search")
+    parser.add_argument("output", help="directory to extract to")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE // (1024 * 1024), help="MB of files handed to a worker at once")
+    parser.add_argument("--report", default=None, help="where to write the error report (default: OUTPUT/report.json)")
+    parser.add_argument("--cache", default=None, help="directory of decompressed file snapshots, reused by later runs")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    report_path = args.report or os.path.join(args.output, "report.json")
+    reports = extract(args.input, args.output, args.workers, args.chunk_size * 1024 * 1024, report_path, args.cache)
+
+    failed = [report for report in reports if report["errors"]]
+    print(f"Extracted {len(reports)} files, {len(failed)} with errors (see {report_path})")
+    if args.cache:
+        cached = sum(1 for report in reports if report.get("cached"))
+        print(f"  {cached} decompressed from the cache")
+    for report in failed:
+        print(f"  {report['path']}: {len(report['errors'])} error(s)")
+
+if __name__ == "__main__":
+    main()
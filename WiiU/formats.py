@@ -285,7 +285,7 @@ structs_fmts = {
 
     "BoneAnimation": {
         "flags":                     ">I",      # 0x00 - uInt 
-        "bone_name":                 ">I",      # 0x04 - uInt
+        "bone_name_offset":          ">i",      # 0x04 - int
         "start_rotation":            ">B",      # 0x08 - byte
         "start_translation":         ">B",      # 0x09 - byte
         "curve_count":               ">B",      # 0x0A - byte
@@ -522,8 +522,8 @@ structs_fmts = {
         "scale":                ">f",       # 0x10 - float
         "offset":               ">f",       # 0x14 - float
         "delta":                ">f",       # 0x18 - float
-        "frames":               ">i",       # 0x1C - int
-        "keys":                 ">i"        # 0x20 - int
+        "frames_offset":        ">i",       # 0x1C - int
+        "keys_offset":          ">i"        # 0x20 - int
     },
 
     "EmbeddedFiles": {
@@ -531,4 +531,126 @@ structs_fmts = {
         "length":               ">I"        # 0x04 - uInt
     }
 
-}
\ No newline at end of file
+}
+
+
+FIELD_VALUE = 0         # First unpacked value, as is
+FIELD_LIST = 1          # Every unpacked value, as a list
+FIELD_OFFSET = 2        # Relative offset converted to absolute
+FIELD_OFFSET_ARRAY = 3  # Array of relative offsets converted to absolute
+
+# Fields named like offsets which aren't relative to their own position
+raw_offsets = {
+    "FVTXAttribute":    ("buffer_offset",),             # Offset of the attribute inside a vertex
+    "VisibilityGroup":  ("index_buffer_offset",),       # Offset of the group inside the index buffer
+    "CurveHeader":      ("anim_data_offset", "offset"), # Offset of the animated value, and a float added to the keys
+    "MaterialParameter":("mat_param_data_offset", "uniform_var_offset"), # Offsets of the value in the material's parameter data and in the uniform block
+}
+
+class Layout(struct.Struct):
+    # A structs_fmts entry compiled into a single struct, so a whole record
+    # is decoded with one unpack_from call instead of one call per field
+    def __init__(self, fields: dict, raw: tuple = ()):
+        self.fields = []
+        fmts = []
+        index = offset = 0
+        for name, fmt in fields.items():
+            fmt = fmt.lstrip("<>!=@")
+            size = struct.calcsize(">" + fmt)
+            count = len(struct.unpack(">" + fmt, bytes(size)))
+            # Decide once how the field is turned into an attribute. Arrays
+            # (counts, colors, vectors) are kept whole instead of only their
+            # first value
+            if "offset" not in name or name in raw:
+                kind = FIELD_VALUE if count == 1 else FIELD_LIST
+            elif name == "mipmaps_offsets":
+                kind = FIELD_LIST
+            elif count > 2:
+                kind = FIELD_OFFSET_ARRAY
+            else:
+                kind = FIELD_OFFSET
+            self.fields.append((name, kind, index, count, offset, size // count))
+            fmts.append(fmt)
+            index += count
+            offset += size
+
+        self.names = tuple(field[0] for field in self.fields)
+        self.fmts = tuple(fmts)
+        # One struct per field, to write fields on their own
+        self.structs = tuple(struct.Struct(">" + fmt) for fmt in fmts)
+        super().__init__(">" + " ".join(fmts))
+
+    def unpack_into(self, obj, buffer, pos: int):
+        # Unpack the whole struct at once and store each field as an attribute of obj
+        unpacked_data = self.unpack_from(buffer, pos)
+        for name, kind, index, count, offset, size in self.fields:
+            if kind == FIELD_VALUE:
+                value = unpacked_data[index]
+            elif kind == FIELD_OFFSET:
+                value = unpacked_data[index] + pos + offset
+            elif kind == FIELD_LIST:
+                value = list(unpacked_data[index:index + count])
+            else:
+                # Convert every relative offset to absolute, leaving null ones untouched
+                value = [j + pos + offset + i * size if j else 0 for i, j in enumerate(unpacked_data[index:index + count])]
+            setattr(obj, name, value)
+
+    def pack_from(self, obj, buffer, pos: int, patch: bool = False):
+        # Pack the attributes of obj at pos, the inverse of unpack_into:
+        # absolute offsets are made relative to their field again. When
+        # patching, only the fields that differ from the buffer are written.
+        # Returns how many fields were written
+        values = []
+        for name, kind, index, count, offset, size in self.fields:
+            value = getattr(obj, name)
+            if kind == FIELD_VALUE:
+                values.append(value)
+            elif kind == FIELD_OFFSET:
+                values.append(value - pos - offset)
+            elif kind == FIELD_LIST:
+                values.extend(value)
+            else:
+                values.extend(j - pos - offset - i * size if j else 0 for i, j in enumerate(value))
+        if not patch:
+            self.pack_into(buffer, pos, *values)
+            return len(self.fields)
+
+        current = self.unpack_from(buffer, pos)
+        if tuple(values) == current:
+            return 0
+        written = 0
+        for (name, kind, index, count, offset, size), field_struct in zip(self.fields, self.structs):
+            if tuple(values[index:index + count]) != current[index:index + count]:
+                field_struct.pack_into(buffer, pos + offset, *values[index:index + count])
+                written += 1
+        return written
+
+# Every structs_fmts entry, compiled once at import time
+layouts = {name: Layout(fields, raw_offsets.get(name, ())) for name, fields in structs_fmts.items()}
+
+class RecordMeta(type):
+    # Gives every record class one slot per field of its layout, plus
+    # whichever extra slots the class declares itself
+    def __new__(mcs, name, bases, namespace, layout=None):
+        slots = tuple(namespace.get("__slots__", ()))
+        if layout is not None:
+            namespace["_layout"] = layouts[layout]
+            slots = layouts[layout].names + slots
+        namespace["__slots__"] = slots
+        return super().__new__(mcs, name, bases, namespace)
+
+class Record(metaclass=RecordMeta):
+    # A struct read from the file, with its fields stored as plain attributes
+    def __init__(self, buffer, pos):
+        self._layout.unpack_into(self, buffer, pos)
+
+    def pack_into(self, buffer, pos, patch=False):
+        # Write the record back at pos, or only its changed fields
+        return self._layout.pack_from(self, buffer, pos, patch)
+
+    @classmethod
+    def unpack_array(cls, buffer, pos: int, count: int):
+        # count consecutive records as one NumPy structured array, with their
+        # offsets converted to absolute a whole column at a time
+        from tables import unpack_table
+        return unpack_table(cls._layout, buffer, pos, count)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+# Scale modes, the scale_type of FSKA and the scaling mode of FSKL
+SCALE_NONE = 0
+SCALE_STANDARD = 1
+SCALE_MAYA = 2
+SCALE_SOFTIMAGE = 3
+
+def euler_to_matrices(angles):
+    # (..., 3) XYZ euler angles in radians to (..., 3, 3) rotation matrices,
+    # rotating around X first, then Y, then Z
+    cx, cy, cz = np.cos(angles[..., 0]), np.cos(angles[..., 1]), np.cos(angles[..., 2])
+    sx, sy, sz = np.sin(angles[..., 0]), np.sin(angles[..., 1]), np.sin(angles[..., 2])
+    matrices = np.empty(angles.shape[:-1] + (3, 3), np.float32)
+    matrices[..., 0, 0] = cy * cz
+    matrices[..., 0, 1] = sx * sy * cz - cx * sz
+    matrices[..., 0, 2] = cx * sy * cz + sx * sz
+    matrices[..., 1, 0] = cy * sz
+    matrices[..., 1, 1] = sx * sy * sz + cx * cz
+    matrices[..., 1, 2] = cx * sy * sz - sx * cz
+    matrices[..., 2, 0] = -sy
+    matrices[..., 2, 1] = sx * cy
+    matrices[..., 2, 2] = cx * cy
+    return matrices
+
+def quaternion_to_matrices(quaternions):
+    # (..., 4) XYZW quaternions to (..., 3, 3) rotation matrices, the
+    # quaternions don't need to be normalized
+    norms = (quaternions ** 2).sum(axis=-1)
+    scale = np.divide(2, norms, out=np.zeros_like(norms), where=norms > 0)
+    x, y, z, w = np.moveaxis(quaternions, -1, 0)
+    matrices = np.empty(quaternions.shape[:-1] + (3, 3), np.float32)
+    matrices[..., 0, 0] = 1 - scale * (y * y + z * z)
+    matrices[..., 0, 1] = scale * (x * y - z * w)
+    matrices[..., 0, 2] = scale * (x * z + y * w)
+    matrices[..., 1, 0] = scale * (x * y + z * w)
+    matrices[..., 1, 1] = 1 - scale * (x * x + z * z)
+    matrices[..., 1, 2] = scale * (y * z - x * w)
+    matrices[..., 2, 0] = scale * (x * z - y * w)
+    matrices[..., 2, 1] = scale * (y * z + x * w)
+    matrices[..., 2, 2] = 1 - scale * (x * x + y * y)
+    return matrices
+
+def get_rotations(values, euler):
+    # Rotation matrices of (..., 10) [scale xyz, translate xyz, rotate xyzw]
+    # values. euler is a bool, or a (bones,) bool array when bones don't all
+    # use the same rotation mode
+    euler = np.broadcast_to(euler, values.shape[-2:-1])
+    rotations = np.empty(values.shape[:-1] + (3, 3), np.float32)
+    rotations[..., euler, :, :] = euler_to_matrices(values[..., euler, 6:9])
+    rotations[..., ~euler, :, :] = quaternion_to_matrices(values[..., ~euler, 6:10])
+    return rotations
+
+def compose(rotations, scales, translations):
+    # (..., 4, 4) matrices, scaling first, then rotating, then translating
+    matrices = np.zeros(rotations.shape[:-2] + (4, 4), np.float32)
+    matrices[..., :3, :3] = rotations * scales[..., None, :]
+    matrices[..., :3, 3] = translations
+    matrices[..., 3, 3] = 1
+    return matrices
+
+def get_levels(parents):
+    # Bones grouped by depth in the hierarchy, roots first, so that every
+    # bone of a level can be transformed at once from its parents'
+    count = len(parents)
+    depths = [None] * count
+    for bone in range(count):
+        # Walk up to the first bone of known depth, then back down
+        chain = []
+        while depths[bone] is None:
+            parent = parents[bone]
+            if parent < 0 or parent >= count or parent == bone:
+                depths[bone] = 0
+                break
+            chain.append(bone)
+            bone = parent
+        depth = depths[bone]
+        for child in reversed(chain):
+            depth += 1
+            depths[child] = depth
+
+    depths = np.array(depths)
+    return [np.flatnonzero(depths == depth) for depth in range(depths.max(initial=-1) + 1)]
+
+def get_matrices(values, parents, euler, scale_mode: int = SCALE_STANDARD):
+    # Local and world (frames, bones, 4, 4) matrices of (frames, bones, 10)
+    # values, following the hierarchy given by parents (-1 for roots)
+    parents = np.asarray(parents, np.int64)
+    rotations = get_rotations(values, euler)
+    scales = values[..., 0:3] if scale_mode != SCALE_NONE else np.ones_like(values[..., 0:3])
+    translations = values[..., 3:6]
+    local = compose(rotations, scales, translations)
+    world = np.empty_like(local)
+
+    levels = get_levels(parents)
+    if not levels:
+        return local, world
+    world[:, levels[0]] = local[:, levels[0]]
+
+    if scale_mode == SCALE_SOFTIMAGE:
+        # Scale is accumulated apart from rotation, so children never shear.
+        # Translations still move in their parent's scaled space
+        world_rotations = rotations.copy()
+        world_scales = scales.copy()
+        world_translations = translations.copy()
+        for level in levels[1:]:
+            parent = parents[level]
+            world_rotations[:, level] = world_rotations[:, parent] @ rotations[:, level]
+            world_scales[:, level] = world_scales[:, parent] * scales[:, level]
+            offsets = (world_rotations[:, parent] @ (world_scales[:, parent] * translations[:, level])[..., None])[..., 0]
+            world_translations[:, level] = world_translations[:, parent] + offsets
+            world[:, level] = compose(world_rotations[:, level], world_scales[:, level], world_translations[:, level])
+        return local, world
+
+    for level in levels[1:]:
+        parent = parents[level]
+        if scale_mode == SCALE_MAYA:
+            # Segment scale compensation: the parent's scale moves the child
+            # but doesn't scale it
+            parent_scales = scales[:, parent]
+            inverse = np.divide(1, parent_scales, out=np.zeros_like(parent_scales), where=parent_scales != 0)
+            compensated = local[:, level].copy()
+            compensated[..., :3, :3] *= inverse[..., :, None]
+            world[:, level] = world[:, parent] @ compensated
+        else:
+            world[:, level] = world[:, parent] @ local[:, level]
+    return local, world
+
+def sample(bind_values, parents, bind_euler: bool, values, bind_indices, rotated, euler: bool, scale_mode: int):
+    # Local and world (frames, bones, 4, 4) matrices of a skeleton: its bind
+    # pose (bones, 10), overridden by the (bone animations, frames, 10)
+    # values of the bone animations bound to it. Bones whose rotation
+    # isn't animated keep the rotation mode of the skeleton
+    bind_values = np.asarray(bind_values, np.float32)
+    frames = np.repeat(bind_values[None], values.shape[1], axis=0)
+    eulers = np.full(len(bind_values), bind_euler)
+
+    bind_indices = np.asarray(bind_indices, np.int64)
+    bound = bind_indices < len(bind_values)
+    frames[:, bind_indices[bound]] = values[bound].transpose(1, 0, 2)
+    eulers[bind_indices[bound & np.asarray(rotated, bool)]] = euler
+    return get_matrices(frames, parents, eulers, scale_mode)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+# GX2IndexFormat
+index_formats = {
+    0x0: "<u2",     # UInt16 little endian
+    0x1: "<u4",     # UInt32 little endian
+    0x4: ">u2",     # UInt16
+    0x9: ">u4",     # UInt32
+}
+
+# GX2PrimitiveType
+POINTS = 0x01
+LINES = 0x02
+LINE_STRIP = 0x03
+TRIANGLES = 0x04
+TRIANGLE_FAN = 0x05
+TRIANGLE_STRIP = 0x06
+QUADS = 0x13
+
+def get_indices(buffer, pos: int, count: int, format_: int):
+    # A view over the index buffer, indices aren't copied nor byte swapped
+    if format_ not in index_formats:
+        raise NotImplementedError(f"Unsupported index format {format_:#x}")
+    return np.frombuffer(buffer, index_formats[format_], count, pos)
+
+def to_triangles(indices, primitive_type: int):
+    # Convert a whole index array to a (count, 3) triangle list at once
+    indices = indices.astype(indices.dtype.newbyteorder("="))
+
+    if primitive_type == TRIANGLES:
+        return indices[:len(indices) // 3 * 3].reshape(-1, 3)
+
+    if primitive_type == QUADS:
+        quads = indices[:len(indices) // 4 * 4].reshape(-1, 4)
+        return np.stack((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]), axis=1).reshape(-1, 3)
+
+    if len(indices) < 3:
+        return np.empty((0, 3), indices.dtype)
+
+    if primitive_type == TRIANGLE_FAN:
+        triangles = np.empty((len(indices) - 2, 3), indices.dtype)
+        triangles[:, 0] = indices[0]
+        triangles[:, 1] = indices[1:-1]
+        triangles[:, 2] = indices[2:]
+        return triangles
+
+    if primitive_type == TRIANGLE_STRIP:
+        triangles = np.stack((indices[:-2], indices[1:-1], indices[2:]), axis=1)
+        # Every other triangle of a strip has its winding reversed, counting
+        # from the start of the strip, which a primitive restart index begins again
+        restart = np.iinfo(indices.dtype).max
+        positions = np.arange(len(indices))
+        starts = np.maximum.accumulate(np.where(indices == restart, positions + 1, 0))
+        odd = ((positions[:-2] - starts[:-2]) & 1).astype(bool)
+        triangles[odd, :2] = triangles[odd, 1::-1]
+        # Drop the triangles touching a primitive restart index, as well as
+        # the degenerate ones used to stitch strips together
+        keep = (triangles != restart).all(axis=1)
+        keep &= triangles[:, 0] != triangles[:, 1]
+        keep &= triangles[:, 1] != triangles[:, 2]
+        keep &= triangles[:, 0] != triangles[:, 2]
+        return triangles[keep]
+
+    raise NotImplementedError(f"Primitive type {primitive_type:#x} can't be converted to triangles")
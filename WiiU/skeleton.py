@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from formats import layouts
+from tables import get_dtypes
+
+# The Bone layout as a structured dtype, so that all the bones of a skeleton
+# are read with a single np.frombuffer call
+bone_layout = layouts["Bone"]
+bone_dtype = get_dtypes(bone_layout)[0]
+# Offsets are relative to their own field
+user_data_dict_field = bone_layout.fields[bone_layout.names.index("user_data_dict_offset")][4]
+
+# Bone layout field to its (column, component) in BoneArrays
+bone_fields = {
+    "name_offset":          ("name_offsets", None),
+    "bone_index":           ("indices", None),
+    "parent_index":         ("parents", None),
+    "smooth_matrix_index":  ("smooth_matrix_indices", None),
+    "rigid_matrix_index":   ("rigid_matrix_indices", None),
+    "billboard_index":      ("billboard_indices", None),
+    "user_data_count":      ("user_data_counts", None),
+    "flags":                ("flags", None),
+    "scale_vector_x":       ("scales", 0),
+    "scale_vector_y":       ("scales", 1),
+    "scale_vector_z":       ("scales", 2),
+    "rotation_vector_x":    ("rotations", 0),
+    "rotation_vector_y":    ("rotations", 1),
+    "rotation_vector_z":    ("rotations", 2),
+    "rotation_vector_w":    ("rotations", 3),
+    "translation_vector_x": ("translations", 0),
+    "translation_vector_y": ("translations", 1),
+    "translation_vector_z": ("translations", 2),
+    "user_data_dict_offset":("user_data_dict_offsets", None),
+}
+
+# Vector column to its layout fields, in component order. Components are
+# consecutive floats, read as one strided array
+vector_fields = {
+    column: [name for name, (field_column, component) in bone_fields.items() if field_column == column]
+    for column in ("scales", "rotations", "translations")
+}
+
+class BoneArrays():
+    # Every field of a skeleton's bones as one native array per field,
+    # offsets converted to absolute like the Bone layout does
+    def __init__(self, buffer, pos: int, count: int):
+        table = np.frombuffer(buffer, bone_dtype, count, pos)
+        positions = pos + np.arange(count, dtype=np.int64) * bone_dtype.itemsize
+
+        self.name_offsets = table["name_offset"] + positions
+        self.indices = table["bone_index"].astype(np.uint16)
+        self.parents = table["parent_index"].astype(np.uint16)
+        self.smooth_matrix_indices = table["smooth_matrix_index"].astype(np.int16)
+        self.rigid_matrix_indices = table["rigid_matrix_index"].astype(np.int16)
+        self.billboard_indices = table["billboard_index"].astype(np.int16)
+        self.user_data_counts = table["user_data_count"].astype(np.uint16)
+        self.flags = table["flags"].astype(np.uint32)
+        self.scales, self.rotations, self.translations = (
+            np.ndarray((count, len(names)), ">f4", buffer, pos + bone_dtype.fields[names[0]][1], (bone_dtype.itemsize, 4)).astype(np.float32)
+            for names in vector_fields.values()
+            )
+        self.user_data_dict_offsets = table["user_data_dict_offset"] + positions + user_data_dict_field
+
+    def __len__(self):
+        return len(self.indices)
+
+    def get(self, name: str, index: int):
+        # A single field of a single bone, as a Python value
+        column, component = bone_fields[name]
+        value = getattr(self, column)[index]
+        return (value if component is None else value[component]).item()
+
+    def set(self, name: str, index: int, value):
+        column, component = bone_fields[name]
+        if component is None:
+            getattr(self, column)[index] = value
+        else:
+            getattr(self, column)[index, component] = value
+
+    def pack_into(self, buffer, pos: int, patch: bool = False):
+        # Write every bone back at pos, offsets made relative again. When
+        # patching, only the bones that differ from the buffer are written.
+        # Returns how many bones were written
+        count = len(self)
+        if patch:
+            table = np.zeros(count, bone_dtype)
+        else:
+            table = np.frombuffer(buffer, bone_dtype, count, pos)
+        positions = pos + np.arange(count, dtype=np.int64) * bone_dtype.itemsize
+
+        table["name_offset"] = self.name_offsets - positions
+        table["bone_index"] = self.indices
+        table["parent_index"] = self.parents
+        table["smooth_matrix_index"] = self.smooth_matrix_indices
+        table["rigid_matrix_index"] = self.rigid_matrix_indices
+        table["billboard_index"] = self.billboard_indices
+        table["user_data_count"] = self.user_data_counts
+        table["flags"] = self.flags
+        for column, names in vector_fields.items():
+            for i, name in enumerate(names):
+                table[name] = getattr(self, column)[:, i]
+        table["user_data_dict_offset"] = self.user_data_dict_offsets - positions - user_data_dict_field
+        if not patch:
+            return count
+
+        # Bones are compared byte for byte
+        new = table.view(np.uint8).reshape(count, bone_dtype.itemsize)
+        old = np.frombuffer(buffer, np.uint8, count * bone_dtype.itemsize, pos).reshape(count, bone_dtype.itemsize)
+        changed = np.flatnonzero((new != old).any(axis=1))
+        for i in changed.tolist():
+            start = pos + i * bone_dtype.itemsize
+            buffer[start:start + bone_dtype.itemsize] = new[i].tobytes()
+        return len(changed)
+
+    def get_values(self):
+        # (bones, 10) [scale xyz, translate xyz, rotate xyzw] bind pose
+        return np.concatenate((self.scales, self.translations, self.rotations), axis=1)
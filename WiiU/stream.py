@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+
+import struct
+from typing import List, Tuple
+
+from classes import FRES
+from formats import FIELD_OFFSET, layouts
+from yaz0 import Decompressor, is_compressed
+
+# Bytes read from the file at a time
+CHUNK_SIZE = 1024 * 1024
+
+# Raised when a record goes past the bytes received so far
+INCOMPLETE = (struct.error, ValueError, IndexError)
+
+def get_ranges(subfile):
+    # (start, end) of the data a parsed subfile points to, besides the
+    # headers it already read while being built
+    if isinstance(subfile, FRES.FTEX):
+        header = subfile.header
+        ranges = [(header.data_offset, header.data_offset + header.data_length)]
+        if header.mipmaps_data_length:
+            ranges.append((header.mipmap_data_offset, header.mipmap_data_offset + header.mipmaps_data_length))
+        return ranges
+    if isinstance(subfile, FRES.FMDL):
+        skeleton = subfile.skele_file.header
+        ranges = [(skeleton.bones_offset, skeleton.bones_offset + skeleton.bone_count * layouts["Bone"].size)]
+        for fvtx in subfile.vertices:
+            ranges += [(buffer.data_offset, buffer.data_offset + buffer.length) for buffer in fvtx.buffers]
+        for shape in subfile.shapes:
+            ranges += [(lod_mdl.index_buffer.data_offset, lod_mdl.index_buffer.data_offset + lod_mdl.index_buffer.length) for lod_mdl in shape.lod_mdls]
+        return ranges
+    if isinstance(subfile, FRES.FSKA):
+        # Curve frames and keys, baked ones included, are only read when
+        # the animation is evaluated
+        from curves import get_frames_size, get_keys_size
+
+        ranges = []
+        for bone_animation in subfile.bone_animations:
+            for curve in bone_animation.curves:
+                header = curve.header
+                ranges.append((header.frames_offset, header.frames_offset + get_frames_size(header.key_count, header.frame_data_flag)))
+                ranges.append((header.keys_offset, header.keys_offset + get_keys_size(header.key_count, header.key_data_flag, header.curve_data_flag)))
+        return ranges
+    return []
+
+def rebind(subfile, old, new):
+    # Point every object of a parsed subfile that holds the buffer old to
+    # new instead: its records, lists of them and nested classes
+    seen = set()
+    stack = [subfile]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+            continue
+        if type(obj).__module__ != "classes":
+            continue
+        names = list(getattr(obj, "__dict__", ()))
+        names += [name for cls in type(obj).__mro__ for name in cls.__dict__.get("__slots__", ())]
+        for name in names:
+            value = getattr(obj, name, None)
+            if value is old:
+                setattr(obj, name, new)
+            elif isinstance(value, (list, tuple)) or type(value).__module__ == "classes":
+                stack.append(value)
+
+class StreamReader():
+    # Parses a BFRES file from a file-like object (a pipe, a socket's
+    # makefile) while it's being read, in order. Yaz0 compressed files are
+    # decompressed on the way in. Bytes go once into a buffer sized from the
+    # header, so pointers going backwards always land on data that is
+    # already there, and each subfile is given out as soon as every byte it
+    # uses has arrived
+    def __init__(self, file=None, chunk_size: int = CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.data = bytearray()
+        self.view: memoryview = None
+        self.received = 0
+        self.compressed: bool = None
+        self.decompressor: Decompressor = None
+        self.header: FRES.Header = None
+        self.fres: FRES = None
+        # (offset, kind, index, bytes needed before trying again) of every
+        # subfile not given out yet
+        self.pending: List[Tuple[int, str, int, int]] = []
+        # Headers of the pending subfiles, read once
+        self.headers = {}
+        # (subfile, view it was built on) of every subfile given out before
+        # the whole file arrived
+        self.partial = []
+
+    def __iter__(self):
+        # (kind, name, subfile) of every subfile, in the order they complete.
+        # Once the buffer is allocated, uncompressed files are read straight into it
+        readinto = getattr(self.file, "readinto", None)
+        while self.view is None or self.received < len(self.data):
+            if self.view is not None and readinto is not None and not self.compressed:
+                count = readinto(self.view[self.received:self.received + self.chunk_size])
+                if not count:
+                    break
+                self.received += count
+                yield from self.update()
+            else:
+                chunk = self.file.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield from self.feed(chunk)
+        self.close()
+
+    def feed(self, chunk: bytes):
+        # Take in the next bytes of the file, and return the (kind, name,
+        # subfile) of every subfile they complete. Whether the file is
+        # compressed is told by its first 4 bytes
+        if self.compressed is None:
+            self.data += chunk
+            if len(self.data) < 4:
+                return []
+            chunk, self.data = bytes(self.data), bytearray()
+            self.compressed = is_compressed(chunk)
+            if self.compressed:
+                self.decompressor = Decompressor()
+        if self.decompressor is not None:
+            chunk = self.decompressor.decompress(chunk)
+
+        if self.view is None:
+            self.data += chunk
+            if len(self.data) < layouts["Header"].size:
+                return []
+            self.allocate()
+        else:
+            count = min(len(chunk), len(self.data) - self.received)
+            self.view[self.received:self.received + count] = chunk[:count]
+            self.received += count
+        return self.update()
+
+    def close(self):
+        # The parsed file, once every byte of it has arrived. Subfiles that
+        # couldn't be parsed are left to be parsed (and fail) on access
+        if self.view is None or self.received < len(self.data):
+            raise ValueError(f"Truncated BFRES file, {self.received} of {len(self.data) or '?'} bytes received")
+        return self.fres
+
+    def allocate(self):
+        # Replace the bytes received so far with a buffer of the whole file
+        self.header = FRES.Header(self.data, 0)
+        if self.header.magic != b"FRES":
+            raise ValueError("Not a BFRES file")
+        data = self.data
+        self.data = bytearray(self.header.file_size)
+        self.received = min(len(data), len(self.data))
+        self.data[:self.received] = data[:self.received]
+        self.view = memoryview(self.data)
+
+    def update(self):
+        if self.fres is None:
+            # Dicts are only read once all of them have arrived
+            ends = [
+                pos + 24 + 16 * count
+                for pos, count in zip(self.header.dicts_offsets, self.header.dicts_counts) if pos not in [0, -1]
+            ]
+            if max(ends, default=0) > self.received:
+                return []
+            self.fres = FRES(self.view, 0, lazy=True)
+            self.pending = sorted(
+                (offset, key, i, offset + self.get_header_size(key))
+                for key, offsets in self.fres.subfiles_offsets.items() for i, offset in enumerate(offsets)
+            )
+
+        # So are names, which every subfile may read
+        if self.header.string_table_offset + self.header.string_table_length > self.received:
+            return []
+
+        complete = []
+        pending = []
+        for offset, key, i, needed in self.pending:
+            if needed > self.received:
+                pending.append((offset, key, i, needed))
+                continue
+            subfile, needed = self.load(key, offset)
+            if subfile is None:
+                pending.append((offset, key, i, needed))
+                continue
+            subfiles = getattr(self.fres, "{}_files".format(key.lower()))
+            subfiles.files[i] = subfile
+            group = self.fres.index_groups[key]
+            complete.append((key, group.strings[group.entries[i].name_offset], subfile))
+        self.pending = pending
+
+        # Subfiles built on the bytes received so far read the whole file
+        # once it's there, for whatever they only read on access
+        if self.received == len(self.data):
+            for subfile, view in self.partial:
+                rebind(subfile, view, self.view)
+            self.partial = []
+        return complete
+
+    def load(self, key: str, offset: int):
+        # (subfile, None) if every byte it uses has arrived, (None, bytes
+        # needed before trying again) otherwise. The subfile only sees the
+        # bytes received so far, so it can't read the zeros past them
+        view = self.view[:self.received]
+        try:
+            subfile = getattr(FRES, key)(view, offset, self.fres.strings)
+        except INCOMPLETE:
+            return None, max(self.received + 1, self.get_header_needed(key, offset))
+        needed = max((end for start, end in get_ranges(subfile)), default=0)
+        if needed > self.received:
+            return None, needed
+        self.headers.pop(offset, None)
+        if len(view) < len(self.data):
+            self.partial.append((subfile, view))
+        return subfile, None
+
+    def get_header_needed(self, key: str, offset: int):
+        # Bytes needed before the records a subfile header points to can
+        # have all arrived, from its header, which is only read once
+        header = self.headers.get(offset)
+        if header is None:
+            cls = getattr(FRES, key)
+            header = self.headers[offset] = getattr(cls, "Header", cls)(self.view, offset)
+        targets = [getattr(header, name) for name, kind, *_ in header._layout.fields if kind == FIELD_OFFSET]
+        return max(targets, default=0) + 1
+
+    @staticmethod
+    def get_header_size(key: str):
+        cls = getattr(FRES, key)
+        return getattr(cls, "Header", cls)._layout.size
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+import re
+
+import numpy as np
+
+from formats import *
+
+# struct format characters to NumPy types, without byte order
+types = {
+    "b": "i1", "B": "u1", "?": "?",
+    "h": "i2", "H": "u2", "i": "i4", "I": "u4", "l": "i4", "L": "u4", "q": "i8", "Q": "u8",
+    "e": "f2", "f": "f4", "d": "f8",
+}
+
+# Layout to its (file, native) structured dtypes, built the first time a table
+# of that layout is read
+dtypes = {}
+
+def get_dtypes(layout: Layout):
+    # The file dtype matches the layout byte for byte, padding included. The
+    # native one has every offset widened to 64 bits, so that absolute
+    # offsets are computed in place
+    if layout in dtypes:
+        return dtypes[layout]
+
+    names, file_formats, native_formats, offsets = [], [], [], []
+    for (name, kind, index, count, offset, size), fmt in zip(layout.fields, layout.fmts):
+        repeat, code = re.search(r"(\d*)([a-wyzA-Z?])", fmt).groups()
+        if code == "s":
+            file_format = native_format = "S" + (repeat or "1")
+        else:
+            file_format = ">" + types[code]
+            native_format = "i8" if kind in (FIELD_OFFSET, FIELD_OFFSET_ARRAY) else types[code]
+        shape = (count,) if count > 1 else ()
+        names.append(name)
+        file_formats.append((file_format, shape))
+        native_formats.append((native_format, shape))
+        offsets.append(offset)
+
+    dtypes[layout] = (
+        np.dtype({"names": names, "formats": file_formats, "offsets": offsets, "itemsize": layout.size}),
+        np.dtype({"names": names, "formats": native_formats}),
+    )
+    return dtypes[layout]
+
+def unpack_table(layout: Layout, buffer, pos: int, count: int):
+    # count consecutive layout records at pos, as a native structured array
+    # with one column per field. Offsets are made absolute the way
+    # Layout.unpack_into does it, but for every record at once
+    file_dtype, native_dtype = get_dtypes(layout)
+    table = np.frombuffer(buffer, file_dtype, count, pos).astype(native_dtype)
+    positions = pos + np.arange(count, dtype=np.int64) * layout.size
+
+    for name, kind, index, length, offset, size in layout.fields:
+        if kind == FIELD_OFFSET:
+            table[name] += positions + offset
+        elif kind == FIELD_OFFSET_ARRAY:
+            # Null offsets are left untouched
+            column = table[name]
+            column += np.where(column != 0, positions[:, None] + offset + np.arange(length) * size, 0)
+    return table
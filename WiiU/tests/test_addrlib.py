@@ -0,0 +1,25 @@
+import numpy as np
+
+from addrlib import PIPE_INTERLEAVE_BYTES_BITCOUNT, PIPES_BITCOUNT, deswizzle, get_address_table, get_surface_info, swizzle
+
+# 2D_TILED_THIN1 and its bank swapped variant 2B_TILED_THIN1
+TILED_2D_THIN1, TILED_2B_THIN1 = 4, 8
+R8_G8_B8_A8 = 0x1A
+
+def test_bank_swapped_base_level():
+    tile_mode, pitch, height, size = get_surface_info(256, 256, R8_G8_B8_A8, TILED_2B_THIN1)
+    assert tile_mode == TILED_2B_THIN1
+    assert get_surface_info(256, 256, R8_G8_B8_A8, TILED_2B_THIN1, 1)[0] == TILED_2D_THIN1
+
+    # At 32 bpp banks are swapped every 128 pixels: the second half of each
+    # row lies in the bank next to the one it would have without the swap
+    swapped = get_address_table(256, 256, 32, TILED_2B_THIN1, 0, pitch, height)
+    plain = get_address_table(256, 256, 32, TILED_2D_THIN1, 0, pitch, height)
+    bank = 1 << (PIPES_BITCOUNT + PIPE_INTERLEAVE_BYTES_BITCOUNT)
+    assert np.array_equal(swapped[:, :128], plain[:, :128])
+    assert np.array_equal(swapped[:, 128:], plain[:, 128:] ^ bank)
+
+    image = np.random.default_rng(0).integers(0, 256, (256, 256, 4), np.uint8)
+    data = swizzle(image.tobytes(), 256, 256, R8_G8_B8_A8, tile_mode, 0, pitch, size, height)
+    assert np.array_equal(deswizzle(data.tobytes(), 256, 256, R8_G8_B8_A8, tile_mode, 0, pitch, height), image)
+    assert not np.array_equal(deswizzle(data.tobytes(), 256, 256, R8_G8_B8_A8, TILED_2D_THIN1, 0, pitch, height), image)
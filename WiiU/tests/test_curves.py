@@ -0,0 +1,19 @@
+import numpy as np
+
+from curves import CUBIC, LINEAR, STEP_INT, evaluate_bones, evaluate_curves
+
+def test_empty_curves():
+    empty = np.empty(0, np.float32)
+    curves = [
+        (empty, np.empty((0, 4), np.float32), CUBIC),
+        (np.array([0, 10], np.float32), np.array([[1, 1], [2, 0]], np.float32), LINEAR),
+        (empty, np.empty((0, 1), np.float32), STEP_INT),
+    ]
+    values = evaluate_curves(curves, [0, 5, 10])
+    assert np.array_equal(values, [[0, 0, 0], [1, 1.5, 2], [0, 0, 0]])
+
+def test_empty_bone_curves_keep_base_values():
+    base = np.arange(10, dtype=np.float32)
+    curve = (0x04, np.empty(0, np.float32), np.empty((0, 4), np.float32), CUBIC)
+    values = evaluate_bones([base], [[curve]], [0, 1])
+    assert np.array_equal(values[0], [base, base])
@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from extract import write_obj
+
+class Vertices():
+    def __init__(self, **attributes):
+        self.attributes = attributes
+
+    def attribute_names(self):
+        return list(self.attributes)
+
+    def get_attribute(self, name):
+        return self.attributes[name]
+
+def get_shape(fvtx_index):
+    lod_mdl = SimpleNamespace(vertex_skip_count=0, get_triangles=lambda: np.array([[0, 1, 2]]))
+    return SimpleNamespace(header=SimpleNamespace(fvtx_index=fvtx_index), lod_mdls=[lod_mdl])
+
+def test_obj_references_per_attribute(tmp_path):
+    # The first shape has no UVs, so the UVs of the second one start at 1
+    # while its positions and normals start at 4
+    triangle = np.eye(3, dtype=np.float32)
+    model = SimpleNamespace(
+        vertices=[Vertices(_p0=triangle, _n0=triangle), Vertices(_p0=triangle, _u0=triangle[:, :2], _n0=triangle)],
+        shapes=[get_shape(0), get_shape(1)],
+        )
+    path = tmp_path / "model.obj"
+    write_obj(str(path), model)
+    faces = [line for line in path.read_text().splitlines() if line.startswith("f ")]
+    assert faces == ["f 1//1 2//2 3//3", "f 4/1/4 5/2/5 6/3/6"]
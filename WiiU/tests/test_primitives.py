@@ -0,0 +1,16 @@
+import numpy as np
+
+from primitives import TRIANGLE_STRIP, to_triangles
+
+def test_strip_winding_restarts_with_each_strip():
+    # A strip of 2 triangles, a restart, then a strip of 3 starting at an
+    # odd index
+    indices = np.array([0, 1, 2, 3, 0xFFFF, 4, 5, 6, 7, 8], ">u2")
+    triangles = to_triangles(indices, TRIANGLE_STRIP)
+    assert triangles.tolist() == [[0, 1, 2], [2, 1, 3], [4, 5, 6], [6, 5, 7], [6, 7, 8]]
+
+def test_stitched_strip_keeps_its_winding():
+    # Degenerate triangles join two strips without a restart
+    indices = np.array([0, 1, 2, 3, 3, 4, 4, 5, 6], ">u2")
+    triangles = to_triangles(indices, TRIANGLE_STRIP)
+    assert triangles.tolist() == [[0, 1, 2], [2, 1, 3], [4, 5, 6]]
@@ -0,0 +1,99 @@
+import struct
+
+import pytest
+
+from classes import FRES
+
+# A FRES with 2 embedded files named "A" and "B", and named "F" itself, laid
+# out by hand:
+#   0x00 header
+#   0x6C embedded files dict, root and 2 entries
+#   0xA4 embedded files records, then their data at 0xB4
+#   0xBC string table, "A", "B" and "F"
+# The tree of the dict tests bit 0 of the last character, which tells "A"
+# (0x41) from the root, then bit 1, which tells "B" (0x42) from the root
+DICT = 0x6C
+STRINGS = 0xBC
+
+def build_fixture():
+    data = bytearray(0xD4)
+    dicts_offsets = [0] * 12
+    dicts_offsets[11] = DICT - (0x20 + 11 * 4)
+    dicts_counts = [0] * 12
+    dicts_counts[11] = 2
+    struct.pack_into(
+        ">4sIHHIIiii12i12HI", data, 0,
+        b"FRES", 0x03040000, 0xFEFF, 0x10, len(data), 0x2000,
+        0xD0 - 0x14, 0x18, STRINGS - 0x1C, *dicts_offsets, *dicts_counts, 0,
+    )
+    struct.pack_into(">II", data, DICT, 8 + 16 * 3, 2)
+    # search_value, left_index, right_index, name_offset, data_offset
+    struct.pack_into(">iHHIi", data, 0x74, -1, 1, 0, 0, 0)
+    struct.pack_into(">iHHIi", data, 0x84, 0, 2, 1, 0xC0 - 0x8C, 0xA4 - 0x90)
+    struct.pack_into(">iHHIi", data, 0x94, 1, 0, 2, 0xC8 - 0x9C, 0xAC - 0xA0)
+    # offset, length
+    struct.pack_into(">iI", data, 0xA4, 0xB4 - 0xA4, 4)
+    struct.pack_into(">iI", data, 0xAC, 0xB8 - 0xAC, 4)
+    data[0xB4:0xBC] = b"abcdefgh"
+    for pos, name in ((0xBC, b"A"), (0xC4, b"B"), (0xCC, b"F")):
+        struct.pack_into(">I", data, pos, len(name))
+        data[pos + 4:pos + 4 + len(name)] = name
+    return bytes(data)
+
+def get_names(fres):
+    return list(fres.index_groups["EmbeddedFiles"].names())
+
+def test_fixture_is_parsed():
+    fres = FRES(build_fixture(), 0)
+    assert fres.get_name() == "F"
+    assert get_names(fres) == ["A", "B"]
+    group = fres.index_groups["EmbeddedFiles"]
+    assert [group.search(name) for name in ("A", "B")] == [0, 1]
+    assert [file.length for file in fres.embeddedfiles_files] == [4, 4]
+
+def test_unchanged_file_is_written_as_is():
+    data = build_fixture()
+    assert bytes(FRES(data, 0).serialize()) == data
+
+def test_new_name_is_appended():
+    data = build_fixture()
+    out = FRES(data, 0).serialize({"A": "C"})
+    # "C" goes after the end of the file, 4 bytes aligned
+    assert len(out) == len(data) + 8
+    assert struct.unpack_from(">I", out, 0x0C)[0] == len(out)
+    assert out[len(data):] == b"\x00\x00\x00\x01C\x00\x00\x00"
+    # "C" (0x43) also has bit 0 set, so the tree is the same one
+    assert out[DICT:0x8C] == data[DICT:0x8C]
+    assert out[0x90:STRINGS] == data[0x90:STRINGS]
+    assert struct.unpack_from(">I", out, 0x8C)[0] + 0x8C == len(data) + 4
+
+    fres = FRES(out, 0)
+    assert get_names(fres) == ["C", "B"]
+    group = fres.index_groups["EmbeddedFiles"]
+    assert group.search("C") == 0
+    with pytest.raises(KeyError):
+        group.search("A")
+
+def test_existing_name_is_reused():
+    data = build_fixture()
+    out = FRES(data, 0).serialize({"B": "F"})
+    assert len(out) == len(data)
+    assert struct.unpack_from(">I", out, 0x9C)[0] + 0x9C == 0xD0
+    fres = FRES(out, 0)
+    assert get_names(fres) == ["A", "F"]
+    group = fres.index_groups["EmbeddedFiles"]
+    assert [group.search(name) for name in ("A", "F")] == [0, 1]
+
+def test_size_changes_are_rejected():
+    fres = FRES(bytearray(build_fixture()), 0)
+    fres.embeddedfiles_files[0].length = 8
+    with pytest.raises(ValueError):
+        fres.serialize()
+    with pytest.raises(ValueError):
+        fres.patch()
+    assert struct.unpack_from(">I", fres.buffer, 0xA8)[0] == 4
+
+    fres = FRES(build_fixture(), 0)
+    fres.index_groups["EmbeddedFiles"].entries.pop()
+    with pytest.raises(ValueError):
+        fres.serialize()
@@ -0,0 +1,23 @@
+import pytest
+
+from benchmark import generate
+from classes import FRES
+from formats import layouts
+from skeleton import bone_dtype
+
+def test_bone_dtype_matches_layout():
+    layout = layouts["Bone"]
+    assert bone_dtype.itemsize == layout.size
+    assert [bone_dtype.fields[name][1] for name in layout.names] == [field[4] for field in layout.fields]
+
+def test_bone_attributes_are_written_back():
+    fres = FRES(memoryview(bytearray(generate())), 0)
+    bone = fres.fmdl_files[0].skele_file.bones[1]
+    bone.scale_vector_x = 5
+    bone.parent_index = 0
+    with pytest.raises(AttributeError):
+        bone.unknown_field = 1
+
+    written = FRES(memoryview(bytes(fres.serialize())), 0).fmdl_files[0].skele_file.bones[1]
+    assert written.scale_vector_x == 5
+    assert written.parent_index == 0
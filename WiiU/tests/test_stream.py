@@ -0,0 +1,49 @@
+import io
+
+import numpy as np
+
+from benchmark import generate
+from classes import FRES
+from formats import layouts
+from stream import StreamReader
+
+def test_animation_data_after_headers():
+    # Curve frames and keys come after the string table, so the headers of
+    # every animation arrive long before the data they point to
+    data = generate(models=0, textures=0, animations=2, animation_data_last=True)
+    expected = [animation.evaluate() for animation in FRES(data, 0).fska_files]
+    streamed = [subfile for _, _, subfile in StreamReader(io.BytesIO(data), 256)]
+    assert len(streamed) == len(expected)
+    for animation, values in zip(streamed, expected):
+        assert np.array_equal(animation.evaluate(), values)
+
+def test_animation_waits_for_data():
+    data = generate(models=0, textures=0, animations=1, animation_data_last=True)
+    reader = StreamReader()
+    assert reader.feed(data[:-1]) == []
+    assert [kind for kind, _, _ in reader.feed(data[-1:])] == ["FSKA"]
+
+def test_subfiles_read_the_whole_file_once_streamed():
+    # The model arrives before the curve data at the end of the file, its
+    # skeleton then reads its bone dict from the whole file
+    data = generate(models=1, textures=0, animations=1, animation_data_last=True)
+    reader = StreamReader()
+    models = [subfile for kind, _, subfile in reader.feed(data[:-1]) if kind == "FMDL"]
+    assert models
+    assert reader.feed(data[-1:])
+    skeleton = models[0].skele_file
+    assert len(skeleton.buffer) == len(data)
+    assert list(skeleton.get_bones_dict().names()) == FRES(data, 0).fmdl_files[0].skele_file.get_bone_names()
+
+def test_incomplete_subfiles_wait_for_their_records():
+    # A subfile whose records haven't all arrived is only parsed again once
+    # the bytes its header points to are there, not on the next chunk
+    data = generate(models=1, textures=0, animations=0)
+    reader = StreamReader()
+    reader.feed(data)
+    offset = reader.fres.subfiles_offsets["FMDL"][0]
+    reader.received = offset + layouts["FMDLHeader"].size
+    subfile, needed = reader.load("FMDL", offset)
+    assert subfile is None
+    header = reader.fres.fmdl_files[0].header
+    assert needed > max(header.fskl_offset, header.fvtx_offset, header.fshp_dict_offset, header.fmat_dict_offset)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+# GX2AttribFormat: the low byte selects the components layout, the high byte
+# how they're read (0x000 unorm, 0x100 uint, 0x200 snorm, 0x300 sint,
+# 0x800 float or uint to float, 0xA00 sint to float)
+attrib_layouts = {
+    0x00: (1, "u1"),        # 8
+    0x02: (1, "u2"),        # 16
+    0x03: (1, "f2"),        # 16 float
+    0x04: (2, "u1"),        # 8_8
+    0x05: (1, "u4"),        # 32
+    0x06: (1, "f4"),        # 32 float
+    0x07: (2, "u2"),        # 16_16
+    0x08: (2, "f2"),        # 16_16 float
+    0x0A: (4, "u1"),        # 8_8_8_8
+    0x0C: (2, "u4"),        # 32_32
+    0x0D: (2, "f4"),        # 32_32 float
+    0x0E: (4, "u2"),        # 16_16_16_16
+    0x0F: (4, "f2"),        # 16_16_16_16 float
+    0x10: (3, "u4"),        # 32_32_32
+    0x11: (3, "f4"),        # 32_32_32 float
+    0x12: (4, "u4"),        # 32_32_32_32
+    0x13: (4, "f4"),        # 32_32_32_32 float
+}
+
+UNORM = 0x000
+UINT = 0x100
+SNORM = 0x200
+SINT = 0x300
+UINT_TO_FLOAT = 0x800
+SINT_TO_FLOAT = 0xA00
+
+def get_view(buffer, pos: int, count: int, stride: int, components: int, dtype: str):
+    # A strided view over the vertex buffer, one row per vertex, without copying anything
+    dtype = np.dtype(">" + dtype)
+    return np.ndarray((count, components), dtype, buffer, pos, (stride, dtype.itemsize))
+
+def decode_attribute(buffer, pos: int, count: int, stride: int, format_: int):
+    # Decode one attribute of every vertex at once into a (count, components) array
+    layout = format_ & 0xFF
+    kind = format_ & 0xF00
+
+    if layout == 0x01:
+        # 4_4, both components packed in a single byte
+        data = get_view(buffer, pos, count, stride, 1, "u1")[:, 0]
+        data = np.stack((data & 0xF, data >> 4), axis=1)
+        return data.astype(np.float32) / 15 if kind == UNORM else data
+
+    if layout == 0x0B:
+        # 10_10_10_2, X in the lowest bits
+        data = get_view(buffer, pos, count, stride, 1, "u4")[:, 0]
+        if kind in (SNORM, SINT):
+            data = data.view(">i4")
+            data = np.stack((data << 22 >> 22, data << 12 >> 22, data << 2 >> 22, data >> 30), axis=1)
+            if kind == SNORM:
+                return np.maximum(data / np.array([511, 511, 511, 1], np.float32), -1).astype(np.float32)
+        else:
+            data = np.stack((data & 0x3FF, (data >> 10) & 0x3FF, (data >> 20) & 0x3FF, data >> 30), axis=1)
+            if kind == UNORM:
+                return (data / np.array([1023, 1023, 1023, 3], np.float32)).astype(np.float32)
+        return data
+
+    if layout not in attrib_layouts:
+        raise NotImplementedError(f"Unsupported attribute format {format_:#x}")
+
+    components, dtype = attrib_layouts[layout]
+    if kind & 0x200:
+        dtype = dtype.replace("u", "i")
+    data = get_view(buffer, pos, count, stride, components, dtype)
+
+    if dtype[0] == "f":
+        return data.astype(np.float32)
+    if kind == UNORM:
+        return data.astype(np.float32) / np.iinfo(data.dtype).max
+    if kind == SNORM:
+        return np.maximum(data.astype(np.float32) / np.iinfo(data.dtype).max, -1)
+    if kind in (UINT_TO_FLOAT, SINT_TO_FLOAT):
+        return data.astype(np.float32)
+    # Integer attributes (blend indices) are kept as they are, in native byte order
+    return data.astype(data.dtype.newbyteorder("="))
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+
+import mmap
+import struct
+from typing import Dict, List, Tuple
+
+from classes import FRES, IndexGroup, Subfiles
+from formats import *
+from patricia import build_tree
+from skeleton import BoneArrays
+
+def get_strings(buffer, pos: int, length: int):
+    # Every string of a string table to its position. Each one is stored
+    # after its 4 bytes length, ends with a null byte and is 4 bytes aligned
+    strings = {}
+    end = pos + length
+    while pos + 4 <= end:
+        size = struct.unpack_from(">I", buffer, pos)[0]
+        try:
+            strings.setdefault(bytes(buffer[pos + 4:pos + 4 + size]).decode(), pos + 4)
+        except UnicodeDecodeError:
+            pass
+        pos += (size + 8) & ~3
+    return strings
+
+# Layout to the (name, offset) of each of its fields pointing to a string
+string_fields = {
+    layout: [
+        (name, offset) for name, kind, index, count, offset, size in layout.fields
+        if kind == FIELD_OFFSET and (name.endswith("name_offset") or name.endswith("path_offset"))
+    ]
+    for layout in layouts.values()
+}
+
+# Layout to the (name, index, count) of each of its fields holding a count or
+# a size, which the file's layout depends on. Frame counts are durations
+size_fields = {
+    layout: [
+        (name, index, count) for name, kind, index, count, offset, size in layout.fields
+        if any(word in name for word in ("count", "length", "size")) and name != "frame_count"
+    ]
+    for layout in layouts.values()
+}
+
+def set_field(buffer, layout: Layout, pos: int, name: str, value):
+    # Pack a single field of a layout record at pos
+    i = layout.names.index(name)
+    struct.pack_into(">" + layout.fmts[i], buffer, pos + layout.fields[i][4], value)
+
+def set_offset(buffer, layout: Layout, pos: int, name: str, target: int):
+    # Point an offset field of a layout record at pos to target
+    i = layout.names.index(name)
+    set_field(buffer, layout, pos, name, target - pos - layout.fields[i][4])
+
+class Serializer():
+    # Writes a parsed FRES back to bytes. This doesn't lay the file out
+    # again: it is copied as is, and every record the parser has read is
+    # packed back where it was read from, offsets made relative again, so
+    # whatever the parser doesn't model (user data, volatile flags) is kept.
+    # Edits must then fit in the bytes the file already has: counts and
+    # sizes can't change, nor can records or dict entries be added or
+    # removed, and write() raises a ValueError for those. Index group trees
+    # are rebuilt from their names, and names the string table doesn't have
+    # yet are appended after the end of the file, each one once and 4 bytes
+    # aligned. Names it has already are pointed to instead. The old strings
+    # stay where they are, since records the parser doesn't model may point
+    # to them
+    def __init__(self, fres: FRES, renames: Dict[str, str] = None):
+        self.fres = fres
+        self.buffer = fres.buffer
+        self.renames = renames or {}
+        self.records: List[Tuple[object, int]] = []
+        self.groups: List[IndexGroup] = []
+        # Strings already in the string table, to their position
+        self.existing: Dict[str, int] = {}
+
+    def write(self):
+        self.records, self.groups = [], []
+        self.add_fres()
+        self.check_sizes()
+        strings = self.get_new_strings()
+
+        # Everything is written into one buffer, allocated once
+        size = len(self.buffer)
+        positions = {}
+        for string in strings:
+            size += -size % 4
+            positions[string] = size + 4
+            size += 4 + len(string.encode()) + 1
+        size += -size % 4
+        out = bytearray(size)
+        out[:len(self.buffer)] = self.buffer
+
+        for record, pos in self.records:
+            self.write_record(out, record, pos, positions)
+        for group in self.groups:
+            self.write_index_group(out, group, positions)
+        for string, pos in positions.items():
+            encoded = string.encode()
+            struct.pack_into(">I", out, pos - 4, len(encoded))
+            out[pos:pos + len(encoded)] = encoded
+        set_field(out, layouts["Header"], self.fres.pos, "file_size", len(out))
+        return out
+
+    def check_sizes(self):
+        # Raise a ValueError if an edit changed a count or a size, which would
+        # need the file to be laid out again
+        for record, pos in self.records:
+            fields = size_fields.get(getattr(record, "_layout", None))
+            if not fields:
+                continue
+            current = record._layout.unpack_from(self.buffer, pos)
+            for name, index, count in fields:
+                value = getattr(record, name)
+                old = current[index] if count == 1 else list(current[index:index + count])
+                if value != old:
+                    raise ValueError(f"{type(record).__qualname__}.{name} changed from {old} to {value}, the file can't be laid out again")
+        for group in self.groups:
+            if len(group.entries) != group.count:
+                raise ValueError(f"Index group at {group.pos:#x} has {len(group.entries)} entries instead of {group.count}, the file can't be laid out again")
+
+    def get_string_fields(self, record, pos: int):
+        # (position, string) of every string field of a record written at pos
+        if isinstance(record, BoneArrays):
+            for i, value in enumerate(record.name_offsets.tolist()):
+                yield pos + i * 0x40, self.fres.strings[value]
+            return
+        for name, offset in string_fields.get(getattr(record, "_layout", None), ()):
+            # Null offsets point to their own field
+            value = getattr(record, name)
+            if value != pos + offset:
+                yield pos + offset, self.fres.strings[value]
+
+    def get_new_strings(self):
+        # Names given by renames which the string table doesn't have yet
+        names = set()
+        for record, pos in self.records:
+            for field, string in self.get_string_fields(record, pos):
+                if string in self.renames:
+                    names.add(self.renames[string])
+        for group in self.groups:
+            names.update(self.renames.get(name, name) for name in group.names())
+        header = self.fres.header
+        self.existing = get_strings(self.buffer, header.string_table_offset, header.string_table_length)
+        return sorted(names - self.existing.keys())
+
+    def get_string_pos(self, string: str, positions: Dict[str, int]):
+        return positions.get(string) or self.existing[string]
+
+    def write_record(self, out: bytearray, record, pos: int, positions: Dict[str, int]):
+        record.pack_into(out, pos)
+        for field, string in self.get_string_fields(record, pos):
+            if string in self.renames:
+                struct.pack_into(">i", out, field, self.get_string_pos(self.renames[string], positions) - field)
+
+    def write_index_group(self, out: bytearray, group: IndexGroup, positions: Dict[str, int]):
+        # The tree is built again from the names, in entry order
+        names = [self.renames.get(self.fres.strings[entry.name_offset], self.fres.strings[entry.name_offset]) for entry in group.entries]
+        nodes = build_tree([name.encode() for name in names])
+        entry_layout = layouts["IndexEntry"]
+        group.pack_into(out, group.pos)
+        group.root.pack_into(out, group.pos + 8)
+        set_field(out, entry_layout, group.pos + 8, "left_index", nodes[0][1])
+        set_field(out, entry_layout, group.pos + 8, "right_index", nodes[0][2])
+        for i, (entry, name, node) in enumerate(zip(group.entries, names, nodes[1:])):
+            pos = group.pos + 24 + 16 * i
+            entry.pack_into(out, pos)
+            set_field(out, entry_layout, pos, "search_value", node[0])
+            set_field(out, entry_layout, pos, "left_index", node[1])
+            set_field(out, entry_layout, pos, "right_index", node[2])
+            set_offset(out, entry_layout, pos, "name_offset", self.get_string_pos(name, positions))
+
+    # Walking the parsed records
+    # --------------------------
+
+    def add(self, record, pos: int):
+        self.records.append((record, pos))
+
+    def add_array(self, records, pos: int, size: int, count: int):
+        # count is how many records the file has room for
+        if len(records) != count:
+            raise ValueError(f"{len(records)} records instead of {count} at {pos:#x}, the file can't be laid out again")
+        for i, record in enumerate(records):
+            self.add(record, pos + i * size)
+
+    def add_fres(self):
+        fres = self.fres
+        self.add(fres.header, fres.pos)
+        self.groups.extend(fres.index_groups.values())
+        for key, offsets in fres.subfiles_offsets.items():
+            files = getattr(fres, "{}_files".format(key.lower()))
+            # Lazy subfiles which were never accessed are still as they were
+            # read, unless names are replaced: any of their records may hold
+            # one, so they are all loaded then
+            if isinstance(files, Subfiles):
+                loaded = list(files) if self.renames else files.files
+            else:
+                loaded = files
+            for file, pos in zip(loaded, offsets):
+                if file is not None:
+                    self.add_subfile(file, pos)
+
+    def add_subfile(self, file, pos: int):
+        if isinstance(file, FRES.FMDL):
+            self.add_fmdl(file, pos)
+        elif isinstance(file, FRES.FTEX):
+            self.add(file.header, pos)
+        elif isinstance(file, FRES.FSKA):
+            self.add_fska(file, pos)
+        elif isinstance(file, Record):
+            self.add(file, pos)
+        else:
+            self.add(file.header, pos)
+
+    def add_fmdl(self, model: FRES.FMDL, pos: int):
+        self.add(model.header, pos)
+        self.groups += [model.shapes_dict, model.materials_dict]
+
+        skeleton = model.skele_file
+        self.add(skeleton.header, model.header.fskl_offset)
+        # Bones which were never read are only needed for their names
+        if skeleton.arrays is not None or self.renames:
+            self.add(skeleton.get_arrays(), skeleton.header.bones_offset)
+        self.groups.append(skeleton.get_bones_dict())
+        self.add(StructValues(skeleton.smooth_matrices, skeleton.smooth_matrices.values), skeleton.header.smooth_matrix_offset)
+
+        for i, fvtx in enumerate(model.vertices):
+            self.add(fvtx.header, model.header.fvtx_offset + i * 0x20)
+            self.add_array(fvtx.attributes, fvtx.header.attribs_offset, 0xC, fvtx.header.attrib_count)
+            self.add_array(fvtx.buffers, fvtx.header.buffers_offset, 0x18, fvtx.header.buffer_count)
+
+        for shape, entry in zip(model.shapes, model.shapes_dict.entries):
+            self.add(shape.header, entry.data_offset)
+            self.add_array(shape.lod_mdls, shape.header.lod_mdls_offset, 0x1C, shape.header.lod_mdl_count)
+            for lod_mdl in shape.lod_mdls:
+                self.add(lod_mdl.index_buffer, lod_mdl.index_buffer_offset)
+                self.add_array(lod_mdl.visibility_groups, lod_mdl.vis_group_offset, 0x8, lod_mdl.vis_group_count)
+            self.add(StructValues(shape.skin_bone_indices, shape.skin_bone_indices.values), shape.header.fskl_indexs_offset)
+
+        for material, entry in zip(model.materials, model.materials_dict.entries):
+            self.add(material.header, entry.data_offset)
+            self.groups.append(material.render_info_dict)
+            self.add(material.render_state, material.header.render_state_offset)
+            self.add(material.shader_assign, material.header.shdr_assign_offset)
+            self.add_array(material.tex_samplers, material.header.tex_samplers_offset, 0x18, material.header.tex_sampler_count)
+            self.add_array(material.material_parameters, material.header.mat_params_offset, 0x14, material.header.mat_param_count)
+            for parameter in material.material_parameters:
+                if parameter.values is not None:
+                    self.add(StructValues(parameter.value_struct, parameter.values), material.header.mat_param_data_offset + parameter.mat_param_data_offset)
+            for render_info, info_entry in zip(material.render_info_params, material.render_info_dict.entries):
+                self.add(render_info, info_entry.data_offset)
+                data = render_info.array_data
+                self.add(StructValues(render_info.array_data_class, data if isinstance(data, tuple) else (data,)), info_entry.data_offset + 8)
+
+    def add_fska(self, animation: FRES.FSKA, pos: int):
+        self.add(animation.header, pos)
+        self.add(StructValues(animation.bind_index, animation.bind_index_data), animation.header.bind_index_array)
+        self.add_array(animation.bone_animations, animation.header.bone_animation_offset, 0x18, animation.header.bone_animation_count)
+        for bone_animation in animation.bone_animations:
+            base = bone_animation.data
+            values = [value for value in (base.scaling, base.translation, base.rotation) if value is not None]
+            if values:
+                self.add(StructValues(struct.Struct(">" + "".join(f"{len(value)}f" for value in values)), sum(values, ())), bone_animation.base_data_offset)
+            self.add_array([curve.header for curve in bone_animation.curves], bone_animation.curves_offset, 0x24, bone_animation.curve_count)
+
+class Patcher():
+    # Writes the edits made to the parsed records of a FRES back into its
+    # own buffer, instead of a new file: every record the parser has read is
+    # compared with the bytes it came from, and only the fields that differ
+    # are packed again, at their original offsets. Like serialize(), edits
+    # that change a count or a size raise a ValueError, before anything is
+    # written. Names and index groups are left as they are, since a new name
+    # needs room the file doesn't have, use serialize() for those
+    def __init__(self, fres: FRES):
+        self.fres = fres
+        self.buffer = fres.buffer
+
+    def write(self):
+        if memoryview(self.buffer).readonly:
+            raise ValueError("Read-only buffer, open the file with FRES.open(path, writable=True) to patch it")
+        walker = Serializer(self.fres)
+        walker.add_fres()
+        walker.check_sizes()
+        written = sum(record.pack_into(self.buffer, pos, True) for record, pos in walker.records)
+        # Changes to a mapped file reach the disk now rather than on close
+        mapping = getattr(self.buffer, "obj", None)
+        if written and isinstance(mapping, mmap.mmap):
+            mapping.flush()
+        return written
+
+class StructValues():
+    # Values of a plain struct.Struct (index arrays, base values), packed
+    # back the same way records are
+    def __init__(self, struct_: struct.Struct, values):
+        self.struct = struct_
+        self.values = values
+
+    def pack_into(self, buffer, pos: int, patch: bool = False):
+        values = tuple(self.values)
+        if patch and self.struct.unpack_from(buffer, pos) == values:
+            return 0
+        self.struct.pack_into(buffer, pos, *values)
+        return 1
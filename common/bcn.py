@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+# Block compressed formats, by their BCn number. Each platform maps its own
+# format ids to these (addrlib on Wii U, tegra on Switch), sRGB variants
+# share the block layout of the unorm ones and snorm ones are decoded signed
+BC1 = 1
+BC2 = 2
+BC3 = 3
+BC4 = 4
+BC5 = 5
+
+def expand_rgb565(colors):
+    # (N,) uint16 colors to (N, 3) 8 bits per channel colors
+    r = (colors >> 11) & 0x1F
+    g = (colors >> 5) & 0x3F
+    b = colors & 0x1F
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=1).astype(np.int32)
+
+def decode_color_blocks(blocks, four_colors_only: bool):
+    # BC1 color blocks, (N, 8) uint8, to (N, 16, 4) RGBA pixels
+    color0 = blocks[:, 0].astype(np.uint16) | blocks[:, 1].astype(np.uint16) << 8
+    color1 = blocks[:, 2].astype(np.uint16) | blocks[:, 3].astype(np.uint16) << 8
+    indices = blocks[:, 4:8].copy().view("<u4")[:, 0]
+
+    rgb0 = expand_rgb565(color0)
+    rgb1 = expand_rgb565(color1)
+    four_colors = (color0 > color1)[:, None] | four_colors_only
+
+    palette = np.empty((len(blocks), 4, 4), np.int32)
+    palette[:, 0, :3] = rgb0
+    palette[:, 1, :3] = rgb1
+    palette[:, 2, :3] = np.where(four_colors, (2 * rgb0 + rgb1) // 3, (rgb0 + rgb1) // 2)
+    palette[:, 3, :3] = np.where(four_colors, (rgb0 + 2 * rgb1) // 3, 0)
+    palette[:, :, 3] = 255
+    palette[:, 3, 3] = np.where(four_colors[:, 0], 255, 0)
+
+    selectors = (indices[:, None] >> (2 * np.arange(16, dtype=np.uint32))) & 3
+    return np.take_along_axis(palette, selectors[:, :, None].astype(np.intp), axis=1)
+
+def decode_alpha_blocks(blocks, signed: bool = False):
+    # BC3 alpha / BC4 blocks, (N, 8) uint8, to (N, 16) values in 0-255
+    if signed:
+        alpha0 = np.maximum(blocks[:, 0].view(np.int8).astype(np.int32), -127)
+        alpha1 = np.maximum(blocks[:, 1].view(np.int8).astype(np.int32), -127)
+        low, high = -127, 127
+    else:
+        alpha0 = blocks[:, 0].astype(np.int32)
+        alpha1 = blocks[:, 1].astype(np.int32)
+        low, high = 0, 255
+
+    alpha0 = alpha0[:, None]
+    alpha1 = alpha1[:, None]
+    weights = np.arange(1, 7)
+    eight = (alpha0 * (7 - weights) + alpha1 * weights) // 7
+    # With 6 interpolated values, the last two are the extremes of the range
+    six = np.empty_like(eight)
+    six[:, :4] = (alpha0 * (5 - weights[:4]) + alpha1 * weights[:4]) // 5
+    six[:, 4] = low
+    six[:, 5] = high
+
+    palette = np.empty((len(blocks), 8), np.int32)
+    palette[:, :1] = alpha0
+    palette[:, 1:2] = alpha1
+    palette[:, 2:] = np.where(alpha0 > alpha1, eight, six)
+
+    # 48 bits of 3 bits indices
+    bits = np.zeros(len(blocks), np.uint64)
+    for i in range(6):
+        bits |= blocks[:, 2 + i].astype(np.uint64) << np.uint64(8 * i)
+    selectors = (bits[:, None] >> (3 * np.arange(16, dtype=np.uint64))) & np.uint64(7)
+    values = np.take_along_axis(palette, selectors.astype(np.intp), axis=1)
+
+    if signed:
+        values = (values + 127) * 255 // 254
+    return values
+
+def decode_blocks(blocks, kind: int, signed: bool = False):
+    # Decode (N, bytes per block) blocks at once to (N, 4, 4, 4) RGBA pixels
+    blocks = np.ascontiguousarray(blocks, np.uint8)
+    pixels = np.empty((len(blocks), 16, 4), np.int32)
+
+    if kind == BC1:
+        pixels[:] = decode_color_blocks(blocks, False)
+    elif kind == BC2:
+        pixels[:] = decode_color_blocks(blocks[:, 8:], True)
+        alpha = blocks[:, :8].copy().view("<u8")[:, 0]
+        alpha = (alpha[:, None] >> (4 * np.arange(16, dtype=np.uint64))) & np.uint64(0xF)
+        pixels[:, :, 3] = alpha.astype(np.int32) * 17
+    elif kind == BC3:
+        pixels[:] = decode_color_blocks(blocks[:, 8:], True)
+        pixels[:, :, 3] = decode_alpha_blocks(blocks[:, :8])
+    elif kind == BC4:
+        pixels[:] = (0, 0, 0, 255)
+        pixels[:, :, 0] = decode_alpha_blocks(blocks, signed)
+    elif kind == BC5:
+        pixels[:] = (0, 0, 0, 255)
+        pixels[:, :, 0] = decode_alpha_blocks(blocks[:, :8], signed)
+        pixels[:, :, 1] = decode_alpha_blocks(blocks[:, 8:], signed)
+    else:
+        raise NotImplementedError(f"Unsupported block compressed format BC{kind}")
+
+    return pixels.astype(np.uint8).reshape(-1, 4, 4, 4)
+
+def decode_images(images, kind: int, signed: bool = False, sizes=None):
+    # Decode several deswizzled (blocks height, blocks width, bytes per block)
+    # images of the same format (a mip chain, array slices) in a single batch.
+    # Returns one (height, width, 4) RGBA array per image, cropped to sizes
+    # ((width, height) per image) when given
+    blocks = np.concatenate([image.reshape(-1, image.shape[-1]) for image in images])
+    pixels = decode_blocks(blocks, kind, signed)
+
+    results = []
+    start = 0
+    for i, image in enumerate(images):
+        height, width = image.shape[:2]
+        rgba = pixels[start:start + height * width].reshape(height, width, 4, 4, 4)
+        rgba = rgba.transpose(0, 2, 1, 3, 4).reshape(height * 4, width * 4, 4)
+        if sizes:
+            rgba = rgba[:sizes[i][1], :sizes[i][0]]
+        results.append(rgba)
+        start += height * width
+    return results
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+import glob
+import hashlib
+import mmap
+import os
+import tempfile
+
+# Bumped when the snapshot layout itself changes
+SNAPSHOT_VERSION = 2
+
+def get_decoder_version():
+    # A hash of the Yaz0 decoder, the only code a snapshot depends on, so
+    # fixing it makes every older snapshot unreachable. Editing the parsers
+    # or the scripts doesn't, snapshots are the file data before any parsing
+    import yaz0
+
+    digest = hashlib.blake2b(bytes([SNAPSHOT_VERSION]), digest_size=8)
+    with open(yaz0.__file__, "rb") as file:
+        digest.update(file.read())
+    return digest.hexdigest()
+
+class DecompressionCache():
+    # Opt-in on-disk cache of Yaz0 compressed files, for both the Wii U and
+    # the Switch FRES.open. Decompressing them is what loading them mostly
+    # costs (tens of milliseconds per MB, against a few for parsing every
+    # record), so each one is stored decompressed, keyed by a hash of its
+    # compressed content and by the decoder version. Later loads of an
+    # unchanged file map the stored copy instead of decompressing it again.
+    # Only the decompression is cached: the parse itself runs on every load
+    # (nothing for lazy loads until subfiles are accessed), and uncompressed
+    # files are mapped as they are. Snapshots are plain file data, parsed
+    # like any other file, so the directory is no more trusted than the
+    # files themselves
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.version = get_decoder_version()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def get_key(self, data):
+        # Hashed straight from the mapped file. SHA-1 is only used as a fast
+        # content hash here, it runs at about twice the speed of BLAKE2
+        return hashlib.sha1(data, usedforsecurity=False).hexdigest()
+
+    def get_path(self, key: str, version: str = None):
+        # Spread over 256 directories, caches of whole game dumps hold tens of
+        # thousands of files
+        return os.path.join(self.directory, key[:2], f"{key}-{version or self.version}.bfres")
+
+    def decompress(self, data):
+        # The decompressed content of the Yaz0 file data, mapped from its
+        # snapshot if there is one, otherwise decompressed and snapshotted
+        from yaz0 import decompress, get_size
+
+        size = get_size(data)
+        key = self.get_key(data)
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as file:
+                # Snapshots of another size (truncated ones) are written again
+                if os.fstat(file.fileno()).st_size == size and size:
+                    mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.hits += 1
+                    return mapping
+        except FileNotFoundError:
+            pass
+
+        self.misses += 1
+        out = decompress(data)
+        self.store(out, path)
+        # Snapshots of the same file by older decoders are never read again
+        self.remove(stale for stale in glob.glob(self.get_path(key, "*")) if stale != path)
+        return out
+
+    def prune(self):
+        # Remove the snapshots of every other decoder version, and return
+        # how many there were
+        paths = glob.glob(os.path.join(self.directory, "*", "*.bfres"))
+        return self.remove(path for path in paths if not path.endswith(f"-{self.version}.bfres"))
+
+    def remove(self, paths):
+        removed = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def store(self, data, path: str):
+        # Written to a temporary file first, then renamed, so that workers
+        # loading the same file at once never read a partial snapshot
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        file = tempfile.NamedTemporaryFile("wb", dir=directory, delete=False)
+        try:
+            with file:
+                file.write(data)
+            os.replace(file.name, path)
+        except BaseException:
+            os.remove(file.name)
+            raise
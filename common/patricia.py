@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+# Index groups (dicts) of both platforms store their names as a patricia
+# tree, testing one bit of the name at each node
+
+def get_bit(name: bytes, bit: int):
+    # Index group bits are counted from the last character of the name
+    index = bit >> 3
+    if index >= len(name):
+        return 0
+    return (name[-1 - index] >> (bit & 7)) & 1
+
+def build_tree(names):
+    # Patricia tree of the names as [search_value, left_index, right_index]
+    # nodes, the first one being the root
+    nodes = [[-1, 0, 0]]
+    keys = [b""]
+    for name in names:
+        # Closest name already in the tree
+        parent, child = 0, nodes[0][1]
+        while nodes[child][0] > nodes[parent][0]:
+            parent, child = child, nodes[child][1 + get_bit(name, nodes[child][0])]
+        closest = keys[child]
+        bit = next((i for i in range(max(len(name), len(closest)) * 8) if get_bit(name, i) != get_bit(closest, i)), None)
+        # Names which no bit tells apart from another one (or from the
+        # root's, for empty ones) can't be stored
+        if bit is None:
+            kind = "Empty" if not name.strip(b"\x00") else "Duplicate"
+            raise ValueError(f"{kind} name in index group: {name.decode(errors='replace')!r}")
+
+        # The new node goes above the first one testing a higher bit
+        parent, child = 0, nodes[0][1]
+        while nodes[child][0] > nodes[parent][0] and nodes[child][0] < bit:
+            parent, child = child, nodes[child][1 + get_bit(name, nodes[child][0])]
+        index = len(nodes)
+        node = [bit, 0, 0]
+        node[1 + get_bit(name, bit)] = index
+        node[2 - get_bit(name, bit)] = child
+        nodes.append(node)
+        keys.append(name)
+        if parent == 0:
+            nodes[0][1] = index
+        else:
+            nodes[parent][1 + get_bit(name, nodes[parent][0])] = index
+    return nodes
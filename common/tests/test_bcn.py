@@ -0,0 +1,15 @@
+import numpy as np
+
+from bcn import BC1, BC4, decode_blocks
+
+def test_bc1_block():
+    # Pure red and pure blue endpoints, selectors 0, 1, 2, 3 on every row
+    block = np.array([[0x00, 0xF8, 0x1F, 0x00, 0xE4, 0xE4, 0xE4, 0xE4]], np.uint8)
+    pixels = decode_blocks(block, BC1).reshape(16, 4)
+    assert pixels[:4].tolist() == [[255, 0, 0, 255], [0, 0, 255, 255], [170, 0, 85, 255], [85, 0, 170, 255]]
+
+def test_bc4_signed_block():
+    # -127 and 127 endpoints, every texel on the first one
+    block = np.array([[0x81, 0x7F, 0, 0, 0, 0, 0, 0]], np.uint8)
+    assert set(decode_blocks(block, BC4, True)[..., 0].ravel().tolist()) == {0}
+    assert set(decode_blocks(block, BC4)[..., 0].ravel().tolist()) == {129}
@@ -0,0 +1,23 @@
+import os
+
+from cache import DecompressionCache
+from test_yaz0 import compress_runs, get_expected
+
+def test_snapshots_are_reused_and_pruned(tmp_path):
+    data = compress_runs(b"abc", 5000)
+    cache = DecompressionCache(str(tmp_path))
+    assert bytes(cache.decompress(data)) == get_expected(b"abc", 5000)
+    assert bytes(cache.decompress(data)) == get_expected(b"abc", 5000)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A snapshot by another decoder version is replaced by the next load of
+    # the same file, and removed by prune otherwise
+    key = cache.get_key(data)
+    os.rename(cache.get_path(key), cache.get_path(key, "old"))
+    cache.decompress(data)
+    assert not os.path.exists(cache.get_path(key, "old"))
+    other = cache.get_path("ff" + key[2:], "old")
+    os.makedirs(os.path.dirname(other), exist_ok=True)
+    open(other, "wb").close()
+    assert cache.prune() == 1
+    assert os.path.exists(cache.get_path(key))
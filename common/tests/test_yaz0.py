@@ -0,0 +1,61 @@
+import io
+
+import pytest
+
+import yaz0
+
+def compress_runs(literal: bytes, size: int):
+    # literal, then back-references of the longest length repeating it up to
+    # size bytes
+    body = bytearray()
+    ops = [("literal", byte) for byte in literal]
+    written = len(literal)
+    while written < size:
+        count = min(0x111, size - written)
+        ops.append(("reference", count))
+        written += count
+    for i in range(0, len(ops), 8):
+        group = ops[i:i + 8]
+        body.append(sum(0x80 >> j for j, (kind, _) in enumerate(group) if kind == "literal"))
+        for kind, value in group:
+            if kind == "literal":
+                body.append(value)
+            else:
+                # Long form, the distance is the length of the literal
+                body += bytes([(len(literal) - 1) >> 8, (len(literal) - 1) & 0xFF, value - 0x12])
+    return yaz0.HEADER.pack(b"Yaz0", size) + bytes(body)
+
+def get_expected(literal: bytes, size: int):
+    return (literal * (size // len(literal) + 1))[:size]
+
+@pytest.fixture
+def straddling():
+    # Runs of 0x111 bytes after 3 literals, one of them crosses every
+    # CHUNK_SIZE boundary of the streaming decompressor
+    literal, size = b"abc", 3 * yaz0.CHUNK_SIZE + 5
+    assert (yaz0.CHUNK_SIZE - len(literal)) % 0x111
+    return compress_runs(literal, size), get_expected(literal, size)
+
+def test_decompress(straddling):
+    data, expected = straddling
+    assert yaz0.decompress(data) == expected
+
+def test_decompressor(straddling):
+    data, expected = straddling
+    assert yaz0.Decompressor().decompress(data) == expected
+
+def test_decompressor_chunks(straddling):
+    data, expected = straddling
+    decompressor = yaz0.Decompressor()
+    output = b"".join(decompressor.decompress(data[i:i + 777]) for i in range(0, len(data), 777))
+    assert output == expected
+    assert decompressor.eof
+
+def test_reader(straddling):
+    data, expected = straddling
+    assert yaz0.Reader(io.BytesIO(data), 4096).read() == expected
+
+def test_truncated(straddling):
+    data, _ = straddling
+    with pytest.raises(ValueError):
+        yaz0.decompress(data[:len(data) // 2])
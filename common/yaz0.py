@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+
+import argparse
+import os
+import struct
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+# Magic, decompressed size, then 8 reserved bytes
+HEADER = struct.Struct(">4sI8x")
+
+# Back-references reach at most this far behind
+WINDOW_SIZE = 0x1000
+
+# Bytes decoded at a time by the streaming decompressor
+CHUNK_SIZE = 1024 * 1024
+
+def is_compressed(data):
+    return bytes(data[:4]) == b"Yaz0"
+
+def get_size(data):
+    # Decompressed size, from the header
+    if len(data) < HEADER.size:
+        raise ValueError("Not a Yaz0 file, too short for its header")
+    magic, size = HEADER.unpack_from(data, 0)
+    if magic != b"Yaz0":
+        raise ValueError("Not a Yaz0 file")
+    return size
+
+def copy(out: bytearray, dst: int, distance: int, count: int):
+    # Copy count bytes from distance bytes behind dst
+    start = dst - distance
+    if distance >= count:
+        out[dst:dst + count] = out[start:start + count]
+    else:
+        # Overlapping copies repeat the last distance bytes
+        out[dst:dst + count] = (out[start:dst] * (count // distance + 1))[:count]
+
+def decode(src, pos: int, out: bytearray, dst: int, end: int, code: int = 0, bits: int = 0, count: int = 0, distance: int = 0):
+    # Decode src from pos into out from dst, until either end is reached or
+    # src runs out in the middle of an operation. Returns where both stopped
+    # along with the state to resume from: the group (code byte, bits left
+    # in it) and what is left of a back-reference cut by end (count,
+    # distance). Whole groups of literals and back-references are copied as
+    # slices
+    if count:
+        copied = min(count, end - dst)
+        copy(out, dst, distance, copied)
+        dst += copied
+        count -= copied
+
+    length = len(src)
+    while dst < end:
+        if not bits:
+            if pos >= length:
+                break
+            code = src[pos]
+            if code == 0xFF and pos + 9 <= length and dst + 8 <= end:
+                out[dst:dst + 8] = src[pos + 1:pos + 9]
+                pos += 9
+                dst += 8
+                continue
+            pos += 1
+            bits = 8
+
+        if code & 0x80:
+            if pos >= length:
+                break
+            out[dst] = src[pos]
+            pos += 1
+            dst += 1
+        else:
+            if pos + 2 > length:
+                break
+            count = src[pos] >> 4
+            if not count and pos + 3 > length:
+                break
+            distance = ((src[pos] & 0xF) << 8 | src[pos + 1]) + 1
+            if count:
+                count += 2
+                pos += 2
+            else:
+                count = src[pos + 2] + 0x12
+                pos += 3
+
+            if distance > dst:
+                raise ValueError("Invalid Yaz0 data, back-reference before the start")
+            copied = min(count, end - dst)
+            copy(out, dst, distance, copied)
+            dst += copied
+            count -= copied
+
+        code = (code << 1) & 0xFF
+        bits -= 1
+    return pos, dst, code, bits, count, distance
+
+def decompress(data, out: bytearray = None):
+    # Decompress a whole Yaz0 file into out, or into a new bytearray, both
+    # sized from the header so the output is never reallocated
+    size = get_size(data)
+    if out is None:
+        out = bytearray(size)
+    elif len(out) < size:
+        raise ValueError(f"Output buffer too small, {len(out)} bytes for {size}")
+    dst = decode(data, HEADER.size, out, 0, size)[1]
+    if dst < size:
+        raise ValueError(f"Truncated Yaz0 data, {dst} of {size} bytes decompressed")
+    return out
+
+class Decompressor():
+    # Decompresses a Yaz0 file given in chunks, like zlib.decompressobj.
+    # Only the back-reference window is kept between chunks
+    def __init__(self):
+        self.input = bytearray()
+        self.size: int = None
+        self.written = 0
+        self.history = bytearray()
+        # Decoder state between chunks, see decode()
+        self.state = [0, 0, 0, 0]
+
+    @property
+    def eof(self):
+        return self.size is not None and self.written >= self.size
+
+    def decompress(self, chunk: bytes):
+        # Bytes decompressed out of everything received so far
+        self.input += chunk
+        if self.size is None:
+            if len(self.input) < HEADER.size:
+                return b""
+            self.size = get_size(self.input)
+            del self.input[:HEADER.size]
+
+        output = bytearray()
+        while not self.eof:
+            start = len(self.history)
+            end = start + min(CHUNK_SIZE, self.size - self.written)
+            out = self.history + bytearray(end - start)
+            pos, dst, *self.state = decode(self.input, 0, out, start, end, *self.state)
+            del self.input[:pos]
+            output += out[start:dst]
+            self.written += dst - start
+            self.history = out[max(0, dst - WINDOW_SIZE):dst]
+            if dst < end:
+                break
+        return bytes(output)
+
+class Reader():
+    # A file-like object reading the decompressed bytes of a Yaz0 file-like
+    # object, chunk by chunk, so they can be parsed while still arriving:
+    # StreamReader(Reader(file))
+    def __init__(self, file, chunk_size: int = CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decompressor = Decompressor()
+        self.buffer = bytearray()
+
+    def read(self, size: int = -1):
+        while (size < 0 or len(self.buffer) < size) and not self.decompressor.eof:
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                break
+            self.buffer += self.decompressor.decompress(chunk)
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+# Batches of files
+# ----------------
+
+def get_output_path(path: str, root: str, output: str):
+    # a/b.sbfres becomes OUTPUT/a/b.bfres, other names just lose their .szs
+    # or .yaz0 extension if they have one
+    name, extension = os.path.splitext(os.path.relpath(path, root))
+    if extension.lower() in (".szs", ".yaz0"):
+        extension = ""
+    elif extension.lower().startswith(".s"):
+        extension = "." + extension[2:]
+    return os.path.join(output, name + extension)
+
+def decompress_file(path: str, output_path: str):
+    with open(path, "rb") as file:
+        data = file.read()
+    out = decompress(data)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as file:
+        file.write(out)
+    return len(out)
+
+def decompress_chunk(paths: List[str], root: str, output: str):
+    reports = []
+    for path in paths:
+        output_path = get_output_path(path, root, output)
+        try:
+            reports.append({"path": path, "output": output_path, "size": decompress_file(path, output_path), "errors": []})
+        except Exception:
+            reports.append({"path": path, "output": None, "size": 0, "errors": [traceback.format_exc()]})
+    return reports
+
+def decompress_files(paths: List[str], root: str, output: str, workers: int = None, files_per_task: int = 16):
+    # Decompress every file of paths into the same tree under output, across
+    # a pool of worker processes. Returns one report per file
+    reports: List[Dict] = []
+    chunks = [paths[i:i + files_per_task] for i in range(0, len(paths), files_per_task)]
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(decompress_chunk, chunk, root, output) for chunk in chunks]
+        for future in as_completed(futures):
+            reports.extend(future.result())
+    reports.sort(key=lambda report: report["path"])
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description="Decompress every Yaz0 file in a directory tree")
+    parser.add_argument("input", help="a Yaz0 file or a directory to search")
+    parser.add_argument("output", help="directory to decompress to")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--extension", default=".sbfres", help="extension of the files to decompress")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.input):
+        root = args.input
+        paths = [
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(root) for name in names if name.lower().endswith(args.extension)
+        ]
+    else:
+        root, paths = os.path.dirname(args.input), [args.input]
+    reports = decompress_files(paths, root, args.output, args.workers)
+
+    failed = [report for report in reports if report["errors"]]
+    print(f"Decompressed {len(reports)} files, {len(failed)} with errors")
+    for report in failed:
+        print(f"  {report['path']}: {report['errors'][0].splitlines()[-1]}")
+
+if __name__ == "__main__":
+    main()
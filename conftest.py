@@ -0,0 +1,42 @@
+import os
+import sys
+
+# The Wii U and Switch scripts have modules of the same names (classes,
+# formats, writer...), imported flat from their own directory. When both
+# test directories run in one session, the modules of each platform are
+# swapped into sys.modules, and its directory to the front of sys.path,
+# while its tests are collected and while they run
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PLATFORMS = ("WiiU", "Switch")
+
+# Modules loaded from each platform directory, while another one is active
+loaded = {platform: {} for platform in PLATFORMS}
+active = None
+
+def get_platform(path):
+    platform = os.path.relpath(str(path), ROOT).split(os.sep)[0]
+    return platform if platform in PLATFORMS else None
+
+def activate(platform):
+    global active
+    if platform is None or platform == active:
+        return
+    if active is not None:
+        directory = os.path.join(ROOT, active)
+        modules = loaded[active] = {
+            name: module for name, module in sys.modules.items()
+            if os.path.dirname(os.path.abspath(getattr(module, "__file__", None) or os.sep)) == directory
+        }
+        for name in modules:
+            del sys.modules[name]
+    directories = [os.path.join(ROOT, platform) for platform in PLATFORMS]
+    sys.path[:] = [path for path in sys.path if os.path.abspath(path or os.curdir) not in directories]
+    sys.path.insert(0, os.path.join(ROOT, platform))
+    sys.modules.update(loaded[platform])
+    active = platform
+
+def pytest_collectstart(collector):
+    activate(get_platform(collector.path))
+
+def pytest_runtest_setup(item):
+    activate(get_platform(item.path))